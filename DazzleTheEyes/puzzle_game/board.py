@@ -39,6 +39,21 @@ class Board:
         # 存储拼盘中的碎片，使用二维列表表示固定物理网格 (BOARD_ROWS x BOARD_COLS)
         self.grid = [[None for _ in range(settings.BOARD_COLS)] for _ in range(settings.BOARD_ROWS)]
 
+        # --- 完成检测索引 ---
+        # 每个碎片按 (图片ID, 锚点行, 锚点列) 计数，锚点 = 碎片物理位置 - 碎片在原图中的逻辑位置。
+        # 某个锚点的计数等于该图片的碎片总数，即说明以该锚点为左上角的完整图片块已拼好。
+        # 网格单元的修改统一经过 _set_grid_cell / _clear_grid，保证索引与 self.grid 同步。
+        self._anchor_piece_counts = {} # {(image_id, anchor_row, anchor_col): 已就位碎片数}
+        self._full_anchors = set() # 计数已满的锚点，check_completion 只需检查这里
+
+        # --- 绘制缓存 ---
+        # 背景图 + 可放置区域指示层预先合成到 _static_layer，只在区域尺寸或背景图改变时重建。
+        # 位于可放置区域网格内的碎片常驻 _visible_pieces_group (随 _set_grid_cell 维护)，
+        # 由 LayeredDirty 增量绘制到 _board_canvas 上：只有 dirty 的碎片 (移动/下落/交换) 才会重绘。
+        self._static_layer = None # 背景+指示层合成 Surface，None 表示需要重建
+        self._board_canvas = None # 静态层 + 碎片的持久画布，每帧整体 blit 到屏幕
+        self._visible_pieces_group = pygame.sprite.LayeredDirty()
+
         # 选中的碎片 (用于点击交换)
         self.selected_piece = None
 
@@ -177,6 +192,10 @@ class Board:
         self.playable_offset_col = (settings.BOARD_COLS - self.playable_cols) // 2
         self.playable_offset_row = (settings.BOARD_ROWS - self.playable_rows) // 2
 
+        # 区域改变：指示层位置变化，可见碎片集合也随之变化
+        self._static_layer = None
+        self._sync_visible_pieces()
+
         print(f"Board: 设置可放置区域尺寸: {self.playable_cols}x{self.playable_rows}，物理偏移: ({self.playable_offset_row},{self.playable_offset_col})") # Debug
 
 
@@ -188,6 +207,8 @@ class Board:
         Args:
             background_name (str): 背景图文件名。
         """
+        self._static_layer = None # 背景图改变 (包括加载失败)，下次绘制时重建静态层
+
         if background_name is None:
              self.background_image = None
              self._current_background_name = None # Record the name loaded (None)
@@ -271,7 +292,7 @@ class Board:
             r, c = initial_playable_grid_positions[i] # Get the next position in the playable area (ordered)
 
             # Assign piece to grid position
-            self.grid[r][c] = piece
+            self._set_grid_cell(r, c, piece)
             # Update piece's current grid position and screen position (no animation for initial fill)
             piece.set_grid_position(r, c, animate=False)
 
@@ -335,7 +356,7 @@ class Board:
         # 确保存档的网格布局数据尺寸匹配当前的物理拼盘尺寸
         if not isinstance(grid_layout_data, list) or len(grid_layout_data) != settings.BOARD_ROWS:
              print(f"错误: Board: 存档数据行数不匹配当前 Board 尺寸。预期 {settings.BOARD_ROWS}，实际 {len(grid_layout_data) if isinstance(grid_layout_data, list) else '非列表'}。清空拼盘。")
-             self.grid = [[None for _ in range(settings.BOARD_COLS)] for _ in range(settings.BOARD_ROWS)]
+             self._clear_grid()
              if isinstance(self.all_pieces_group, pygame.sprite.Group): self.all_pieces_group.empty()
              else: self.all_pieces_group = pygame.sprite.Group()
              return # Data mismatch, stop loading
@@ -343,14 +364,14 @@ class Board:
         # 检查存档数据的列数
         if grid_layout_data and (not isinstance(grid_layout_data[0], list) or len(grid_layout_data[0]) != settings.BOARD_COLS):
              print(f"错误: Board: 存档数据第一行列数不匹配当前 Board 尺寸。预期 {settings.BOARD_COLS}，实际 {len(grid_layout_data[0]) if grid_layout_data and isinstance(grid_layout_data[0], list) else '非列表'}。清空拼盘。")
-             self.grid = [[None for _ in range(settings.BOARD_COLS)] for _ in range(settings.BOARD_ROWS)]
+             self._clear_grid()
              if isinstance(self.all_pieces_group, pygame.sprite.Group): self.all_pieces_group.empty()
              else: self.all_pieces_group = pygame.sprite.Group()
              return # Data mismatch, stop loading
 
 
         # 清空当前的网格和 Sprite Group
-        self.grid = [[None for _ in range(settings.BOARD_COLS)] for _ in range(settings.BOARD_ROWS)]
+        self._clear_grid()
         if isinstance(self.all_pieces_group, pygame.sprite.Group):
              self.all_pieces_group.empty()
         else:
@@ -365,7 +386,7 @@ class Board:
             # Ensure row data is a list and has correct number of columns
             if not isinstance(grid_layout_data[r], list) or len(grid_layout_data[r]) != settings.BOARD_COLS:
                  print(f"错误: Board: 存档数据第 {r} 行格式错误或列数不匹配。预期 {settings.BOARD_COLS} 列。跳过该行。") # Debug
-                 self.grid[r] = [None for _ in range(settings.BOARD_COLS)] # Fill with None for safety
+                 # 网格刚被清空，该行保持全部为 None 即可
                  continue
 
             for c in range(settings.BOARD_COLS):
@@ -381,7 +402,6 @@ class Board:
                         # 验证 piece_info 数据
                         if img_id is None or orig_r is None or orig_c is None:
                              print(f"警告: Board: 存档碎片信息 ({piece_info}) 格式错误或缺失关键字段 (id/orig_r/orig_c)。槽位 ({r},{c}) 将为空。") # Debug
-                             self.grid[r][c] = None
                              continue # Skip creating piece
 
                         # 从 ImageManager 获取碎片 surface
@@ -402,7 +422,7 @@ class Board:
                              # If surface is not available, try to queue it for high-priority loading
                              # This might happen if loading was interrupted or cache incomplete
                              print(f"警告: Board: 存档碎片图片ID {img_id}, 原始 ({orig_r},{orig_c}) 的 surface 未加载在 ImageManager 中或获取失败。槽位 ({r},{c}) 将为空。加入高优先级队列。") # Debug
-                             self.grid[r][c] = None # 该槽位留空
+                             # 该槽位留空 (网格已清空)
                              # Add image_id to high-priority queue if not already there (check in all_image_files to be safe)
                              if hasattr(self.image_manager, '_high_priority_load_queue') and img_id in self.image_manager.all_image_files:
                                  # Add only if not already in high priority or normal queue
@@ -415,7 +435,7 @@ class Board:
 
                         # 创建 Piece 对象，设置其原始信息和当前网格位置
                         piece = Piece(piece_surface, img_id, orig_r, orig_c, r, c)
-                        self.grid[r][c] = piece # Assign piece to grid position
+                        self._set_grid_cell(r, c, piece) # Assign piece to grid position
 
 
                         # 将 Piece 逐个添加到 Sprite Group
@@ -468,7 +488,7 @@ class Board:
                         # Get image ID safely from piece_info if available
                         err_img_id = piece_info.get('id') if isinstance(piece_info, dict) else 'N/A'
                         print(f"错误: Board: 加载存档碎片信息 (ID: {err_img_id}, 原始: {piece_info.get('orig_r')},{piece_info.get('orig_c')}) 或创建 Piece/添加到 Group 异常: {e}. 槽位 ({r},{c}) 将为空。") # Debug <-- 修改打印信息，安全获取id
-                        self.grid[r][c] = None # 该槽位留空
+                        self._set_grid_cell(r, c, None) # 该槽位留空
 
 
                 else:
@@ -528,8 +548,11 @@ class Board:
              return False # Swap failed
 
         # 在网格中交换
-        self.grid[r1][c1] = piece2
-        self.grid[r2][c2] = piece1
+        # 先清空两个槽位再写入，避免交换过程中同一碎片在索引中被计数两次
+        self._set_grid_cell(r1, c1, None)
+        self._set_grid_cell(r2, c2, None)
+        self._set_grid_cell(r1, c1, piece2)
+        self._set_grid_cell(r2, c2, piece1)
 
         # 更新碎片自身的网格位置属性 (非动画方式，因为这是瞬间交换)
         if piece1:
@@ -599,9 +622,9 @@ class Board:
 
 
         self.dragging_piece = piece
-        # 将正在拖拽的碎片从 Group 中移除，以便单独绘制它在最上层
-        if self.dragging_piece in self.all_pieces_group:
-             self.all_pieces_group.remove(self.dragging_piece)
+        # 正在拖拽的碎片在画布上隐藏 (原槽位显示背景)，由 draw 单独绘制在最上层
+        # 不再从 Group 中移除/加回，visible 的改变会自动标记 dirty
+        self.dragging_piece.visible = 0
 
         # print(f"开始拖拽碎片: 图片ID {piece.original_image_id}, 当前位置 ({piece.current_grid_row},{piece.current_grid_col})") # Debug
 
@@ -614,6 +637,7 @@ class Board:
             current_grid_pos = (self.dragging_piece.current_grid_row, self.dragging_piece.current_grid_col)
             # Note: Using animate=False here for instant snap to grid when dragging stops
             self.dragging_piece.set_grid_position(current_grid_pos[0], current_grid_pos[1], animate=False) # 停止拖拽瞬间归位
+            self.dragging_piece.visible = 1 # 重新显示在画布上
 
             # 将碎片加回 Sprite Group
             # Ensure the group is valid before adding
@@ -665,95 +689,96 @@ class Board:
         return False # 没有图片完成
 
 
-    # 替换 check_completion 方法 (在可放置区域内检查完成，使用图片的独立逻辑尺寸)
     def check_completion(self):
         """
         检查拼盘中是否存在一个完整的 图片逻辑列数 x 图片逻辑行数 图片块。
         只在当前可放置区域内进行检查。
         返回已完成的图片ID，如果没有则返回None。
         如果找到，记录完成区域的左上角物理网格位置在 self._completed_area_start_pos。
-        """
-        # 遍历所有可能的物理网格位置作为完成块的左上角
-        # 这些位置必须位于当前可放置区域内
-        # 物理起始行的范围: 从 self.playable_offset_row 到 self.playable_offset_row + self.playable_rows - 1
-        # 物理起始列的范围: 从 self.playable_offset_col 到 self.playable_offset_col + self.playable_cols - 1
-        # 但是，潜在完成块的右下角也必须在可放置区域内，这取决于图片的逻辑尺寸。
 
-        # Get the playable area rect in physical grid coordinates
-        playable_rect_grid = pygame.Rect(self.playable_offset_col, self.playable_offset_row, self.playable_cols, self.playable_rows)
-
-
-        # 遍历可放置区域内的所有物理网格位置作为潜在完成块的左上角
-        for start_row in range(self.playable_offset_row, self.playable_offset_row + self.playable_rows):
-            for start_col in range(self.playable_offset_col, self.playable_offset_col + self.playable_cols):
+        完成判断直接读取完成检测索引 (_full_anchors)，不再扫描整个可放置区域。
+        """
+        playable_row_end = self.playable_offset_row + self.playable_rows # Exclusive
+        playable_col_end = self.playable_offset_col + self.playable_cols # Exclusive
 
-                # 获取该位置的碎片
-                top_left_piece = self.grid[start_row][start_col]
+        # 按 (行, 列) 顺序检查，与逐格扫描时找到的第一个完成块一致
+        for image_id, start_row, start_col in sorted(self._full_anchors, key=lambda key: (key[1], key[2])):
+            img_logic_c, img_logic_r = self.image_manager.image_logic_dims[image_id]
 
-                # 如果左上角没有碎片，或者碎片的原始位置不是逻辑上的 (0,0)，则不可能从这里开始一个完整的图片
-                if top_left_piece is None or top_left_piece.original_row != 0 or top_left_piece.original_col != 0:
-                    continue # 检查下一个可能的起始位置
+            # 整个完成块必须完全位于当前可放置区域内
+            if start_row < self.playable_offset_row or start_col < self.playable_offset_col or \
+               start_row + img_logic_r > playable_row_end or start_col + img_logic_c > playable_col_end:
+                continue
 
-                # 确定要检查的目标图片ID
-                target_image_id = top_left_piece.original_image_id
+            self._completed_area_start_pos = (start_row, start_col)
+            return image_id # 返回完成的图片ID
 
-                # === 根据图片ID获取该图片的逻辑尺寸 ===
-                if target_image_id not in self.image_manager.image_logic_dims:
-                     print(f"警告: Board: check_completion: 图片ID {target_image_id} 逻辑尺寸配置缺失。跳过检查。") # Debug
-                     continue # 如果图片的逻辑尺寸未知，无法检查完成
+        return None # 没有找到完整的图片
 
-                img_logic_c, img_logic_r = self.image_manager.image_logic_dims[target_image_id] # 获取该图片的逻辑列数和行数
 
-                # === 检查整个完成块是否完全位于当前可放置区域内 (只检查右下角是否超出) ===
-                # 完成块的物理范围：从 (start_row, start_col) 到 (start_row + img_logic_r - 1, start_col + img_logic_c - 1)
-                block_bottom_right_row = start_row + img_logic_r - 1
-                block_bottom_right_col = start_col + img_logic_c - 1
+    def _set_grid_cell(self, r, c, piece):
+        """
+        写入物理网格槽位，并同步更新完成检测索引 (O(1))。
 
-                # Check if the bottom-right corner of the potential block is within the playable area boundaries
-                if block_bottom_right_row >= self.playable_offset_row + self.playable_rows or \
-                   block_bottom_right_col >= self.playable_offset_col + self.playable_cols:
-                    # If the bottom-right corner is outside the playable area, this block cannot be complete within it
-                    # print(f"Debug: Board: check_completion: 图片ID {target_image_id} 潜在完成块 ({start_row},{start_col}) 物理尺寸 {img_logic_r}x{img_logic_c} 右下角 ({block_bottom_right_row},{block_bottom_right_col}) 超出可放置区域。") # Debug
-                    continue # Check next potential start position
+        Args:
+            r (int): 物理行。
+            c (int): 物理列。
+            piece (Piece or None): 放入槽位的碎片，None 表示清空。
+        """
+        old_piece = self.grid[r][c]
+        if old_piece is piece:
+            return
+        if old_piece is not None:
+            self._update_completion_index(old_piece, r, c, -1)
+            self._visible_pieces_group.remove(old_piece)
+        self.grid[r][c] = piece
+        if piece is not None:
+            self._update_completion_index(piece, r, c, 1)
+            if self._is_in_playable_area(r, c):
+                self._visible_pieces_group.add(piece)
+
+
+    def _clear_grid(self):
+        """清空物理网格并重置完成检测索引。"""
+        self.grid = [[None for _ in range(settings.BOARD_COLS)] for _ in range(settings.BOARD_ROWS)]
+        self._anchor_piece_counts.clear()
+        self._full_anchors.clear()
+        self._visible_pieces_group.empty()
 
 
-                is_complete = True # 假设这个区域是一个完整的图片块
+    def _is_in_playable_area(self, r, c):
+        """物理网格位置 (r, c) 是否位于当前可放置区域内。"""
+        return (self.playable_offset_row <= r < self.playable_offset_row + self.playable_rows and
+                self.playable_offset_col <= c < self.playable_offset_col + self.playable_cols)
 
-                # 遍历这个 img_logic_r 行 x img_logic_c 列 区域内的所有位置 (相对于起始点的偏移 dr, dc)
-                for dr in range(img_logic_r): # 遍历逻辑行 (0 to img_logic_r - 1)
-                    for dc in range(img_logic_c): # 遍历逻辑列 (0 to img_logic_c - 1)
-                        current_row = start_row + dr # 对应的物理行
-                        current_col = start_col + dc # 对应的物理列
-                        # 确保检查在板子范围内 (应始终为真，因为我们遍历的可放置区域和块都在板子范围内)
-                        # if not (0 <= current_row < settings.BOARD_ROWS and 0 <= current_col < settings.BOARD_COLS):
-                        #     is_complete = False # Area extends beyond board (should not happen)
-                        #     break
-                        current_piece = self.grid[current_row][current_col]
 
-                        # 检查当前位置是否有碎片
-                        if current_piece is None:
-                            is_complete = False
-                            break # 该块不完整，跳出内层循环
+    def _sync_visible_pieces(self):
+        """可放置区域改变后，按网格重建常驻的可见碎片 Group。"""
+        self._visible_pieces_group.empty()
+        for r in range(settings.BOARD_ROWS):
+            for c in range(settings.BOARD_COLS):
+                piece = self.grid[r][c]
+                if piece is not None and self._is_in_playable_area(r, c):
+                    self._visible_pieces_group.add(piece)
 
-                        # 检查碎片的原始信息是否与目标图片ID和预期的原始位置匹配
-                        # 位于 (current_row, current_col) 的碎片应该是逻辑上原始位于 (dr, dc) 的碎片
-                        if (current_piece.original_image_id != target_image_id or
-                            current_piece.original_row != dr or
-                            current_piece.original_col != dc):
-                            is_complete = False
-                            break # 信息不匹配，该块不完整，跳出内层循环
 
-                    if not is_complete:
-                        break # 如果内层循环发现不完整，跳出外层循环
+    def _update_completion_index(self, piece, r, c, delta):
+        """将位于 (r, c) 的碎片计入 (delta=1) 或移出 (delta=-1) 其锚点的计数。"""
+        img_dims = self.image_manager.image_logic_dims.get(piece.original_image_id)
+        if img_dims is None:
+            return # 逻辑尺寸未知的图片无法完成，不计入索引
 
-                # 如果内层循环都通过，说明找到了一个完整的图片块
-                if is_complete:
-                    # 在返回图片ID之前，记录这个完成的区域的左上角物理网格位置
-                    self._completed_area_start_pos = (start_row, start_col)
-                    # print(f"Debug: Board: check_completion: 找到完成的图片ID {target_image_id} 在 ({start_row},{start_col})") # Debug
-                    return target_image_id # 返回完成的图片ID
+        key = (piece.original_image_id, r - piece.original_row, c - piece.original_col)
+        count = self._anchor_piece_counts.get(key, 0) + delta
+        if count > 0:
+            self._anchor_piece_counts[key] = count
+        else:
+            self._anchor_piece_counts.pop(key, None)
 
-        return None # 遍历所有可能位置后没有找到完整的图片
+        if count >= img_dims[0] * img_dims[1]:
+            self._full_anchors.add(key)
+        else:
+            self._full_anchors.discard(key)
 
 
     def _process_completed_picture(self):
@@ -952,7 +977,7 @@ class Board:
                     if piece_to_remove and isinstance(piece_to_remove, Piece) and piece_to_remove.original_image_id == completed_image_id and \
                        piece_to_remove.original_row == dr and piece_to_remove.original_col == dc:
                          pieces_to_remove_list.append(piece_to_remove)
-                         self.grid[r][c] = None # 将网格位置设为 None
+                         self._set_grid_cell(r, c, None) # 将网格位置设为 None
                     # else:
                          # print(f"警告: Board: remove_completed_pieces: 尝试移除的区域 ({r},{c}) 没有属于完成图片 {completed_image_id} 的碎片或为空。") # Debug
 
@@ -965,6 +990,11 @@ class Board:
                 print(f"致命错误: Board: 从 Group 中移除已完成碎片时发生异常: {e}.") # Debug
                 # Handle error
 
+        # 将移除的碎片回收到 ImageManager 的对象池，之后的填充会复用这些 Piece 对象
+        # 仍被选中或拖拽引用的碎片不回收，避免同一个对象被重置后仍被旧引用使用
+        pieces_to_release = [piece for piece in pieces_to_remove_list if piece is not self.selected_piece and piece is not self.dragging_piece]
+        self.image_manager.release_pieces(pieces_to_release)
+
         # TODO: 可以添加一个效果，让移除的碎片消失或爆炸等 (可选)
 
 
@@ -1077,7 +1107,7 @@ class Board:
 
 
         # Temporarily clear the grid while moving
-        self.grid = [[None for _ in range(settings.BOARD_COLS)] for _ in range(settings.BOARD_ROWS)]
+        self._clear_grid()
 
         # Calculate the shift needed to align the old area's bottom-left with the new area's bottom-left
         # Old bottom-left physical grid: (old_offset_row + old_rows - 1, old_offset_col)
@@ -1102,7 +1132,7 @@ class Board:
                   # Place the piece at the new position in the grid
                   # Ensure the target slot is empty (should be after grid clear)
                   if self.grid[new_r][new_c] is None:
-                       self.grid[new_r][new_c] = piece
+                       self._set_grid_cell(new_r, new_c, piece)
                        # Update the piece's position (no animation for upgrade move)
                        piece.set_grid_position(new_r, new_c, animate=False)
                   else:
@@ -1158,13 +1188,13 @@ class Board:
             for r in range(playable_row_end - 1, playable_row_start - 1, -1):
                  if self.grid[r][c] is not None:
                      pieces_in_column_within_playable_area.append(self.grid[r][c])
-                     self.grid[r][c] = None # Clear the piece's original position
+                     self._set_grid_cell(r, c, None) # Clear the piece's original position
 
             # Now, refill the column from the bottom of the playable area with the collected pieces
             current_row_to_fill = playable_row_end - 1 # Start filling from the bottom row of the playable area
             for piece in pieces_in_column_within_playable_area:
                  # Place the piece at the new physical grid position
-                 self.grid[current_row_to_fill][c] = piece
+                 self._set_grid_cell(current_row_to_fill, c, piece)
                  # Update the piece's grid position and initiate fall animation to the new physical row's screen Y coordinate
                  # Piece's set_grid_position calculates the screen position based on the provided grid coordinates
                  piece.set_grid_position(current_row_to_fill, c, animate=True)
@@ -1258,7 +1288,7 @@ class Board:
 
 
                  # Assign piece to grid position (its final logical place)
-                 self.grid[r][c] = piece # Place piece in grid at its final destination
+                 self._set_grid_cell(r, c, piece) # Place piece in grid at its final destination
                  piece.current_grid_row = r # Update piece's internal grid pos immediately
                  piece.current_grid_col = c
 
@@ -1296,43 +1326,18 @@ class Board:
     # 替换 draw 方法 (绘制背景图和可放置区域指示层，只绘制区域内碎片)
     def draw(self, surface):
         """在指定的surface上绘制拼盘的背景图、可放置区域指示层、碎片、选中效果和 debug 信息。"""
-        # 绘制背景图 (如果存在)
-        if self.background_image:
-             surface.blit(self.background_image, (0, 0)) # 背景图覆盖整个屏幕
-
-
-        # 绘制可放置区域的指示图层 (半透明黑色矩形)
-        # === 关键修改：使用 get_playable_area_rect 获取当前可放置区域的 Rect ===
+        # 背景图 + 可放置区域指示层 + 区域内碎片，均来自增量维护的画布，每帧只需一次 blit
         playable_area_rect_physical = self.get_playable_area_rect()
-
-        # 创建一个半透明 Surface 用于绘制覆盖层
-        overlay_surface = pygame.Surface(playable_area_rect_physical.size, pygame.SRCALPHA)
-        overlay_surface.fill(settings.PLAYABLE_AREA_OVERLAY_COLOR) # 使用设定的带透明度的颜色
-        surface.blit(overlay_surface, playable_area_rect_physical.topleft) # 绘制到可放置区域的位置
-
+        self._refresh_board_canvas(surface, playable_area_rect_physical)
 
         # === 关键修改：只有在非动画状态下才绘制常规碎片 ===
-        if self.current_board_state != settings.BOARD_STATE_COMPLETION_ANIMATING:
-            # 绘制所有非拖拽中的碎片
-            # Temporarily remove the dragging piece from the group to draw it on top later
-            # Ensure the group is valid before attempting remove/add
-            if isinstance(self.all_pieces_group, pygame.sprite.Group):
-                if self.dragging_piece and isinstance(self.dragging_piece, Piece) and self.dragging_piece in self.all_pieces_group:
-                     self.all_pieces_group.remove(self.dragging_piece)
-
-                # === 关键修改：只绘制位于当前可放置区域内的碎片 (或与区域相交的碎片，例如下落中) ===
-                # Create a temporary group containing only sprites within or intersecting the playable area rect
-                playable_pieces_group = pygame.sprite.Group()
-                for piece in self.all_pieces_group:
-                     # Ensure it's a Piece object before accessing rect/other attributes
-                     if isinstance(piece, Piece):
-                          # Check if the piece's rect intersects the playable area rect
-                          if piece.rect.colliderect(playable_area_rect_physical):
-                              playable_pieces_group.add(piece)
-                     # else: print(f"警告: Sprite Group 中包含非 Piece 对象: {type(piece)}") # Debug invalid object
-
-                # 绘制 Group中位于可放置区域内 或与之相交 的所有 Sprite
-                playable_pieces_group.draw(surface)
+        if self.current_board_state == settings.BOARD_STATE_COMPLETION_ANIMATING:
+            # 动画期间只显示背景和指示层，碎片的 dirty 标记保留到动画结束后再处理
+            surface.blit(self._static_layer, (0, 0))
+        else:
+            # 只重绘 dirty 的碎片 (以及被它们遮挡/离开的区域)，其余部分保留上一帧的结果
+            self._visible_pieces_group.draw(self._board_canvas)
+            surface.blit(self._board_canvas, (0, 0))
 
 
             # 绘制选中碎片的特殊效果 (例如绘制边框)
@@ -1361,16 +1366,6 @@ class Board:
                  # else: print(f"警告: dragging_piece 不是 Piece 对象: {type(self.dragging_piece)}") # Debug
 
 
-            # Add the dragging piece back to the group after drawing
-            if isinstance(self.all_pieces_group, pygame.sprite.Group):
-                if self.dragging_piece and isinstance(self.dragging_piece, Piece) and self.dragging_piece not in self.all_pieces_group:
-                     try:
-                         self.all_pieces_group.add(self.dragging_piece)
-                     except Exception as e:
-                          print(f"致命错误: Board: 将拖拽完的碎片添加到 Group 时发生异常: {e}.") # Debug
-                          # Handle error
-
-
         # Draw debug piece info if the debug flag is set in Game
         # Through ImageManager, access Game instance and debug font
         if hasattr(self.image_manager.game, 'display_piece_info') and self.image_manager.game.display_piece_info:
@@ -1398,9 +1393,9 @@ class Board:
                                      # Draw the text
                                      surface.blit(text_surface, text_rect)
 
-                 # Also draw info for the dragging piece if it's active and not in the group
+                 # Also draw info for the dragging piece if it's active
                  # The dragging piece's rect is updated by InputHandler
-                 if self.dragging_piece and isinstance(self.dragging_piece, Piece) and self.dragging_piece not in self.all_pieces_group:
+                 if self.dragging_piece and isinstance(self.dragging_piece, Piece):
                       # Draw debug info for the dragging piece regardless of its logical grid position, centered on its visual rect
                       debug_text = f"ID:{self.dragging_piece.original_image_id} ({self.dragging_piece.original_row},{self.dragging_piece.original_col}) [{self.dragging_piece.current_grid_row},{self.dragging_piece.current_grid_col}]"
                       text_surface = debug_font.render(debug_text, True, settings.DEBUG_TEXT_COLOR)
@@ -1411,6 +1406,41 @@ class Board:
         # Note: The active animation drawing (CompletionAnimation.draw) happens in Game.draw, AFTER Board.draw
 
 
+    def _refresh_board_canvas(self, surface, playable_area_rect_physical):
+        """
+        按需重建静态层 (背景图 + 可放置区域指示层)，并更新下落中碎片的可见性。
+
+        Args:
+            surface (pygame.Surface): 最终绘制目标，用于确定画布尺寸和像素格式。
+            playable_area_rect_physical (pygame.Rect): 当前可放置区域的屏幕 Rect。
+        """
+        if (self._static_layer is None or self._board_canvas is None or
+                self._board_canvas.get_size() != surface.get_size()):
+            static_layer = pygame.Surface(surface.get_size(), 0, surface)
+            static_layer.fill(settings.BLACK)
+            if self.background_image:
+                static_layer.blit(self.background_image, (0, 0)) # 背景图覆盖整个屏幕
+
+            # 可放置区域的指示图层 (半透明黑色矩形)，只在重建时分配一次
+            overlay_surface = pygame.Surface(playable_area_rect_physical.size, pygame.SRCALPHA)
+            overlay_surface.fill(settings.PLAYABLE_AREA_OVERLAY_COLOR) # 使用设定的带透明度的颜色
+            static_layer.blit(overlay_surface, playable_area_rect_physical.topleft)
+
+            self._static_layer = static_layer
+            self._board_canvas = pygame.Surface(surface.get_size(), 0, surface)
+            # 用新的静态层作为 LayeredDirty 的背景，并要求下次 draw 整体重绘画布
+            self._visible_pieces_group.clear(self._board_canvas, self._static_layer)
+            self._visible_pieces_group.repaint_rect(self._board_canvas.get_rect())
+
+        # 与原先的 colliderect 过滤保持一致：尚未进入可放置区域的下落碎片不绘制。
+        # 只检查下落中或当前隐藏的碎片，静止碎片的可见性不会变化。
+        for piece in self._visible_pieces_group.sprites():
+            if piece.is_falling or not piece.visible:
+                should_show = piece is not self.dragging_piece and piece.rect.colliderect(playable_area_rect_physical)
+                if piece.visible != should_show:
+                    piece.visible = 1 if should_show else 0
+
+
     def update(self, dt):
          """
          更新Board的状态，包括处理完成流程和碎片下落动画。
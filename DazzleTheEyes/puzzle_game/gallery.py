@@ -8,6 +8,7 @@ import utils # 导入工具函数
 import image_manager # 导入图像管理器
 from ui_elements import Button # 导入 Button 类
 import input_handler # 导入输入处理器
+import profiler # 帧耗时分析器的分段名称
 import math
 
 
@@ -33,6 +34,12 @@ class Gallery:
         # 图库列表的滚动位置
         self.scroll_y = 0
         self._max_scroll_y = 0 # 最大可滚动距离，需要根据图片数量计算
+        self._list_content_height = 0
+
+        # 列表虚拟化：记录构建列表时 ImageManager 的图库版本号，版本未变化时不重建列表
+        self._picture_list_version = None
+        # 预取：上次后台加载预取窗口内图片的时间
+        self._last_prefetch_load_time = 0.0
 
         # 当前正在查看的已点亮大图的索引 (在 _lit_images_list 中的索引)
         self.viewing_lit_image_index = -1 # -1表示没有查看大图
@@ -70,8 +77,9 @@ class Gallery:
     def open_gallery(self):
         """打开图库界面，切换游戏状态。这个方法由Game类调用。"""
         print("打开图库。") # Debug
-        # 在打开时更新列表内容和排序
-        self._update_picture_list()
+        # 在打开时更新列表内容和排序 (图片状态未变化时复用上次的列表)
+        if self._picture_list_version != self.image_manager.gallery_status_version:
+            self._update_picture_list()
         # 滚动位置归零
         self.scroll_y = 0
         # 确保不在大图查看状态
@@ -94,6 +102,7 @@ class Gallery:
         # 获取所有已入场(未点亮+已点亮)且碎片已加载的图片列表，包含状态和完成时间
         # ImageManager 提供的列表已包含必要信息，并且已经过滤掉了碎片未加载完整的图片
         print("Gallery: 正在从 ImageManager 获取图片状态列表...") # Debug <-- 新增
+        self._picture_list_version = self.image_manager.gallery_status_version
         all_entered_and_loaded_pictures = self.image_manager.get_all_entered_pictures_status() # ImageManager 提供的列表已包含必要信息
         print(f"Gallery: 从 ImageManager 获取到 {len(all_entered_and_loaded_pictures)} 张已入场且可用于图库的图片。") # Debug <-- 新增
 
@@ -129,6 +138,7 @@ class Gallery:
         # 计算最大可滚动距离
         # 如果内容总高度小于窗口高度，最大滚动距离为0
         self._max_scroll_y = max(0, self._list_content_height - settings.GALLERY_HEIGHT)
+        self.scroll_y = min(self.scroll_y, self._max_scroll_y) # 列表在图库打开期间更新时保持滚动位置有效
 
         print(f"Gallery: 图库列表更新完成: 共 {num_pictures} 张图 (已点亮 {len(lit_pictures)}, 未点亮 {len(unlit_pictures)})") # Debug <-- 新增
         # print(f"Gallery: 列表内容总高度: {self._list_content_height}, 最大可滚动: {self._max_scroll_y}") # Debug
@@ -346,14 +356,48 @@ class Gallery:
         return False # 事件未被处理
 
 
-    # def update(self, dt): # Gallery 类自身的 update 方法 (如果有动画等需要更新)
-    #      # 如果列表有动画或需要随时间更新的状态
-    #      if self.game.current_state == settings.GAME_STATE_GALLERY_LIST:
-    #          pass # self.update_list(dt)
-    #      # 如果大图查看有动画或需要随时间更新的状态
-    #      elif self.game.current_state == settings.GAME_STATE_GALLERY_VIEW_LIT:
-    #          # self.view_lit_buttons.update(dt) # 如果按钮有动画等
-    #          pass # self.update_view_lit(dt)
+    def update(self, dt):
+        """
+        图库列表状态下每帧调用 (由 Game.update 调用)。
+        图片状态或加载进度变化时重建列表，并在后台逐批加载预取窗口内尚未就绪的图片。
+        """
+        if self._picture_list_version != self.image_manager.gallery_status_version:
+            self._update_picture_list()
+
+        # 预取窗口 = 可见行 + 上下各 GALLERY_PREFETCH_ROWS 行，只检查这个范围内的图片
+        start_index, end_index = self._get_visible_index_range(settings.GALLERY_PREFETCH_ROWS)
+        pending_ids = [pic_info['id'] for pic_info in self.pictures_in_gallery[start_index:end_index]
+                       if not pic_info.get('is_ready_for_gallery', False)]
+        if not pending_ids:
+            return
+
+        # 与 Game 中的后台加载节奏一致，每批之间保留间隔，避免滚动卡顿
+        current_time = time.time()
+        if current_time - self._last_prefetch_load_time >= settings.BACKGROUND_LOAD_DELAY:
+            self.image_manager.prioritize_images(pending_ids)
+            with self.game.profiler.section(profiler.SECTION_BACKGROUND_LOAD):
+                self.image_manager.load_next_batch_background(settings.BACKGROUND_LOAD_BATCH_SIZE)
+            self._last_prefetch_load_time = current_time
+
+
+    def _get_visible_index_range(self, extra_rows=0):
+        """
+        计算与可见裁剪区域相交的缩略图在 self.pictures_in_gallery 中的索引范围。
+
+        Args:
+            extra_rows (int): 在可见行上下额外包含的行数 (用于预取)。
+
+        Returns:
+            tuple: (起始索引, 结束索引)，结束索引不包含在内。
+        """
+        row_pitch = settings.GALLERY_THUMBNAIL_HEIGHT + settings.GALLERY_THUMBNAIL_GAP_Y
+        # 缩略图高度按图片比例计算，可能超过 GALLERY_THUMBNAIL_HEIGHT 伸入下一行，因此向上多包含一行
+        first_row = int(self.scroll_y) // row_pitch - 1 - extra_rows
+        last_row = (int(self.scroll_y) + self._list_visible_clip_rect.height) // row_pitch + extra_rows # 包含
+
+        start_index = max(0, first_row * settings.GALLERY_IMAGES_PER_ROW)
+        end_index = min(len(self.pictures_in_gallery), (last_row + 1) * settings.GALLERY_IMAGES_PER_ROW)
+        return start_index, max(start_index, end_index)
 
 
     def draw(self, surface):
@@ -390,8 +434,10 @@ class Gallery:
 
 
         # 绘制列表内容，需要考虑滚动偏移 self.scroll_y
-        # 遍历 self.pictures_in_gallery 列表中的图片信息
-        for i, pic_info in enumerate(self.pictures_in_gallery):
+        # 只遍历与可见区域相交的行，滚出裁剪区域的图片不计算位置也不绘制
+        start_index, end_index = self._get_visible_index_range()
+        for i in range(start_index, end_index):
+            pic_info = self.pictures_in_gallery[i]
             # 计算当前缩略图在列表内容网格中的位置 (不考虑滚动)
             row_in_list = i // settings.GALLERY_IMAGES_PER_ROW # 在列表中的行索引
             col_in_row = i % settings.GALLERY_IMAGES_PER_ROW # 在当前行中的列索引
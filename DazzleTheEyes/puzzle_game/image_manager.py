@@ -8,6 +8,7 @@ import os
 import time
 import math # 用于计算加载进度百分比
 import collections # 导入 collections 模块用于 deque
+import bisect # 用于维护有序的已就绪图片ID列表
 from piece import Piece # Piece 类可能在 ImageManager 中创建实例，所以需要导入
 import utils # 导入工具函数模块
 
@@ -30,6 +31,8 @@ class ImageManager:
         self.game = game # 持有Game实例的引用
 
         self.image_status = {} # 存储每张图片的状态 {id: 'unentered' / 'unlit' / 'lit'} - 必须在扫描前初始化
+        # 图库相关数据 (图片状态、加载完成数量) 的版本号，每次变化时递增，图库据此判断是否需要重建列表
+        self.gallery_status_version = 0
 
         # 存储所有原始图片文件的信息 {id: filepath}
         self.all_image_files = {} # {image_id: full_filepath}
@@ -47,6 +50,18 @@ class ImageManager:
         # 只有当图片的全部碎片成功加载或生成时，才会在这个字典中创建 entry
         self.pieces_surfaces = {}
 
+        # --- 碎片派发索引 (随图片加载完成增量维护，填充时无需再扫描 pieces_surfaces) ---
+        # 所有图片ID的有序列表 (即碎片消耗顺序) 及其下标 {id: index}
+        self._all_image_ids_ordered = sorted(self.all_image_files.keys())
+        self._image_order_index = {img_id: index for index, img_id in enumerate(self._all_image_ids_ordered)}
+        # 已完整加载全部碎片的图片ID：有序列表 (用 bisect 维护) 和集合 (O(1) 判断)
+        self._ready_piece_image_ids = []
+        self._ready_piece_image_set = set()
+        # 每张已就绪图片预先计算的派发队列 {id: [(image_id, row, col), ...]}，按逻辑顺序 (0,0) -> (0,1) -> ... -> (1,0) -> ...
+        self._dispense_queues = {}
+        # Piece 对象池：Board 移除已完成图片的碎片后回收到这里，后续填充时复用，避免重新创建 Sprite
+        self._piece_pool = []
+
         # --- 缓存的缩略图和灰度缩略图 ---
         self.cached_thumbnails = {} # {id: pygame.Surface}
         self.cached_unlit_thumbnails = {} # {id: pygame.Surface}
@@ -220,6 +235,7 @@ class ImageManager:
 
         if pieces_already_loaded and thumbnails_already_cached:
              # print(f"图片ID {image_id} 碎片和缩略图已存在内存，跳过生成处理。") # Debug
+             self._refresh_piece_readiness(image_id) # 确保派发索引包含此图片
              return True # 资源已准备好，返回成功
 
 
@@ -270,8 +286,8 @@ class ImageManager:
                              thumb_height = int(thumb_width * (img_logic_r / img_logic_c)) if img_logic_c > 0 else settings.GALLERY_THUMBNAIL_WIDTH # Fallback height
                              thumb_size = (thumb_width, thumb_height)
 
-                             thumbnail = pygame.transform.scale(processed_img_pg_for_thumb, thumb_size)
-                             unlit_thumbnail = utils.grayscale_surface(thumbnail) # Generate grayscale version
+                             # 普通缩略图和灰度缩略图一次生成 (灰度化在缩放后的小图上向量化完成)
+                             thumbnail, unlit_thumbnail = utils.build_thumbnails(processed_img_pg_for_thumb, thumb_size)
                              self.cached_thumbnails[image_id] = thumbnail
                              self.cached_unlit_thumbnails[image_id] = unlit_thumbnail
 
@@ -331,8 +347,7 @@ class ImageManager:
                                 thumb_height = int(thumb_width * (img_logic_r / img_logic_c)) if img_logic_c > 0 else settings.GALLERY_THUMBNAIL_WIDTH # Fallback height
                                 thumb_size = (thumb_width, thumb_height)
 
-                                thumbnail = pygame.transform.scale(processed_img_pg, thumb_size)
-                                unlit_thumbnail = utils.grayscale_surface(thumbnail)
+                                thumbnail, unlit_thumbnail = utils.build_thumbnails(processed_img_pg, thumb_size)
                                 self.cached_thumbnails[image_id] = thumbnail
                                 self.cached_unlit_thumbnails[image_id] = unlit_thumbnail
                                 success = True # Pieces were loaded from cache, AND thumbnails were generated
@@ -368,8 +383,37 @@ class ImageManager:
 
         # Note: _update_loaded_count is called externally after batches are processed.
 
+        # 碎片 surface 只会在此方法中被写入，这里同步更新碎片派发索引
+        self._refresh_piece_readiness(image_id)
+
         return final_success # Return True if pieces and thumbnails are ready
 
+    def _refresh_piece_readiness(self, image_id):
+        """
+        根据 pieces_surfaces 的当前内容，更新指定图片在碎片派发索引中的就绪状态。
+        图片的全部碎片都已加载时，加入有序就绪列表并预先生成它的派发队列；否则从就绪列表中移除。
+
+        Args:
+            image_id (int): 图片ID。
+        """
+        logic_dims = self.image_logic_dims.get(image_id)
+        pieces = self.pieces_surfaces.get(image_id)
+        is_ready = image_id in self._image_order_index and logic_dims is not None and \
+                   pieces is not None and len(pieces) == logic_dims[0] * logic_dims[1]
+
+        if is_ready:
+            if image_id not in self._ready_piece_image_set:
+                self._ready_piece_image_set.add(image_id)
+                bisect.insort(self._ready_piece_image_ids, image_id)
+            if image_id not in self._dispense_queues:
+                img_logic_c, img_logic_r = logic_dims
+                self._dispense_queues[image_id] = [(image_id, r, c) for r in range(img_logic_r) for c in range(img_logic_c)]
+        elif image_id in self._ready_piece_image_set:
+            self._ready_piece_image_set.discard(image_id)
+            index = bisect.bisect_left(self._ready_piece_image_ids, image_id)
+            if index < len(self._ready_piece_image_ids) and self._ready_piece_image_ids[index] == image_id:
+                del self._ready_piece_image_ids[index]
+
 # ... (保留 ImageManager 类其他方法不变) ...
 
 
@@ -521,9 +565,33 @@ class ImageManager:
              # else: print(f"警告: 图片ID {img_id} 逻辑尺寸配置缺失，未计入加载总数。") # Debug
 
 
+         if loaded_count_now != self._loaded_image_count:
+             self.gallery_status_version += 1 # 有新图片加载完成，图库中的就绪标志需要刷新
          self._loaded_image_count = loaded_count_now
 
 
+    def prioritize_images(self, image_ids):
+         """
+         将指定图片移到高优先级加载队列最前面 (保持传入顺序)，用于图库按滚动位置预取缩略图。
+         已在高优先级队列中的图片会被移到最前，普通队列中的对应项会被移除。
+
+         Args:
+             image_ids (list): 需要优先加载的图片ID列表。
+         """
+         for image_id in reversed(image_ids):
+             if image_id not in self.all_image_files:
+                 continue
+             try:
+                 self._high_priority_load_queue.remove(image_id)
+             except ValueError:
+                 pass
+             try:
+                 self._normal_load_queue.remove(image_id)
+             except ValueError:
+                 pass
+             self._high_priority_load_queue.appendleft(image_id)
+
+
     def is_initial_load_finished(self):
         """检查初始设定的图片数量是否已加载完成 (即前 settings.INITIAL_LOAD_IMAGE_COUNT 张图片的碎片和缩略图是否已准备好)。"""
         all_image_ids = sorted(self.all_image_files.keys())
@@ -1111,76 +1179,40 @@ class ImageManager:
             total_required_pieces (int): 初始 Board 填充需要多少个碎片。
 
         Returns:
-            list: 新创建的 Piece 对象列表。
+            list: Piece 对象列表 (优先从对象池中复用)。
         """
         total_required_pieces = max(0, total_required_pieces) # Ensure non-negative count
         initial_pieces_list = []
-        # 获取已成功加载/生成全部碎片的图片ID列表，并按ID排序
-        # === 修正：判断碎片是否加载完成时使用动态计算的碎片总数 ===
-        image_ids_with_pieces = sorted([img_id for img_id in self.all_image_files.keys() if img_id in self.pieces_surfaces and self.pieces_surfaces.get(img_id) is not None and img_id in self.image_logic_dims and len(self.pieces_surfaces.get(img_id, {})) == self.image_logic_dims.get(img_id, (1,1))[0] * self.image_logic_dims.get(img_id, (1,1))[1]])
 
-        if not image_ids_with_pieces:
+        # 已就绪图片的有序列表由 _refresh_piece_readiness 增量维护，无需再扫描 pieces_surfaces
+        if not self._ready_piece_image_ids:
             print("错误: ImageManager: 初始 Board 填充没有可用的碎片表面。")
             return [] # 没有图片碎片可用于填充
 
-        # 获取所有有效图片ID的有序列表，用于确定图片消耗顺序
-        all_image_ids_ordered = sorted(self.all_image_files.keys())
-
         print(f"ImageManager: 初始填充需要 {total_required_pieces} 个碎片 (来自初始可放置区域大小)。") # Debug
-        print(f"ImageManager: 当前有 {len(image_ids_with_pieces)} 张图片已加载完整碎片，可供初始填充使用。") # Debug
+        print(f"ImageManager: 当前有 {len(self._ready_piece_image_ids)} 张图片已加载完整碎片，可供初始填充使用。") # Debug
 
         pieces_added_count = 0 # 计数器：已添加到 initial_pieces_list 的碎片数量
-        img_index = 0 # 索引：当前正在从所有图片列表中考虑的图片ID的索引
-
-        # 从已加载碎片的图片列表中按顺序获取碎片，直到达到所需的数量或没有更多已加载碎片
-        # Note: We iterate through `all_image_ids_ordered` to maintain the intended consumption order,
-        # but only take pieces if the image is in `image_ids_with_pieces`.
-        while pieces_added_count < total_required_pieces and img_index < len(all_image_ids_ordered):
-            current_img_id = all_image_ids_ordered[img_index] # 获取当前图片ID
-
-            # 检查此图片是否已成功加载碎片
-            if current_img_id in image_ids_with_pieces:
-                img_logic_c, img_logic_r = self.image_logic_dims[current_img_id] # 获取逻辑尺寸
-                pieces_per_this_image = img_logic_c * img_logic_r # 动态计算总碎片数
-
-                # 计算从此图片需要获取的碎片数量
-                # 取所需总数与此图片总碎片数的最小值 (初始填充逻辑不会考虑 ImageManager 的消耗进度)
-                pieces_to_take_from_this_image = min(total_required_pieces - pieces_added_count, pieces_per_this_image)
-
-                # 遍历逻辑网格以获取碎片 (按逻辑顺序 0,0 -> 0,1 -> ... -> 1,0 -> ...)
-                taken_from_this_img_count = 0 # 计数器：从此图片已获取的碎片数量
-                total_piece_index = 0 # Total piece index within this image (0 to pieces_per_this_image - 1)
-                for r in range(img_logic_r):
-                    for c in range(img_logic_c):
-                         if taken_from_this_img_count < pieces_to_take_from_this_image:
-                              # Convert logical (r, c) to a single index
-                              # This is pieces_per_this_image * r + c in row-major order,
-                              # but we just need to take the first `pieces_to_take_from_this_image` pieces in logical order.
-                              # So, we just check if the current piece index (`total_piece_index`) is within the count to take.
-                              if (r, c) in self.pieces_surfaces[current_img_id]: # 确保碎片 surface 存在
-                                   piece_surface = self.pieces_surfaces[current_img_id][(r, c)]
-                                   # 创建 Piece 对象，初始网格位置 -1,-1，Board 之后分配
-                                   initial_pieces_list.append(Piece(piece_surface, current_img_id, r, c, -1, -1))
-                                   pieces_added_count += 1 # 增加总已添加碎片计数
-                                   taken_from_this_img_count += 1 # 增加从此图片获取的碎片计数
-                              # else: print(f"Error: Piece surface {current_img_id}_{r}_{c} not found in pieces_surfaces.") # Should not happen if image in pieces_surfaces
-
-                         total_piece_index += 1 # Increment regardless
-
-                         if taken_from_this_img_count == pieces_to_take_from_this_image:
-                             break # 从此图片已获取足够数量
-                    if taken_from_this_img_count == pieces_to_take_from_this_image: break # 从此图片已获取足够数量
-
-
-                # 设置此图片的状态为 'unlit' (如果之前是 'unentered')，因为它已经被用于填充 Board
-                if current_img_id in self.image_status and self.image_status[current_img_id] == 'unentered':
-                     self.image_status[current_img_id] = 'unlit'
-
-                img_index += 1 # 移动到下一张图片（即使当前图片碎片未全部取完，也从下一张开始，逻辑与之前一致）
-            else:
-                 # 图片ID存在于all_image_files，但碎片处理失败或未加载
-                 # print(f"警告: ImageManager: 图片ID {current_img_id} 文件存在但碎片处理失败，无法用于初始填充。跳过。") # Debug
-                 img_index += 1 # 移动到下一张图片
+
+        # 按图片ID顺序遍历已就绪的图片，从每张图片的派发队列头部按逻辑顺序取碎片
+        # (初始填充逻辑不会考虑 ImageManager 的消耗进度)
+        for current_img_id in self._ready_piece_image_ids:
+            if pieces_added_count >= total_required_pieces:
+                break
+
+            dispense_queue = self._dispense_queues[current_img_id]
+            pieces_to_take_from_this_image = min(total_required_pieces - pieces_added_count, len(dispense_queue))
+            piece_surfaces = self.pieces_surfaces[current_img_id]
+
+            for index in range(pieces_to_take_from_this_image):
+                img_id, r, c = dispense_queue[index]
+                # 初始网格位置 -1,-1，Board 之后分配
+                initial_pieces_list.append(self._acquire_piece(piece_surfaces[(r, c)], img_id, r, c))
+            pieces_added_count += pieces_to_take_from_this_image
+
+            # 设置此图片的状态为 'unlit' (如果之前是 'unentered')，因为它已经被用于填充 Board
+            if current_img_id in self.image_status and self.image_status[current_img_id] == 'unentered':
+                 self.image_status[current_img_id] = 'unlit'
 
 
         if pieces_added_count != total_required_pieces:
@@ -1196,22 +1228,18 @@ class ImageManager:
     # 替换 get_next_fill_pieces 方法 (根据动态逻辑尺寸计算和消耗进度)
     def get_next_fill_pieces(self, count):
         """
-        获取下一批指定数量的新 Piece 对象用于填充空位。
-        这些碎片来自 ImageManager 按消耗进度提供的图片。
-        只提供碎片已成功加载完成的图片。
+        获取下一批指定数量的 Piece 对象用于填充空位。
+        这些碎片来自 ImageManager 按消耗进度提供的图片，从该图片预先计算的派发队列中按逻辑顺序取出。
+        只提供碎片已成功加载完成的图片；碎片尚未就绪的图片会被跳过，不会阻塞填充。
 
         Args:
             count (int): 需要获取的碎片数量。
 
         Returns:
-            list: 新创建的 Piece 对象列表，数量为 count 或更少 (如果碎片不足)。
+            list: Piece 对象列表 (优先从对象池中复用)，数量为 count 或更少 (如果碎片不足)。
         """
         new_pieces = []
         pieces_needed = count
-        # Get IDs of images that have successfully loaded/generated their full set of pieces, sorted by ID
-        image_ids_with_pieces = sorted([img_id for img_id in self.all_image_files.keys() if img_id in self.pieces_surfaces and self.pieces_surfaces.get(img_id) is not None and img_id in self.image_logic_dims and len(self.pieces_surfaces.get(img_id, {})) == self.image_logic_dims.get(img_id, (1,1))[0] * self.image_logic_dims.get(img_id, (1,1))[1]])
-
-        all_image_ids_ordered = sorted(self.all_image_files.keys()) # Get all valid image IDs in order
 
         print(f"ImageManager: get_next_fill_pieces: 需要填充 {pieces_needed} 个空位。当前消耗状态: 图片ID {self.next_image_to_consume_id}, 已消耗 {self.pieces_consumed_from_current_image}/{self._current_consume_img_total_pieces}.") # Debug
 
@@ -1226,82 +1254,39 @@ class ImageManager:
             current_img_id = self.next_image_to_consume_id
 
             # === 检查当前应该消耗的图片是否已完全加载碎片 ===
-            if current_img_id not in image_ids_with_pieces:
+            if current_img_id not in self._ready_piece_image_set:
                  # If the pieces for the current consumption image are NOT loaded
                  print(f"警告: ImageManager: get_next_fill_pieces: 图片ID {current_img_id} 的碎片尚未加载完成。跳过此图片，寻找下一张可用图片。") # Debug
-                 # Need to find the next usable loaded image *after* the current one in the ordered list
-                 current_img_index_in_all = all_image_ids_ordered.index(current_img_id) if current_img_id in all_image_ids_ordered else len(all_image_ids_ordered) # Get index, default to end if not found
-                 found_next_usable = False
-                 for next_idx in range(current_img_index_in_all + 1, len(all_image_ids_ordered)): # Search from the one *after* current
-                      img_id = all_image_ids_ordered[next_idx]
-                      # Check if this image is in image_ids_with_pieces (fully loaded)
-                      if img_id in image_ids_with_pieces:
-                           self.next_image_to_consume_id = img_id # Update current consumption image
-                           self.pieces_consumed_from_current_image = 0 # Start from beginning of this new image
-                           # Update total pieces for the new current image
-                           next_img_logic_c, next_img_logic_r = self.image_logic_dims.get(self.next_image_to_consume_id, (0,0))
-                           self._current_consume_img_total_pieces = next_img_logic_c * next_img_logic_r
-                           print(f"ImageManager: get_next_fill_pieces: 下一个消耗图片ID设置为 (跳过未加载): {self.next_image_to_consume_id}") # Debug
-                           found_next_usable = True
-                           break # Found the next usable image
-
-                 if not found_next_usable:
+                 next_ready_img_id = self._find_next_ready_image_id(current_img_id)
+                 if next_ready_img_id is None:
                       # No more usable images with loaded pieces in the sequence
                       print("警告: ImageManager: get_next_fill_pieces: 没有更多已加载的图片可供消耗碎片。") # Debug
-                      self.next_image_to_consume_id = None # Stop consumption
-                      self.pieces_consumed_from_current_image = 0
-                      self._current_consume_img_total_pieces = 0
+                      self._set_consume_image(None) # Stop consumption
                       break # Exit while loop (no more pieces can be provided)
 
-                 else:
-                      # Found the next usable image, the loop will continue with the new current_img_id in the next iteration
-                      continue # Go to the next iteration of the while loop to process the newly set next_image_to_consume_id
+                 self._set_consume_image(next_ready_img_id) # Start from beginning of this new image
+                 print(f"ImageManager: get_next_fill_pieces: 下一个消耗图片ID设置为 (跳过未加载): {self.next_image_to_consume_id}") # Debug
+                 continue # Go to the next iteration of the while loop to process the newly set next_image_to_consume_id
 
             # If we reach here, current_img_id is valid AND its pieces are loaded.
-
-            # Get dynamic total pieces for current image (already updated when next_image_to_consume_id was set or initialized)
-            # img_logic_c, img_logic_r = self.image_logic_dims[current_img_id]
-            # self._current_consume_img_total_pieces = img_logic_c * img_logic_r # Already set
-
             pieces_remaining_in_current_img = self._current_consume_img_total_pieces - self.pieces_consumed_from_current_image
 
             # Calculate how many pieces to take from the current image
             pieces_to_take_from_current = min(pieces_needed, pieces_remaining_in_current_img)
 
-            print(f"ImageManager: get_next_fill_pieces: 从图片 {current_img_id} 获取碎片。剩余 {pieces_remaining_in_current_img}, 本批次尝试获取 {pieces_to_take_from_current}.") # Debug
-
             if pieces_to_take_from_current > 0:
-                # Get pieces from the current image, continuing from the last consumed position (logical order)
-                pieces_taken_count = 0
-                # Calculate starting logical (row, col) based on self.pieces_consumed_from_current_image
-                start_total_index = self.pieces_consumed_from_current_image # Total piece index (0-total_pieces-1)
-
-                # Iterate through the logical grid (rows x cols) to find pieces to take
-                current_total_index = 0
-                # Get logic dims for iteration
-                img_logic_c, img_logic_r = self.image_logic_dims[current_img_id]
-                # Iterate logical rows and columns based on current image's logic dims
-                for r in range(img_logic_r):
-                    for c in range(img_logic_c):
-                         # Check if this piece's total index is within the range we need to take this batch
-                         if current_total_index >= start_total_index and pieces_taken_count < pieces_to_take_from_current:
-                              # Ensure piece surface exists (should be true if image is in pieces_surfaces)
-                              if (r, c) in self.pieces_surfaces[current_img_id]:
-                                  piece_surface = self.pieces_surfaces[current_img_id][(r, c)]
-                                  # Create Piece object, initial grid position is -1,-1, Board will assign later
-                                  new_pieces.append(Piece(piece_surface, current_img_id, r, c, -1, -1))
-                                  pieces_taken_count += 1
-                                  # print(f"  Obtained piece: Image {current_img_id}, Logical Row {r}, Logical Col {c}") # Debug
-                              else:
-                                   print(f"错误: ImageManager: Logical piece ({r},{c}) for image {current_img_id} surface not found, but image marked as complete.") # Debug
-                         current_total_index += 1 # Increment total index regardless of whether piece was taken
-
-                         if pieces_taken_count == pieces_to_take_from_current:
-                             break # Reached the number of pieces to take from the current image
-                    if pieces_taken_count == pieces_to_take_from_current:
-                        break # Reached the number of pieces to take from the current image
-
-
+                # Continue from the last consumed position in this image's dispense queue
+                dispense_queue = self._dispense_queues[current_img_id]
+                piece_surfaces = self.pieces_surfaces[current_img_id]
+                start_index = self.pieces_consumed_from_current_image
+                end_index = min(start_index + pieces_to_take_from_current, len(dispense_queue))
+
+                for index in range(start_index, end_index):
+                    img_id, r, c = dispense_queue[index]
+                    # Initial grid position is -1,-1, Board will assign later
+                    new_pieces.append(self._acquire_piece(piece_surfaces[(r, c)], img_id, r, c))
+
+                pieces_taken_count = end_index - start_index
                 pieces_needed -= pieces_taken_count
                 self.pieces_consumed_from_current_image += pieces_taken_count # Update consumption count AFTER taking pieces this batch
                 print(f"ImageManager: get_next_fill_pieces: 从图片 {current_img_id} 实际获取了 {pieces_taken_count} 个碎片。已从此图片消耗 {self.pieces_consumed_from_current_image}/{self._current_consume_img_total_pieces}。还需 {pieces_needed} 个。") # Debug
@@ -1309,39 +1294,16 @@ class ImageManager:
 
             # Check if pieces from the current image are fully consumed *after* taking pieces this batch
             if self.pieces_consumed_from_current_image >= self._current_consume_img_total_pieces:
-                # print(f"ImageManager: Pieces for image {current_img_id} are fully consumed.") # Debug
                 # Move to the next image in the all_image_files sequence
-                all_image_ids_ordered = sorted(self.all_image_files.keys())
-                try:
-                    current_img_index_in_all = all_image_ids_ordered.index(current_img_id) # Get current index
-                    next_img_index_in_all = current_img_index_in_all + 1
-                    if next_img_index_in_all < len(all_image_ids_ordered):
-                        self.next_image_to_consume_id = all_image_ids_ordered[next_img_index_in_all]
-                        self.pieces_consumed_from_current_image = 0 # Reset consumption count
-                        # Update total pieces for the new current image
-                        next_img_logic_c, next_img_logic_r = self.image_logic_dims.get(self.next_image_to_consume_id, (0,0))
-                        self._current_consume_img_total_pieces = next_img_logic_c * next_img_logic_r
-                        print(f"ImageManager: get_next_fill_pieces: 图片 {current_img_id} 消耗完毕，下一个消耗图片ID设置为: {self.next_image_to_consume_id} (总碎片: {self._current_consume_img_total_pieces}).") # Debug
-
-                        # After moving to the next image, we still need to check if *that* image's pieces are loaded in the next loop iteration.
-                        # The check at the start of the while loop handles skipping if needed.
-
-                    else:
-                        self.next_image_to_consume_id = None # No more images in sequence
-                        self.pieces_consumed_from_current_image = 0
-                        self._current_consume_img_total_pieces = 0
-                        print("ImageManager: get_next_fill_pieces: 所有图片都已消耗完毕。") # Debug
-
-                except ValueError:
-                     # Current image ID not in all_image_files? This should not happen.
-                     print(f"内部错误: ImageManager: get_next_fill_pieces: 当前消耗的图片ID {current_img_id} 不在所有图片列表中。") # Debug
-                     self.next_image_to_consume_id = None # State error, stop consumption
-                     self.pieces_consumed_from_current_image = 0
-                     self._current_consume_img_total_pieces = 0
-                     break # Exit while loop
-
-
-            # If pieces are still needed and next_image_to_consume_id is not None, the while loop continues.
+                # (whether its pieces are loaded is checked at the start of the next loop iteration)
+                next_img_index_in_all = self._image_order_index[current_img_id] + 1
+                if next_img_index_in_all < len(self._all_image_ids_ordered):
+                    self._set_consume_image(self._all_image_ids_ordered[next_img_index_in_all])
+                    print(f"ImageManager: get_next_fill_pieces: 图片 {current_img_id} 消耗完毕，下一个消耗图片ID设置为: {self.next_image_to_consume_id} (总碎片: {self._current_consume_img_total_pieces}).") # Debug
+                else:
+                    self._set_consume_image(None) # No more images in sequence
+                    print("ImageManager: get_next_fill_pieces: 所有图片都已消耗完毕。") # Debug
+                    break
 
 
         # New pieces do not need to be shuffled, they are placed based on the order of empty slots
@@ -1349,6 +1311,53 @@ class ImageManager:
         print(f"ImageManager: get_next_fill_pieces: 填充请求完成，提供了 {len(new_pieces)} 个碎片。") # Debug
         return new_pieces
 
+    def _find_next_ready_image_id(self, image_id):
+        """
+        在消耗顺序中查找排在 image_id 之后、且全部碎片已加载的第一张图片。
+
+        Args:
+            image_id (int): 当前图片ID。
+
+        Returns:
+            int or None: 下一张已就绪图片的ID，如果没有则返回 None。
+        """
+        if image_id not in self._image_order_index:
+            return None
+        index = bisect.bisect_right(self._ready_piece_image_ids, image_id)
+        if index < len(self._ready_piece_image_ids):
+            return self._ready_piece_image_ids[index]
+        return None
+
+    def _set_consume_image(self, image_id):
+        """将当前消耗的图片设置为 image_id (None 表示停止消耗)，并重置消耗进度和该图片的总碎片数。"""
+        self.next_image_to_consume_id = image_id
+        self.pieces_consumed_from_current_image = 0
+        if image_id is None:
+            self._current_consume_img_total_pieces = 0
+        else:
+            img_logic_c, img_logic_r = self.image_logic_dims.get(image_id, (0, 0))
+            self._current_consume_img_total_pieces = img_logic_c * img_logic_r
+
+    def _acquire_piece(self, image_surface, original_image_id, original_row, original_col):
+        """从对象池中取出一个 Piece 并重置为指定碎片；对象池为空时才创建新的 Piece。初始网格位置为 -1,-1，由 Board 分配。"""
+        if self._piece_pool:
+            piece = self._piece_pool.pop()
+            piece.reset(image_surface, original_image_id, original_row, original_col, -1, -1)
+            return piece
+        return Piece(image_surface, original_image_id, original_row, original_col, -1, -1)
+
+    def release_pieces(self, pieces):
+        """
+        将不再使用的 Piece 对象回收到对象池，供后续填充复用。
+        调用方需确保这些碎片已不在 Board 网格中，且没有其他地方再引用它们。
+
+        Args:
+            pieces (iterable): 要回收的 Piece 对象。
+        """
+        for piece in pieces:
+            piece.kill() # 从所有 Sprite Group 中移除
+            self._piece_pool.append(piece)
+
     def get_thumbnail(self, image_id):
          """
          从缓存获取指定图片ID的普通缩略图surface，用于图库列表中的已点亮图片。
@@ -1461,6 +1470,8 @@ class ImageManager:
         if image_id in self.all_image_files:
             old_status = self.image_status.get(image_id, 'unentered')
             self.image_status[image_id] = state
+            if state != old_status:
+                 self.gallery_status_version += 1 # 图库列表需要重建
             # print(f"Image {image_id} status change: {old_status} -> {state}") # Debug
             if state == 'lit' and old_status != 'lit':
                  # If status changes from non-lit to lit, record completion time
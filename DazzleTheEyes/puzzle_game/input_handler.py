@@ -59,6 +59,15 @@ class InputHandler:
                  sys.exit()
 
 
+        # 帧耗时分析器快捷键，在任何游戏状态下都可用：F3 切换叠加层显示，F4 导出 CSV 逐帧记录
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_F3:
+                if hasattr(self.game, 'display_profiler'): # 安全检查
+                    self.game.display_profiler = not self.game.display_profiler
+            elif event.key == pygame.K_F4:
+                if hasattr(self.game, 'export_profiler_trace'): # 安全检查
+                    self.game.export_profiler_trace()
+
         # 根据当前游戏状态，将事件分发给对应的处理逻辑
         if self.game.current_state == settings.GAME_STATE_PLAYING:
             # 处理主游戏界面的输入
@@ -312,6 +321,7 @@ class InputHandler:
             # Apply drag offset if needed:
             # self.dragging_piece.rect.center = (mouse_pos[0] - self.drag_offset_from_center[0], mouse_pos[1] - self.drag_offset_from_center[1])
             self.dragging_piece.rect.center = mouse_pos # Piece center follows mouse directly
+            self.dragging_piece.dirty = 1 # 位置改变，通知 Board 的 LayeredDirty 重绘
 
             # Get the grid position the mouse is currently over
             current_grid_pos = utils.screen_to_grid(mouse_pos)
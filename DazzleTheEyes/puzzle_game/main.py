@@ -8,7 +8,6 @@ import settings
 import time # 用于计时
 import random # 用于随机选择加载图片
 import os # 用于检查文件存在性
-import json # 用于 JSON 序列化和反序列化
 
 # 导入其他模块
 from board import Board
@@ -19,6 +18,9 @@ from image_manager import ImageManager
 from ui_elements import PopupText, Button # Import UI element classes
 # === 新增：导入 CompletionAnimation 类 ===
 from completion_animation import CompletionAnimation
+from save_manager import SaveManager # 后台存档服务
+from profiler import FrameProfiler, SECTION_BACKGROUND_LOAD, SECTION_BOARD_UPDATE, SECTION_BOARD_DRAW, \
+    SECTION_ANIMATION_UPDATE, SECTION_ANIMATION_DRAW, SECTION_GALLERY_DRAW # 帧耗时分析器
 
 
 class Game:
@@ -68,6 +70,8 @@ class Game:
 
         # --- Debug 相关属性 ---
         self.display_piece_info = False # 是否显示碎片 debug 信息
+        self.display_profiler = False # 是否显示帧耗时分析叠加层 (F3 切换)
+        self.profiler = FrameProfiler() # 各子系统分段计时，F4 导出 CSV
 
 
         # --- 加载界面相关 ---
@@ -82,6 +86,10 @@ class Game:
         pygame.display.flip() # Update the screen immediately to show the loading screen
         # =========================================================
 
+        # --- 存档服务 (后台线程写入，兼容导入旧版 JSON 存档) ---
+        self.save_manager = SaveManager(os.path.join(settings.BASE_DIR, settings.SAVE_DATA_FILE_NAME),
+                                        os.path.join(settings.BASE_DIR, settings.SAVE_FILE_NAME))
+
         # --- 尝试加载存档数据 ---
         print("尝试加载存档数据...") # Debug
         self.loaded_game_data = self.load_game_data() # Attempt to load save, returns data dict or None
@@ -266,6 +274,7 @@ class Game:
         """
         Saves the current game state to a file.
         Saves Board layout and state, ImageManager state.
+        The state is snapshotted here; encoding and the atomic file write happen on SaveManager's writer thread.
         """
         if self.board is None or self.image_manager is None:
              print("警告: Board 或 ImageManager 未初始化，无法保存游戏状态。")
@@ -298,18 +307,8 @@ class Game:
             'save_time': time.time() # Add current time as save timestamp
         }
 
-        # Determine save file path
-        save_file_path = os.path.join(settings.BASE_DIR, settings.SAVE_FILE_NAME)
-
-        # Write data to JSON file
-        try:
-            with open(save_file_path, 'w', encoding='utf-8') as f:
-                # Use json.dump to write the dictionary to the file
-                # indent=4 for pretty printing (optional)
-                json.dump(game_state_data, f, indent=4)
-            print(f"游戏状态已保存到 {save_file_path}") # Debug success
-        except Exception as e:
-            print(f"错误: 保存游戏状态失败到 {save_file_path}: {e}") # Debug error
+        # Hand off to the save service (non-blocking, rapid successive saves are coalesced)
+        self.save_manager.request_save(game_state_data)
 
 
     def load_game_data(self):
@@ -319,42 +318,19 @@ class Game:
         Returns:
             dict or None: Loaded game state dictionary, or None if file doesn't exist or loading fails.
         """
-        save_file_path = os.path.join(settings.BASE_DIR, settings.SAVE_FILE_NAME)
+        # SaveManager reads the binary save first and falls back to importing the legacy savegame.json
+        game_state_data = self.save_manager.load()
+        if game_state_data is None:
+            return None # No usable save, start new game
 
-        # Check if save file exists
-        if not os.path.exists(save_file_path):
-            print("没有找到存档文件，开始新游戏。") # Debug
-            return None # File does not exist, return None
+        # TODO: Optional: Add validation for loaded data structure
+        if not isinstance(game_state_data, dict) or 'board_state' not in game_state_data or 'image_manager_state' not in game_state_data:
+             print("警告: 存档文件格式不正确。缺少 'board_state' 或 'image_manager_state' 字段。开始新游戏。") # Debug
+             return None # Data structure is invalid
 
-        # Attempt to load data from JSON file
-        try:
-            with open(save_file_path, 'r', encoding='utf-8') as f:
-                # Use json.load to read the dictionary from the file
-                game_state_data = json.load(f)
-                # print(f"完整输出加载的数据，看是否加载成功:game_state_data: {game_state_data}")# Result was successful
-            print(f"游戏状态已从 {save_file_path} 加载成功。") # Debug success
-
-            # TODO: Optional: Add validation for loaded data structure
-            if not isinstance(game_state_data, dict) or 'board_state' not in game_state_data or 'image_manager_state' not in game_state_data:
-                 print("警告: 存档文件格式不正确。缺少 'board_state' 或 'image_manager_state' 字段。开始新游戏。") # Debug
-                 return None # Data structure is invalid
-
-            # Optional: Validate key types/values if necessary for safety
-
-            return game_state_data # Return loaded data
-
-        except json.JSONDecodeError as e:
-            print(f"错误: 存档文件 {save_file_path} 格式错误，无法解析 JSON: {e}. 删除损坏的存档。") # Debug error
-            # Optional: Delete the corrupted save file
-            # try:
-            #     os.remove(save_file_path)
-            #     print("已删除损坏的存档文件。")
-            # except OSError as os_e:
-            #     print(f"错误: 无法删除损坏的存档文件 {save_file_path}: {os_e}")
-            return None
-        except Exception as e:
-            print(f"错误: 加载存档状态失败从 {save_file_path}: {e}") # Debug error
-            return None
+        # Optional: Validate key types/values if necessary for safety
+
+        return game_state_data # Return loaded data
 
 
     # === Game exit method (called by InputHandler) ===
@@ -371,10 +347,24 @@ class Game:
         else:
              print("游戏未初始化或在加载中，不保存。直接退出。") # Debug
 
+        # Wait for the writer thread to finish any pending save before exiting
+        self.save_manager.shutdown()
+
         pygame.quit()
         sys.exit()
 
 
+    # === Debug 相关方法 (由 InputHandler 调用) ===
+    def export_profiler_trace(self):
+        """将帧耗时分析器记录的逐帧数据导出为 CSV 文件 (保存在 BASE_DIR，文件名带时间戳)。"""
+        file_name = f"{settings.PROFILER_TRACE_FILE_PREFIX}_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+        exported_count = self.profiler.export_csv(os.path.join(settings.BASE_DIR, file_name))
+        if exported_count >= 0:
+             self.show_popup_tip(f"已导出 {exported_count} 帧耗时记录: {file_name}")
+        else:
+             self.show_popup_tip("帧耗时记录导出失败")
+
+
     # === Gallery related methods (called by InputHandler or elsewhere) ===
     def open_gallery(self):
         """Opens the gallery interface."""
@@ -493,6 +483,7 @@ class Game:
         running = True
         while running:
             self.delta_time = self.clock.tick(60) / 1000.0 # Calculate precise delta time in seconds
+            self.profiler.begin_frame() # 帧耗时统计不包含 clock.tick 的等待时间
 
             # --- Event Handling ---
             # All events are passed to the input handler, which dispatches based on game state
@@ -531,8 +522,11 @@ class Game:
 
             # Update screen display
             pygame.display.flip()
+            self.profiler.end_frame(self.delta_time)
 
         # Pygame exit is handled by game.quit_game() or direct QUIT handling on fatal error
+        # 主循环因致命错误结束时不会经过 quit_game，写入线程是守护线程，先等待已提交的自动存档写入磁盘
+        self.save_manager.flush()
 
 
     def update(self, dt):
@@ -555,7 +549,8 @@ class Game:
                  # Use _last_background_load_time for background load timing
                  # Load batches more frequently during loading state for faster progress display
                  if time.time() - self._last_background_load_time >= settings.BACKGROUND_LOAD_DELAY / 5.0:
-                      self.image_manager.load_next_batch_background(settings.BACKGROUND_LOAD_BATCH_SIZE)
+                      with self.profiler.section(SECTION_BACKGROUND_LOAD):
+                           self.image_manager.load_next_batch_background(settings.BACKGROUND_LOAD_BATCH_SIZE)
                       self._last_background_load_time = time.time() # Update timer
 
 
@@ -568,7 +563,8 @@ class Game:
         elif self.current_state == settings.GAME_STATE_PLAYING:
             # === Update the active completion animation if any ===
             if self.active_animation:
-                 self.active_animation.update(dt)
+                 with self.profiler.section(SECTION_ANIMATION_UPDATE):
+                      self.active_animation.update(dt)
                  # Check if the animation is finished
                  if self.active_animation.is_finished():
                       print("Game: 检测到完成动画结束。") # Debug
@@ -584,7 +580,8 @@ class Game:
             # Board update should run regardless of whether animation is active,
             # but its internal state machine logic is skipped if state is COMPLETION_ANIMATING.
             if self.board: # Ensure Board is initialized
-                 self.board.update(dt) # Board update includes piece updates and its state machine logic (conditional)
+                 with self.profiler.section(SECTION_BOARD_UPDATE):
+                      self.board.update(dt) # Board update includes piece updates and its state machine logic (conditional)
 
 
             # Update possible popup text timer
@@ -605,13 +602,12 @@ class Game:
 
 
         elif self.current_state == settings.GAME_STATE_GALLERY_LIST:
-            # Update Gallery list state (e.g., scrollbar animation if implemented)
+            # Update Gallery list state (refresh changed entries, prefetch thumbnails around the scroll position)
             # Update possible popup text timer (hint might be shown in gallery)
             if self.popup_text:
                  self.popup_text.update(dt)
-            # If Gallery update logic is added later, call it here.
-            # if hasattr(self.gallery, 'update'): self.gallery.update(dt)
-            pass
+            if self.gallery:
+                 self.gallery.update(dt)
 
 
         elif self.current_state == settings.GAME_STATE_GALLERY_VIEW_LIT:
@@ -644,11 +640,13 @@ class Game:
         elif self.current_state == settings.GAME_STATE_PLAYING:
             # Draw Board (Board.draw will handle drawing pieces unless animation is active)
             if self.board: # Ensure Board is initialized
-                 self.board.draw(self.screen)
+                 with self.profiler.section(SECTION_BOARD_DRAW):
+                      self.board.draw(self.screen)
 
             # === Draw the active completion animation if any (on top of the board) ===
             if self.active_animation:
-                 self.active_animation.draw(self.screen)
+                 with self.profiler.section(SECTION_ANIMATION_DRAW):
+                      self.active_animation.draw(self.screen)
 
             # Draw primary UI elements, like gallery icon button (always on top)
             if hasattr(self, 'gallery_icon_button') and self.gallery_icon_button: # Ensure button is initialized
@@ -662,7 +660,8 @@ class Game:
         elif self.current_state in [settings.GAME_STATE_GALLERY_LIST, settings.GAME_STATE_GALLERY_VIEW_LIT]:
             # Draw Gallery interface (Gallery class handles drawing list or big image)
             if self.gallery: # Ensure Gallery is initialized
-                 self.gallery.draw(self.screen)
+                 with self.profiler.section(SECTION_GALLERY_DRAW):
+                      self.gallery.draw(self.screen)
 
             # Draw popup text on top of Gallery
             if self.popup_text and self.popup_text.is_active: # Ensure popup_text is initialized and active
@@ -670,6 +669,10 @@ class Game:
 
         # Note: BOARD_STATE_UPGRADING_AREA drawing is handled by Board.draw method.
 
+        # 帧耗时分析叠加层 (所有状态下都绘制在最上层)
+        if self.display_profiler:
+             self.profiler.draw(self.screen, self.font_debug)
+
 
     # Game state transition method
     def change_state(self, new_state):
@@ -788,7 +791,8 @@ class Game:
          if current_time - self._last_background_load_time >= settings.BACKGROUND_LOAD_DELAY:
              # Execute a batch of background loading tasks via ImageManager
              # ImageManager.load_next_batch_background will process images from its queues
-             processed_count_this_batch = self.image_manager.load_next_batch_background(settings.BACKGROUND_LOAD_BATCH_SIZE)
+             with self.profiler.section(SECTION_BACKGROUND_LOAD):
+                  processed_count_this_batch = self.image_manager.load_next_batch_background(settings.BACKGROUND_LOAD_BATCH_SIZE)
 
              if processed_count_this_batch > 0:
                  # If at least one image was processed in this batch, update the timer
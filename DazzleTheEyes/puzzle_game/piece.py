@@ -6,7 +6,7 @@ import settings
 import utils # 导入utils用于坐标转换
 
 
-class Piece(pygame.sprite.Sprite):
+class Piece(pygame.sprite.DirtySprite):
     def __init__(self, image_surface, original_image_id, original_row, original_col, initial_grid_row=-1, initial_grid_col=-1):
         """
         初始化一个碎片对象
@@ -19,9 +19,16 @@ class Piece(pygame.sprite.Sprite):
             initial_grid_row (int): 碎片在拼盘物理网格中的初始行索引 (0 - settings.BOARD_ROWS-1)。-1 表示待分配。
             initial_grid_col (int): 碎片在拼盘物理网格中的初始列索引 (0 - settings.BOARD_COLS-1)。-1 表示待分配。
         """
-        # Inherit from Sprite
+        # Inherit from DirtySprite (Board 使用 LayeredDirty 只重绘位置发生变化的碎片)
+        # 任何修改 rect 的地方都需要设置 self.dirty = 1，通知 Board 重绘该碎片
         super().__init__()
+        self.reset(image_surface, original_image_id, original_row, original_col, initial_grid_row, initial_grid_col)
 
+    def reset(self, image_surface, original_image_id, original_row, original_col, initial_grid_row=-1, initial_grid_col=-1):
+        """
+        (重新)设置碎片的图像和全部状态。ImageManager 的 Piece 对象池复用已移除的碎片时调用此方法，
+        参数含义与 __init__ 相同。
+        """
         # --- 关键修改：检查传入的 Surface 尺寸是否与设定的碎片宽高匹配 ---
         # 碎片Surface必须是固定尺寸，用于在Board网格中绘制
         if image_surface is None:
@@ -72,6 +79,10 @@ class Piece(pygame.sprite.Sprite):
         self.is_falling = False
         self.fall_target_y = -1 # 碎片下落的目标屏幕Y坐标
 
+        # 复用的碎片可能在被回收前处于隐藏状态 (例如拖拽中)，重置为可见并标记需要重绘
+        self.visible = 1
+        self.dirty = 1
+
 
     # 注意：如果继承自 Sprite 并使用 pygame.sprite.Group.draw() 方法，则不需要 draw 方法。
     # Group.draw() 方法会调用每个精灵的 draw 方法，但默认的 Sprite.draw 方法会执行 surface.blit(self.image, self.rect)。
@@ -99,15 +110,18 @@ class Piece(pygame.sprite.Sprite):
                 # Stop falling, snap to the exact target position
                 self.rect.y = self.fall_target_y
                 self.is_falling = False
+                self.dirty = 1
                 # print(f"碎片 {self.original_image_id}_{self.original_row}_{self.original_col} 停止下落到屏幕Y {self.rect.y}") # Debug stop fall
                 # TODO: 可能需要通知 Board 碎片已到达新位置 (或者 Board 在 update 中检查 is_falling)
             elif settings.FALL_SPEED_PIXELS_PER_SECOND == 0:
                  # If speed is zero, it shouldn't be falling, but handle as finished just in case
                  self.rect.y = self.fall_target_y
                  self.is_falling = False
+                 self.dirty = 1
             else:
                 # Continue falling downwards
                 self.rect.y = new_y
+                self.dirty = 1
 
 
     def set_grid_position(self, row, col, animate=False):
@@ -124,6 +138,9 @@ class Piece(pygame.sprite.Sprite):
         self.current_grid_row = row
         self.current_grid_col = col
 
+        # 屏幕位置可能改变，标记为需要重绘
+        self.dirty = 1
+
         # Calculate the target screen pixel position for the new grid position
         target_x = settings.BOARD_OFFSET_X + self.current_grid_col * settings.PIECE_WIDTH # <-- 使用 PIECE_WIDTH
         target_y = settings.BOARD_OFFSET_Y + self.current_grid_row * settings.PIECE_HEIGHT # <-- 使用 PIECE_HEIGHT
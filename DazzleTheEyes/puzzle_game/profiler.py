@@ -0,0 +1,264 @@
+# profiler.py
+# 帧耗时分析器：对主循环中的各个子系统进行分段计时，维护最近若干帧的滚动统计和帧耗时直方图，
+# 以游戏内叠加层的形式显示，并可导出 CSV 逐帧记录用于离线分析。
+
+import collections
+import csv
+import time
+
+import pygame
+import settings
+
+
+# --- 分段名称 (同时作为 CSV 的列名) ---
+SECTION_BACKGROUND_LOAD = "background_load" # ImageManager.load_next_batch_background
+SECTION_BOARD_UPDATE = "board_update" # Board.update
+SECTION_BOARD_DRAW = "board_draw" # Board.draw
+SECTION_ANIMATION_UPDATE = "animation_update" # CompletionAnimation.update
+SECTION_ANIMATION_DRAW = "animation_draw" # CompletionAnimation.draw
+SECTION_GALLERY_DRAW = "gallery_draw" # Gallery.draw
+
+SECTION_NAMES = (
+    SECTION_BACKGROUND_LOAD,
+    SECTION_BOARD_UPDATE,
+    SECTION_BOARD_DRAW,
+    SECTION_ANIMATION_UPDATE,
+    SECTION_ANIMATION_DRAW,
+    SECTION_GALLERY_DRAW,
+)
+
+
+class _SectionTimer:
+    """单个分段的计时器，作为 with 语句的上下文管理器使用。每个分段只创建一个实例，计时时不分配新对象。"""
+    __slots__ = ('_profiler', 'name', '_start')
+
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self.name = name
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._profiler._add_section_time(self.name, time.perf_counter() - self._start)
+        return False # 不吞掉异常
+
+
+class FrameProfiler:
+    """
+    帧耗时分析器。
+
+    用法：
+        profiler.begin_frame()
+        with profiler.section(SECTION_BOARD_UPDATE):
+            board.update(dt)
+        ...
+        profiler.end_frame(dt)
+    """
+    def __init__(self, history_frames=None, trace_max_frames=None):
+        """
+        Args:
+            history_frames (int): 滚动统计 (叠加层) 使用的帧数。默认 settings.PROFILER_HISTORY_FRAMES。
+            trace_max_frames (int): 保留用于 CSV 导出的最多帧数。默认 settings.PROFILER_TRACE_MAX_FRAMES。
+        """
+        self.enabled = settings.PROFILER_ENABLED
+        self.history_frames = history_frames or settings.PROFILER_HISTORY_FRAMES
+        trace_max_frames = trace_max_frames or settings.PROFILER_TRACE_MAX_FRAMES
+
+        self._timers = {name: _SectionTimer(self, name) for name in SECTION_NAMES}
+        self._current_sections = dict.fromkeys(SECTION_NAMES, 0.0) # 当前帧各分段累计耗时 (秒)
+        self._frame_start = None
+        self._frame_index = 0
+
+        # 滚动统计：每帧的总耗时和各分段耗时 (毫秒)
+        self._frame_ms_history = collections.deque(maxlen=self.history_frames)
+        self._section_ms_history = {name: collections.deque(maxlen=self.history_frames) for name in SECTION_NAMES}
+
+        # CSV 逐帧记录: (帧序号, 时间戳, dt 毫秒, 帧耗时毫秒, 各分段毫秒...)
+        self._trace = collections.deque(maxlen=trace_max_frames)
+        self._trace_start_time = time.time()
+
+        # 叠加层缓存 (每隔 settings.PROFILER_OVERLAY_REFRESH_INTERVAL 秒重建一次，避免每帧重新统计和渲染文字)
+        self._overlay_surface = None
+        self._overlay_built_time = 0.0
+
+
+    def section(self, name):
+        """
+        返回指定分段的计时上下文管理器。同一帧内多次进入同一分段时耗时会累加。
+
+        Args:
+            name (str): 分段名称 (SECTION_* 常量之一)。
+        """
+        timer = self._timers.get(name)
+        if timer is None:
+            # 未预先登记的分段，按需创建计时器并补齐历史记录
+            timer = _SectionTimer(self, name)
+            self._timers[name] = timer
+            self._current_sections[name] = 0.0
+            self._section_ms_history[name] = collections.deque([0.0] * len(self._frame_ms_history), maxlen=self.history_frames)
+        return timer
+
+    def _add_section_time(self, name, seconds):
+        """由 _SectionTimer 调用，将一次计时累加到当前帧。"""
+        if self.enabled:
+            self._current_sections[name] += seconds
+
+    def begin_frame(self):
+        """标记一帧工作的开始 (在事件处理之前调用)。"""
+        if not self.enabled:
+            return
+        self._frame_start = time.perf_counter()
+        for name in self._current_sections:
+            self._current_sections[name] = 0.0
+
+    def end_frame(self, dt):
+        """
+        标记一帧工作的结束 (在 display.flip 之后调用)，记录本帧的统计数据。
+
+        Args:
+            dt (float): 本帧的 delta time (秒)，即 clock.tick 返回的两帧间隔。
+        """
+        if not self.enabled or self._frame_start is None:
+            return
+        frame_ms = (time.perf_counter() - self._frame_start) * 1000.0
+        self._frame_start = None
+        self._frame_index += 1
+
+        self._frame_ms_history.append(frame_ms)
+        section_values = []
+        for name, history in self._section_ms_history.items():
+            section_ms = self._current_sections[name] * 1000.0
+            history.append(section_ms)
+            section_values.append(section_ms)
+
+        self._trace.append((self._frame_index, time.time() - self._trace_start_time, dt * 1000.0, frame_ms, *section_values))
+
+
+    def get_summary(self):
+        """
+        统计最近 history_frames 帧的数据。
+
+        Returns:
+            dict: {'frames': 帧数, 'frame': (平均, p95, 最大), 'sections': {name: (平均, 最大)}}，单位毫秒。
+        """
+        frame_values = sorted(self._frame_ms_history)
+        count = len(frame_values)
+        if count == 0:
+            return {'frames': 0, 'frame': (0.0, 0.0, 0.0), 'sections': {name: (0.0, 0.0) for name in self._section_ms_history}}
+
+        p95 = frame_values[min(count - 1, int(count * 0.95))]
+        sections = {}
+        for name, history in self._section_ms_history.items():
+            sections[name] = (sum(history) / count, max(history)) if history else (0.0, 0.0)
+        return {'frames': count, 'frame': (sum(frame_values) / count, p95, frame_values[-1]), 'sections': sections}
+
+    def get_histogram(self):
+        """
+        按 settings.PROFILER_HISTOGRAM_BUCKET_MS 将最近的帧耗时分桶，最后一个桶包含所有更大的值。
+
+        Returns:
+            list: 每个桶的帧数。
+        """
+        bucket_ms = settings.PROFILER_HISTOGRAM_BUCKET_MS
+        bucket_count = settings.PROFILER_HISTOGRAM_BUCKETS
+        counts = [0] * bucket_count
+        for frame_ms in self._frame_ms_history:
+            counts[min(bucket_count - 1, int(frame_ms / bucket_ms))] += 1
+        return counts
+
+
+    def export_csv(self, file_path):
+        """
+        将记录的逐帧数据导出为 CSV 文件。
+
+        Args:
+            file_path (str): 导出文件路径。
+
+        Returns:
+            int: 导出的帧数；导出失败时返回 -1。
+        """
+        header = ['frame', 'time_s', 'dt_ms', 'frame_ms'] + [f"{name}_ms" for name in self._section_ms_history]
+        try:
+            with open(file_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                for row in self._trace:
+                    # 运行中途新增的分段在较早的帧中没有数据，补 0 对齐列
+                    padding = [0.0] * (len(header) - len(row))
+                    writer.writerow([row[0]] + [f"{value:.3f}" for value in (*row[1:], *padding)])
+        except OSError as e:
+            print(f"错误: FrameProfiler: 导出 CSV 文件 {file_path} 失败: {e}") # Debug
+            return -1
+        print(f"FrameProfiler: 已导出 {len(self._trace)} 帧记录到 {file_path}") # Debug
+        return len(self._trace)
+
+
+    def draw(self, surface, font):
+        """
+        在屏幕左上角绘制帧耗时叠加层：帧耗时统计、各分段的平均/最大耗时条形图和帧耗时直方图。
+
+        Args:
+            surface (pygame.Surface): 绘制目标。
+            font (pygame.font.Font): 文字字体 (通常为 Game.font_debug)。
+        """
+        now = time.time()
+        if self._overlay_surface is None or now - self._overlay_built_time >= settings.PROFILER_OVERLAY_REFRESH_INTERVAL:
+            self._overlay_surface = self._build_overlay(font)
+            self._overlay_built_time = now
+        surface.blit(self._overlay_surface, (settings.PROFILER_OVERLAY_POS[0], settings.PROFILER_OVERLAY_POS[1]))
+
+    def _build_overlay(self, font):
+        """根据当前滚动统计渲染叠加层 Surface。"""
+        summary = self.get_summary()
+        histogram = self.get_histogram()
+        padding = 8
+        line_height = font.get_linesize()
+        label_width = 150
+        bar_max_width = 160
+        bar_scale_ms = settings.PROFILER_BAR_SCALE_MS # 条形图满格对应的毫秒数
+        histogram_height = 60
+        width = padding * 2 + label_width + bar_max_width + 110
+        height = padding * 2 + line_height * (2 + len(summary['sections'])) + padding + histogram_height + line_height
+
+        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+        overlay.fill(settings.PROFILER_BG_COLOR)
+        text_color = settings.DEBUG_TEXT_COLOR
+
+        avg_ms, p95_ms, max_ms = summary['frame']
+        y = padding
+        overlay.blit(font.render(f"帧耗时 ({summary['frames']} 帧)  平均 {avg_ms:.2f}  p95 {p95_ms:.2f}  最大 {max_ms:.2f} ms", True, text_color), (padding, y))
+        y += line_height
+        overlay.blit(font.render("分段              平均 / 最大 (ms)", True, text_color), (padding, y))
+        y += line_height
+
+        for name, (section_avg, section_max) in summary['sections'].items():
+            overlay.blit(font.render(name, True, text_color), (padding, y))
+            bar_x = padding + label_width
+            bar_h = max(2, line_height - 4)
+            max_w = int(min(1.0, section_max / bar_scale_ms) * bar_max_width)
+            avg_w = int(min(1.0, section_avg / bar_scale_ms) * bar_max_width)
+            pygame.draw.rect(overlay, settings.PROFILER_BAR_MAX_COLOR, (bar_x, y + 2, max_w, bar_h))
+            pygame.draw.rect(overlay, settings.PROFILER_BAR_AVG_COLOR, (bar_x, y + 2, avg_w, bar_h))
+            overlay.blit(font.render(f"{section_avg:.2f} / {section_max:.2f}", True, text_color), (bar_x + bar_max_width + 8, y))
+            y += line_height
+
+        # 帧耗时直方图
+        y += padding
+        hist_width = width - padding * 2
+        bucket_w = hist_width / len(histogram)
+        peak = max(histogram) if histogram and max(histogram) > 0 else 1
+        for index, count in enumerate(histogram):
+            bar_h = int(count / peak * histogram_height)
+            if bar_h > 0:
+                pygame.draw.rect(overlay, settings.PROFILER_BAR_AVG_COLOR,
+                                 (padding + int(index * bucket_w), y + histogram_height - bar_h, max(1, int(bucket_w) - 1), bar_h))
+        y += histogram_height
+        bucket_ms = settings.PROFILER_HISTOGRAM_BUCKET_MS
+        overlay.blit(font.render("0 ms", True, text_color), (padding, y))
+        last_label = font.render(f">{bucket_ms * (len(histogram) - 1)} ms", True, text_color)
+        overlay.blit(last_label, (width - padding - last_label.get_width(), y))
+
+        return overlay
@@ -0,0 +1,358 @@
+# save_manager.py
+# 存档服务：后台线程写入、临时文件 + 原子重命名、合并短时间内的多次存档请求，
+# 使用带版本头的紧凑二进制格式，同时保留旧版 savegame.json 的导入路径。
+
+import copy # 用于在主线程快照存档数据
+import json # 用于导入旧版 JSON 存档
+import os
+import struct
+import threading
+import time
+import zlib # 用于 CRC32 校验
+
+import settings
+
+
+# --- 二进制存档格式 ---
+# 文件头: 魔数(4字节) + 版本号(uint16) + 负载长度(uint32) + 负载 CRC32(uint32)
+# 负载按固定顺序写入各字段，网格按行优先打包，每个槽位固定 8 字节 (图片ID int32 + 原始行 uint16 + 原始列 uint16)。
+SAVE_MAGIC = b"DTES"
+SAVE_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHII")
+_GRID_CELL = struct.Struct("<iHH")
+_EMPTY_CELL_ID = -1 # 空槽位的图片ID标记
+
+# 图片状态编码 (与 ImageManager 中的状态字符串一一对应)
+_STATUS_CODES = {'unentered': 0, 'unlit': 1, 'lit': 2}
+_STATUS_NAMES = {code: name for name, code in _STATUS_CODES.items()}
+
+
+class SaveFormatError(ValueError):
+    """二进制存档损坏或版本不受支持。"""
+
+
+def _pack_str(value):
+    """打包可为 None 的 UTF-8 字符串: 长度(int32, -1 表示 None) + 内容。"""
+    if value is None:
+        return struct.pack("<i", -1)
+    data = value.encode('utf-8')
+    return struct.pack("<i", len(data)) + data
+
+
+def encode_game_state(game_state_data):
+    """
+    将 Game.save_game_data 构建的存档字典编码为紧凑的二进制格式。
+
+    Args:
+        game_state_data (dict): 包含 'board_state'、'image_manager_state'、'save_time' 的存档字典。
+
+    Returns:
+        bytes: 带版本头的二进制存档数据。
+    """
+    board_state = game_state_data['board_state']
+    im_state = game_state_data['image_manager_state']
+
+    parts = [struct.pack("<d", game_state_data.get('save_time', time.time()))]
+
+    # Board 状态
+    grid_layout = board_state.get('grid_layout') or []
+    rows = len(grid_layout)
+    cols = len(grid_layout[0]) if rows else 0
+    parts.append(struct.pack("<HHHHI", rows, cols,
+                             board_state.get('playable_cols', 0),
+                             board_state.get('playable_rows', 0),
+                             board_state.get('unlocked_pictures_count', 0)))
+    parts.append(_pack_str(board_state.get('background_name')))
+    grid_buffer = bytearray(rows * cols * _GRID_CELL.size)
+    offset = 0
+    for row_data in grid_layout:
+        for piece_info in row_data:
+            if piece_info is None:
+                _GRID_CELL.pack_into(grid_buffer, offset, _EMPTY_CELL_ID, 0, 0)
+            else:
+                _GRID_CELL.pack_into(grid_buffer, offset, int(piece_info['id']), piece_info['orig_r'], piece_info['orig_c'])
+            offset += _GRID_CELL.size
+    parts.append(bytes(grid_buffer))
+
+    # ImageManager 状态 (字典键可能是整数或字符串，统一按整数存储)
+    image_status = im_state.get('image_status', {})
+    parts.append(struct.pack("<I", len(image_status)))
+    for img_id, status in sorted((int(k), v) for k, v in image_status.items()):
+        parts.append(struct.pack("<iB", img_id, _STATUS_CODES.get(status, 0)))
+
+    completed_times = im_state.get('completed_times', {})
+    parts.append(struct.pack("<I", len(completed_times)))
+    for img_id, comp_time in sorted((int(k), v) for k, v in completed_times.items()):
+        parts.append(struct.pack("<id", img_id, comp_time))
+
+    next_id = im_state.get('next_image_to_consume_id')
+    parts.append(struct.pack("<iI",
+                             _EMPTY_CELL_ID if next_id is None else int(next_id),
+                             im_state.get('pieces_consumed_from_current_image', 0)))
+
+    payload = b"".join(parts)
+    return _HEADER.pack(SAVE_MAGIC, SAVE_FORMAT_VERSION, len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_game_state(data):
+    """
+    解码二进制存档，返回与旧版 JSON 存档结构一致的字典 (图片ID键为字符串)，
+    因此 Board 和 ImageManager 的读档代码无需区分存档来源。
+
+    Args:
+        data (bytes): encode_game_state 生成的数据。
+
+    Returns:
+        dict: 存档字典。
+
+    Raises:
+        SaveFormatError: 数据损坏、截断或版本不受支持。
+    """
+    if len(data) < _HEADER.size:
+        raise SaveFormatError("存档文件过短")
+    magic, version, payload_len, crc = _HEADER.unpack_from(data, 0)
+    if magic != SAVE_MAGIC:
+        raise SaveFormatError("存档文件魔数不匹配")
+    if version != SAVE_FORMAT_VERSION:
+        raise SaveFormatError(f"不支持的存档版本 {version}")
+    payload = data[_HEADER.size:]
+    if len(payload) != payload_len or zlib.crc32(payload) != crc:
+        raise SaveFormatError("存档文件长度或校验和不匹配")
+
+    try:
+        offset = 0
+
+        def read(fmt):
+            nonlocal offset
+            values = struct.unpack_from(fmt, payload, offset)
+            offset += struct.calcsize(fmt)
+            return values
+
+        def read_str():
+            nonlocal offset
+            (length,) = read("<i")
+            if length < 0:
+                return None
+            value = payload[offset:offset + length].decode('utf-8')
+            offset += length
+            return value
+
+        (save_time,) = read("<d")
+        rows, cols, playable_cols, playable_rows, unlocked_count = read("<HHHHI")
+        background_name = read_str()
+
+        grid_layout = []
+        for _ in range(rows):
+            row_data = []
+            for _ in range(cols):
+                img_id, orig_r, orig_c = _GRID_CELL.unpack_from(payload, offset)
+                offset += _GRID_CELL.size
+                row_data.append(None if img_id == _EMPTY_CELL_ID else {'id': img_id, 'orig_r': orig_r, 'orig_c': orig_c})
+            grid_layout.append(row_data)
+
+        (status_count,) = read("<I")
+        image_status = {}
+        for _ in range(status_count):
+            img_id, code = read("<iB")
+            image_status[str(img_id)] = _STATUS_NAMES.get(code, 'unentered')
+
+        (completed_count,) = read("<I")
+        completed_times = {}
+        for _ in range(completed_count):
+            img_id, comp_time = read("<id")
+            completed_times[str(img_id)] = comp_time
+
+        next_id, pieces_consumed = read("<iI")
+    except (struct.error, UnicodeDecodeError) as e:
+        raise SaveFormatError(f"存档数据截断或损坏: {e}")
+
+    return {
+        'board_state': {
+            'grid_layout': grid_layout,
+            'playable_cols': playable_cols,
+            'playable_rows': playable_rows,
+            'unlocked_pictures_count': unlocked_count,
+            'background_name': background_name,
+        },
+        'image_manager_state': {
+            'image_status': image_status,
+            'completed_times': completed_times,
+            'next_image_to_consume_id': None if next_id == _EMPTY_CELL_ID else next_id,
+            'pieces_consumed_from_current_image': pieces_consumed,
+        },
+        'save_time': save_time,
+    }
+
+
+class SaveManager:
+    """
+    存档服务。主线程只负责快照存档数据，编码和磁盘写入在后台线程完成。
+    短时间内的多次请求只保留最新的一份数据 (合并写入)。
+    """
+    def __init__(self, save_file_path, legacy_json_path=None, coalesce_delay=settings.SAVE_COALESCE_DELAY):
+        """
+        Args:
+            save_file_path (str): 二进制存档文件路径。
+            legacy_json_path (str, optional): 旧版 JSON 存档路径，仅在没有可用二进制存档时用于导入。
+            coalesce_delay (float): 收到请求后等待的秒数，期间到达的新请求会覆盖旧请求。
+        """
+        self.save_file_path = save_file_path
+        self.legacy_json_path = legacy_json_path
+        self.coalesce_delay = coalesce_delay
+
+        self._condition = threading.Condition()
+        self._pending_data = None # 等待写入的最新存档快照
+        self._is_writing = False # 后台线程是否正在写入
+        self._flush_requested = False # flush 请求跳过合并等待
+        self._stopping = False
+
+        self._writer_thread = threading.Thread(target=self._writer_loop, name="SaveWriter", daemon=True)
+        self._writer_thread.start()
+
+
+    def request_save(self, game_state_data):
+        """
+        提交一次存档请求 (非阻塞)。数据会在主线程深拷贝，后续修改游戏状态不会影响本次存档。
+
+        Args:
+            game_state_data (dict): Game.save_game_data 构建的存档字典。
+        """
+        snapshot = copy.deepcopy(game_state_data)
+        with self._condition:
+            if self._pending_data is not None:
+                print("SaveManager: 合并存档请求，丢弃尚未写入的旧快照。") # Debug
+            self._pending_data = snapshot
+            self._condition.notify_all()
+
+
+    def flush(self, timeout=5.0):
+        """
+        等待所有已提交的存档写入磁盘 (用于退出游戏前)。
+
+        Returns:
+            bool: True 表示全部写入完成，False 表示超时。
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            # 跳过合并等待，让后台线程立即写入
+            self._flush_requested = True
+            self._condition.notify_all()
+            while self._pending_data is not None or self._is_writing:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    print(f"警告: SaveManager: 等待存档写入超时 ({timeout} 秒)。") # Debug
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+
+    def shutdown(self, timeout=5.0):
+        """写入剩余存档并停止后台线程。"""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._writer_thread.join(timeout)
+
+
+    def _writer_loop(self):
+        """后台写入线程主循环。"""
+        while True:
+            with self._condition:
+                while self._pending_data is None and not self._stopping:
+                    self._condition.wait()
+                if self._pending_data is None and self._stopping:
+                    return
+
+                # 合并窗口：等待一小段时间，期间的新请求会替换 _pending_data
+                # flush/shutdown 会提前结束本次等待
+                deadline = time.time() + self.coalesce_delay
+                while not self._stopping and not self._flush_requested:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                self._flush_requested = False
+
+                data = self._pending_data
+                self._pending_data = None
+                self._is_writing = data is not None
+
+            if data is not None:
+                try:
+                    self._write_atomic(encode_game_state(data))
+                except Exception as e:
+                    print(f"错误: SaveManager: 保存游戏状态失败到 {self.save_file_path}: {e}") # Debug error
+
+            with self._condition:
+                self._is_writing = False
+                self._condition.notify_all()
+
+
+    def _write_atomic(self, encoded):
+        """先写入临时文件并落盘，再原子重命名覆盖正式存档，避免写入中途崩溃导致存档损坏。"""
+        temp_path = self.save_file_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.save_file_path)
+        print(f"游戏状态已保存到 {self.save_file_path} ({len(encoded)} 字节)") # Debug success
+
+
+    def load(self):
+        """
+        读取存档。优先读取二进制存档，缺失或损坏时回退到旧版 JSON 存档。
+
+        Returns:
+            dict or None: 存档字典 (结构与旧版 JSON 存档一致)，没有可用存档时返回 None。
+        """
+        if os.path.exists(self.save_file_path):
+            try:
+                with open(self.save_file_path, 'rb') as f:
+                    game_state_data = decode_game_state(f.read())
+                print(f"游戏状态已从 {self.save_file_path} 加载成功。") # Debug success
+                return game_state_data
+            except (OSError, SaveFormatError) as e:
+                print(f"错误: 存档文件 {self.save_file_path} 无法读取: {e}. 尝试导入旧版 JSON 存档。") # Debug error
+
+        if self.legacy_json_path and os.path.exists(self.legacy_json_path):
+            try:
+                with open(self.legacy_json_path, 'r', encoding='utf-8') as f:
+                    game_state_data = json.load(f)
+                print(f"游戏状态已从旧版 JSON 存档 {self.legacy_json_path} 导入。下次保存将使用新格式。") # Debug success
+                return game_state_data
+            except json.JSONDecodeError as e:
+                print(f"错误: 存档文件 {self.legacy_json_path} 格式错误，无法解析 JSON: {e}.") # Debug error
+            except Exception as e:
+                print(f"错误: 加载存档状态失败从 {self.legacy_json_path}: {e}") # Debug error
+            return None
+
+        print("没有找到存档文件，开始新游戏。") # Debug
+        return None
+
+
+if __name__ == "__main__":
+    # 简单对比：旧版缩进 JSON 与二进制格式的体积和编码耗时，并验证往返一致
+    legacy_path = os.path.join(settings.BASE_DIR, settings.SAVE_FILE_NAME)
+    if not os.path.exists(legacy_path):
+        print(f"没有找到 {legacy_path}，无法运行对比。")
+    else:
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            sample = json.load(f)
+
+        iterations = 1000
+        start = time.perf_counter()
+        for _ in range(iterations):
+            json_bytes = json.dumps(sample, indent=4).encode('utf-8')
+        json_ms = (time.perf_counter() - start) * 1000 / iterations
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            packed = encode_game_state(sample)
+        packed_ms = (time.perf_counter() - start) * 1000 / iterations
+
+        decoded = decode_game_state(packed)
+        assert decoded['board_state'] == sample['board_state'], "Board 状态往返不一致"
+        assert decoded['image_manager_state'] == sample['image_manager_state'], "ImageManager 状态往返不一致"
+        print(f"JSON:   {len(json_bytes)} 字节, 编码 {json_ms:.3f} ms")
+        print(f"二进制: {len(packed)} 字节, 编码 {packed_ms:.3f} ms (往返一致)")
@@ -210,6 +210,7 @@ GALLERY_THUMBNAIL_WIDTH = (GALLERY_WIDTH - 2 * GALLERY_PADDING - (GALLERY_IMAGES
 # GALLERY_THUMBNAIL_HEIGHT 在 ImageManager 中根据图片逻辑比例和 GALLERY_THUMBNAIL_WIDTH 计算
 
 GALLERY_SCROLL_SPEED = 90 # 图库滑动速度 (像素/帧)
+GALLERY_PREFETCH_ROWS = 2 # 可见区域上下额外预取缩略图的行数
 
 
 # 提示信息设置 ("美图尚未点亮")
@@ -242,10 +243,25 @@ BOARD_STATE_UPGRADING_AREA = 5        # 正在升级可放置区域 (移动碎
 # COMPLETION_ANIM_MARGIN = 80 # 动画结束时原始图片距离屏幕边缘的边距
 
 # 存档设置
-SAVE_FILE_NAME = "savegame.json" # 存档文件名
-# 完整的存档文件路径将是 os.path.join(BASE_DIR, SAVE_FILE_NAME)
+SAVE_FILE_NAME = "savegame.json" # 旧版 JSON 存档文件名 (仅在没有二进制存档时导入)
+SAVE_DATA_FILE_NAME = "savegame.dat" # 二进制存档文件名
+# 完整的存档文件路径将是 os.path.join(BASE_DIR, SAVE_DATA_FILE_NAME)
+SAVE_COALESCE_DELAY = 0.5 # 合并存档请求的等待时间 (秒)，期间的多次保存只写入最后一次
 AUTOSAVE_INTERVAL = 100 # 自动存档间隔 (秒)
 
 # Debug 设置
 DEBUG_TEXT_COLOR = (255, 255, 255) # Debug 文字颜色 (白色)
-DEBUG_FONT_SIZE = 15 # Debug 文字字体大小
\ No newline at end of file
+DEBUG_FONT_SIZE = 15 # Debug 文字字体大小
+# 帧耗时分析器设置 (F3 切换叠加层显示，F4 导出 CSV 逐帧记录)
+PROFILER_ENABLED = True # 是否记录各子系统的分段耗时
+PROFILER_HISTORY_FRAMES = 240 # 叠加层滚动统计使用的最近帧数
+PROFILER_TRACE_MAX_FRAMES = 36000 # 保留用于 CSV 导出的最多帧数 (60 FPS 下约 10 分钟)
+PROFILER_TRACE_FILE_PREFIX = "frame_trace" # 导出文件名前缀，完整文件名为 前缀_时间戳.csv，保存在 BASE_DIR
+PROFILER_OVERLAY_REFRESH_INTERVAL = 0.25 # 叠加层重新统计和渲染的间隔 (秒)
+PROFILER_OVERLAY_POS = (10, 10) # 叠加层左上角位置
+PROFILER_BG_COLOR = (0, 0, 0, 180) # 叠加层背景色 (带透明度)
+PROFILER_BAR_AVG_COLOR = (80, 200, 120) # 平均耗时条颜色
+PROFILER_BAR_MAX_COLOR = (200, 80, 80) # 最大耗时条颜色
+PROFILER_BAR_SCALE_MS = 16.7 # 条形图满格对应的毫秒数 (60 FPS 的一帧)
+PROFILER_HISTOGRAM_BUCKET_MS = 2 # 帧耗时直方图每个桶的宽度 (毫秒)
+PROFILER_HISTOGRAM_BUCKETS = 17 # 直方图桶数，最后一个桶包含所有更大的值
@@ -1,6 +1,9 @@
 # audio_manager.py
 import pygame
 import os
+import queue
+import threading
+from collections import OrderedDict
 from settings import Settings
 # 导入类型提示
 from typing import TYPE_CHECKING
@@ -32,46 +35,141 @@ class AudioManager:
         self.sfx_volume = settings.SFX_VOLUME
         self.ai_sfx_volume = settings.AI_SFX_VOLUME
 
-        # 加载音效字典 (AI声音和其他音效)
-        self.loaded_sfx = {}
-        self._load_all_sfx()
-
-
-    def _load_all_sfx(self):
-        """加载所有预定义的音效文件"""
-        # 加载AI声音音效
-        # self.settings.AI_SOUND_EFFECTS 是一个字典 {text_id: file_name}
-        for text_id, file_name in self.settings.AI_SOUND_EFFECTS.items():
-             # 修正: 拼接音频目录和文件名
-             full_path = os.path.join(self.settings.AUDIO_DIR, file_name)
-             if os.path.exists(full_path):
-                 try:
-                     self.loaded_sfx[text_id] = pygame.mixer.Sound(full_path)
-                     # print(f"成功加载AI音效: {file_name}") # 调试
-                 except pygame.error as e:
-                     print(f"警告：无法加载AI声音音效 {full_path}: {e}")
-                     self.loaded_sfx[text_id] = None # 加载失败则设为None
-             else:
-                  print(f"警告：AI声音音效文件未找到 {full_path}")
-                  self.loaded_sfx[text_id] = None # 未找到则设为None
-
-
-        # 加载其他通用音效 (key 是音效ID，value 是文件名)
-        # self.settings.GENERIC_SFX 现在是一个字典 {id: filename}
-        # 修正: 遍历字典的 items()
-        for sfx_id, file_name in self.settings.GENERIC_SFX.items(): # 修正: 使用 self.settings.GENERIC_SFX
-            # 修正: 拼接音频目录和文件名
-            full_path = os.path.join(self.settings.AUDIO_DIR, file_name)
-            if os.path.exists(full_path):
-                try:
-                    self.loaded_sfx[sfx_id] = pygame.mixer.Sound(full_path)
-                    # print(f"成功加载通用音效: {file_name}") # 调试
-                except pygame.error as e:
-                    print(f"警告：无法加载通用音效 {full_path}: {e}")
-                    self.loaded_sfx[sfx_id] = None
+        # 音效按需加载，已加载的音效按最近使用顺序保存，总字节数超过 settings.SFX_CACHE_BUDGET_BYTES 时淘汰最久未用的
+        self.loaded_sfx = OrderedDict() # {sfx_id: pygame.mixer.Sound}
+        self._sfx_sizes = {} # {sfx_id: 解码后的字节数}
+        self._loaded_bytes = 0
+        self._missing_sfx = set() # 文件不存在或加载失败的音效ID，只警告一次
+        self._lock = threading.Lock()
+        self._loading = {} # {sfx_id: threading.Event}，正在加载或排队等待预取的音效 (同一音效只加载一次)
+        self._queued_sfx = set() # 已排队但预取线程尚未开始加载的音效ID，主线程需要时可以直接认领
+
+        # 后台预取线程 (GameManager 在进入阶段时请求预取当前和下一阶段用到的音效)
+        self._prefetch_jobs = queue.Queue()
+        self._prefetch_thread = threading.Thread(target=self._prefetch_loop, name="AudioPrefetch", daemon=True)
+        self._prefetch_thread.start()
+        self.prefetch_sfx(self.settings.PRELOAD_SFX)
+
+
+    def _get_sfx_path(self, sfx_id):
+        """音效ID对应的文件路径 (AI声音的ID是文本ID)，未定义时返回 None"""
+        file_name = self.settings.AI_SOUND_EFFECTS.get(sfx_id) or self.settings.GENERIC_SFX.get(sfx_id)
+        if not file_name:
+            return None
+        return os.path.join(self.settings.AUDIO_DIR, file_name)
+
+
+    def _get_sound_bytes(self, sound: pygame.mixer.Sound) -> int:
+        """估算音效解码后占用的字节数 (时长 × 采样率 × 声道数 × 采样字节数)"""
+        mixer_init = pygame.mixer.get_init()
+        if not mixer_init:
+            return 0
+        frequency, sample_format, channels = mixer_init
+        return int(sound.get_length() * frequency * channels * (abs(sample_format) // 8))
+
+
+    def _get_sfx(self, sfx_id):
+        """
+        获取音效的 Sound 对象，未加载时同步加载。
+        如果该音效已在后台开始加载，等待其完成而不是重复加载；
+        如果只是在预取队列中排队，直接认领并同步加载 (不必等待队列中排在前面的音效)，预取线程随后会跳过它。
+        """
+        with self._lock:
+            sound = self.loaded_sfx.get(sfx_id)
+            if sound is not None:
+                self.loaded_sfx.move_to_end(sfx_id)
+                return sound
+            if sfx_id in self._missing_sfx:
+                return None
+            pending_event = self._loading.get(sfx_id)
+            if pending_event is None:
+                # 由当前线程负责加载
+                self._loading[sfx_id] = threading.Event()
+            elif sfx_id in self._queued_sfx:
+                # 预取线程还没开始加载，由当前线程认领
+                self._queued_sfx.discard(sfx_id)
+                pending_event = None
+        if pending_event is not None:
+            pending_event.wait()
+            with self._lock:
+                return self.loaded_sfx.get(sfx_id)
+        return self._load_sfx(sfx_id)
+
+
+    def _load_sfx(self, sfx_id):
+        """
+        加载音效并放入缓存 (调用方已在 _loading 中登记)，加载结束后唤醒等待的线程。
+        无论加载是否出错都会从 _loading 中移除并唤醒等待者，等待中的 _get_sfx 不会永远阻塞。
+        """
+        sound = None
+        size = 0
+        full_path = None
+        try:
+            full_path = self._get_sfx_path(sfx_id)
+            if full_path is None:
+                print(f"警告：音效ID {sfx_id} 未在 AI 或通用音效列表中定义")
+            elif not os.path.exists(full_path):
+                print(f"警告：音效文件未找到 {full_path}")
             else:
-                print(f"警告：通用音效文件未找到 {full_path}")
-                self.loaded_sfx[sfx_id] = None
+                # 检查存在之后文件仍可能被删除或无法读取 (OSError)
+                sound = pygame.mixer.Sound(full_path)
+                size = self._get_sound_bytes(sound)
+        except (pygame.error, OSError) as e:
+            print(f"警告：无法加载音效 {full_path or sfx_id}: {e}")
+            sound = None
+        finally:
+            with self._lock:
+                try:
+                    if sound is None:
+                        self._missing_sfx.add(sfx_id)
+                    else:
+                        self.loaded_sfx[sfx_id] = sound
+                        self._sfx_sizes[sfx_id] = size
+                        self._loaded_bytes += size
+                        self._evict_sfx_over_budget()
+                finally:
+                    self._loading.pop(sfx_id).set()
+        return sound
+
+
+    def _evict_sfx_over_budget(self):
+        """(持有锁时调用) 淘汰最久未使用的音效直到总字节数不超过预算，正在播放的音效不会被淘汰"""
+        if self._loaded_bytes <= self.settings.SFX_CACHE_BUDGET_BYTES:
+            return
+        playing_sounds = {channel.get_sound() for channel in self.sfx_channels if channel.get_busy()}
+        for sfx_id in list(self.loaded_sfx.keys())[:-1]: # 最新加载的音效总是保留
+            if self._loaded_bytes <= self.settings.SFX_CACHE_BUDGET_BYTES:
+                break
+            if self.loaded_sfx[sfx_id] in playing_sounds:
+                continue
+            del self.loaded_sfx[sfx_id]
+            self._loaded_bytes -= self._sfx_sizes.pop(sfx_id, 0)
+
+
+    def prefetch_sfx(self, sfx_ids):
+        """请求在后台加载一批音效。已加载、加载中或已知缺失的音效会被跳过"""
+        for sfx_id in sfx_ids:
+            with self._lock:
+                if sfx_id in self.loaded_sfx or sfx_id in self._loading or sfx_id in self._missing_sfx:
+                    continue
+                self._loading[sfx_id] = threading.Event()
+                self._queued_sfx.add(sfx_id)
+            self._prefetch_jobs.put(sfx_id)
+
+
+    def _prefetch_loop(self):
+        """后台预取线程主循环"""
+        while True:
+            sfx_id = self._prefetch_jobs.get()
+            with self._lock:
+                if sfx_id not in self._queued_sfx:
+                    continue # 已被主线程认领并加载
+                self._queued_sfx.discard(sfx_id)
+            try:
+                self._load_sfx(sfx_id)
+            except Exception as e:
+                # 单个音效出错不能结束预取线程 (_load_sfx 已唤醒等待者)
+                print(f"警告：后台预取音效 {sfx_id} 失败: {e}")
 
 
     # play_bgm 方法已正确，加载时拼接路径
@@ -115,7 +213,7 @@ class AudioManager:
                  # print(f"警告：音效ID {sfx_id} 未在 AI 或通用音效列表中定义。使用默认音效音量。") # 调试警告，可能不需要
                  volume = self.sfx_volume # 使用通用音效音量作为默认
 
-        sfx_sound = self.loaded_sfx.get(sfx_id) # 尝试从加载的音效字典中获取 Pygame Sound 对象
+        sfx_sound = self._get_sfx(sfx_id) # 从缓存获取 Pygame Sound 对象，未加载时按需加载
 
         if sfx_sound:
             sfx_sound.set_volume(volume)
@@ -127,7 +225,7 @@ class AudioManager:
             # 如果没有空闲通道，忽略本次播放（避免打断正在播放的重要音效）
             # print(f"警告：音效通道不足，无法播放音效: {sfx_id}")
 
-        # else: 音效ID未找到或加载失败（已在加载时警告）
+        # else: 音效ID未找到或加载失败（已在第一次加载时警告）
 
 
     def stop_sfx(self, sfx_id=None):
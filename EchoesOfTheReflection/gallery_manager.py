@@ -7,6 +7,7 @@ from settings import Settings
 from image_renderer import ImageRenderer
 from narrative_manager import NarrativeManager
 from audio_manager import AudioManager
+from thumbnail_cache import ThumbnailCache
 # 导入 GameManager 类型提示，避免循环引用
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
@@ -32,6 +33,13 @@ class GalleryManager:
         self.thumbnails = [] # Pygame Surface列表，用于绘制缩略图
         self.thumbnail_rects = [] # 每个缩略图在屏幕上的 Rect
         self.thumbnail_image_ids = [] # 每个缩略图对应的图片ID
+        self.thumbnail_cache_keys = [] # 每个缩略图的缓存键，后台生成完成后据此替换占位图
+
+        # 缩略图缓存 (内存 + 磁盘)，在多次进入画廊之间保留
+        self.thumbnail_cache = ThumbnailCache(settings)
+        # 缩略图未准备好时显示的占位图 (所有位置共用一个 Surface)
+        self.thumbnail_placeholder = pygame.Surface(self.settings.GALLERY_THUMBNAIL_SIZE)
+        self.thumbnail_placeholder.fill(self.settings.GALLERY_THUMBNAIL_PLACEHOLDER_COLOR)
 
         self.displaying_detail = False # 是否正在显示单张大图和文本
         self.detail_image_id = None # 正在显示的详情图片ID
@@ -72,10 +80,11 @@ class GalleryManager:
 
 
     def _generate_thumbnails(self):
-        """生成所有已解锁图片的缩略图"""
+        """布局所有已解锁图片的缩略图。内存缓存未命中的先显示占位图，由 ThumbnailCache 在后台读取磁盘缓存或生成"""
         self.thumbnails = []
         self.thumbnail_rects = []
         self.thumbnail_image_ids = []
+        self.thumbnail_cache_keys = []
 
         unlocked_image_ids = list(self.unlocked_images.keys())
         # 排序以便缩略图顺序一致
@@ -96,59 +105,50 @@ class GalleryManager:
         current_y = self.start_y
         row_count = 0
         screen_width = self.screen.get_width() # 获取当前屏幕宽度来计算布局
+        target_width, target_height = self.settings.GALLERY_THUMBNAIL_SIZE
 
         for image_id in unlocked_image_ids:
             config = self.image_configs.get(image_id)
             # 跳过没有文件的配置，以及画廊入口图本身 (它不是普通缩略图)
             if config and config.get("file") and image_id != "gallery_intro":
-                 try:
-                     # 加载原始图片，缩放到缩略图尺寸
-                     original_image_path = os.path.join(self.settings.IMAGE_DIR, config["file"])
-                     original_image = pygame.image.load(original_image_path).convert_alpha()
-
-                     # 缩略图裁剪和缩放策略：保持比例，短边匹配，长边裁剪
-                     original_width, original_height = original_image.get_size()
-                     original_aspect = original_width / original_height
-                     target_width, target_height = self.settings.GALLERY_THUMBNAIL_SIZE
-                     target_aspect = target_width / target_height
-
-                     if original_aspect > target_aspect:
-                         # 原始图片更宽，匹配目标高度，裁剪宽度
-                         scaled_height = target_height
-                         scaled_width = int(scaled_height * original_aspect)
-                         scaled_image = pygame.transform.scale(original_image, (scaled_width, scaled_height))
-                         crop_width = scaled_width - target_width
-                         thumbnail_surface = scaled_image.subsurface(pygame.Rect(crop_width // 2, 0, target_width, target_height))
-                     else:
-                         # 原始图片更高或同比例，匹配目标宽度，裁剪高度
-                         scaled_width = target_width
-                         scaled_height = int(scaled_width / original_aspect)
-                         scaled_image = pygame.transform.scale(original_image, (scaled_width, scaled_height))
-                         crop_height = scaled_height - target_height
-                         thumbnail_surface = scaled_image.subsurface(pygame.Rect(0, crop_height // 2, target_width, target_height))
-
-                     # TODO: 可以在缩略图上叠加一个“已解锁”标记或边框 (使用UI图片资源)
-
-                     self.thumbnails.append(thumbnail_surface)
-                     rect = pygame.Rect(current_x, current_y, target_width, target_height)
-                     self.thumbnail_rects.append(rect)
-                     self.thumbnail_image_ids.append(image_id)
-
-                     # 计算下一个位置
-                     current_x += target_width + self.thumbnail_spacing_x
-                     row_count += 1
-                     # 检查是否达到每行最大数量，并且下一张图的位置会超出屏幕宽度
-                     if row_count >= self.settings.GALLERY_THUMBNAILS_PER_ROW or (current_x + target_width + self.settings.GALLERY_PADDING > screen_width and row_count > 0): # 如果下一张超出屏幕且当前行有图，就换行
-                         current_x = self.start_x
-                         current_y += target_height + self.thumbnail_spacing_y
-                         row_count = 0
-
-                 except pygame.error as e:
-                     print(f"警告：无法加载或处理缩略图 {image_id}: {e}")
-                     # TODO: 绘制一个占位符缩略图
-                 except Exception as e:
-                     print(f"处理缩略图 {image_id} 时发生未知错误: {e}")
-                     # TODO: 绘制一个占位符缩略图
+                 original_image_path = os.path.join(self.settings.IMAGE_DIR, config["file"])
+                 cache_key = self.thumbnail_cache.make_key(original_image_path, self.settings.GALLERY_THUMBNAIL_SIZE)
+                 if cache_key is None:
+                     print(f"警告：无法加载或处理缩略图 {image_id}: 图片文件未找到 {original_image_path}")
+                     continue
+
+                 # 内存缓存命中时直接使用，否则先显示占位图，在后台读取磁盘缓存或从原图生成
+                 thumbnail_surface = self.thumbnail_cache.get(cache_key)
+                 if thumbnail_surface is None:
+                     thumbnail_surface = self.thumbnail_placeholder
+                     self.thumbnail_cache.request(cache_key)
+
+                 # TODO: 可以在缩略图上叠加一个“已解锁”标记或边框 (使用UI图片资源)
+
+                 self.thumbnails.append(thumbnail_surface)
+                 rect = pygame.Rect(current_x, current_y, target_width, target_height)
+                 self.thumbnail_rects.append(rect)
+                 self.thumbnail_image_ids.append(image_id)
+                 self.thumbnail_cache_keys.append(cache_key)
+
+                 # 计算下一个位置
+                 current_x += target_width + self.thumbnail_spacing_x
+                 row_count += 1
+                 # 检查是否达到每行最大数量，并且下一张图的位置会超出屏幕宽度
+                 if row_count >= self.settings.GALLERY_THUMBNAILS_PER_ROW or (current_x + target_width + self.settings.GALLERY_PADDING > screen_width and row_count > 0): # 如果下一张超出屏幕且当前行有图，就换行
+                     current_x = self.start_x
+                     current_y += target_height + self.thumbnail_spacing_y
+                     row_count = 0
+
+
+    def _apply_ready_thumbnails(self):
+        """用后台生成好的缩略图替换对应位置的占位图"""
+        for cache_key, thumbnail_surface in self.thumbnail_cache.poll_ready():
+            if thumbnail_surface is None:
+                continue # 生成失败，保留占位图
+            for i, key in enumerate(self.thumbnail_cache_keys):
+                if key == cache_key:
+                    self.thumbnails[i] = thumbnail_surface
 
 
     def handle_event(self, event):
@@ -184,8 +184,9 @@ class GalleryManager:
             #    self.settings.game_manager.ui_manager.set_element_visible("gallery_detail_back_button", True)
 
         else:
+            # 替换后台已生成的缩略图占位图
+            self._apply_ready_thumbnails()
             # 更新缩略图或其他画廊元素的动画 (可选)
-            pass
 
     def draw(self, screen: pygame.Surface):
         """绘制画廊界面"""
@@ -6,6 +6,7 @@ import os
 # 导入自定义模块 - 现在它们位于根目录
 from settings import Settings
 from image_renderer import ImageRenderer
+from image_prefetcher import ImagePrefetcher
 from narrative_manager import NarrativeManager
 from audio_manager import AudioManager
 from input_handler import InputHandler
@@ -88,6 +89,8 @@ class GameManager:
         self.image_renderer = ImageRenderer(screen, settings)
         # 将自身引用传递给 ImageRenderer
         self.image_renderer.set_game_manager(self)
+        # 后台预取下一张图片 (解码、缩放裁剪、蒙版和初始模糊)，切换图片时直接使用准备好的结果
+        self.image_prefetcher = ImagePrefetcher(settings, self.image_renderer) if settings.PREFETCH_NEXT_IMAGE else None
 
         # AudioManger 在 NarrativeManager 前初始化
         self.audio_manager = AudioManager(settings)
@@ -225,6 +228,9 @@ class GameManager:
         print(f"加载阶段: {stage_id}")
         self.current_stage_id = stage_id
 
+        # 在后台预取当前阶段和下一阶段会用到的音效
+        self._prefetch_stage_audio(stage_id)
+
         # 激活当前阶段对应的UI集合 (已经在 _set_state 中处理)
 
         # TODO: 根据阶段ID加载背景音乐 (在这里播放背景音乐更合适)
@@ -246,12 +252,7 @@ class GameManager:
                  config = self.image_configs.get("gallery_intro")
             else:
                  # 找到该阶段的第一张图配置
-                 first_image_id_in_stage = None
-                 # 按照 index 找到该阶段 index 为 1 的图片ID
-                 for img_id, cfg in self.image_configs.items():
-                     if cfg.get("stage") == stage_id and cfg.get("index") == 1:
-                         first_image_id_in_stage = img_id
-                         break
+                 first_image_id_in_stage = self._get_first_image_id_in_stage(stage_id)
                  config = self.image_configs.get(first_image_id_in_stage) if first_image_id_in_stage else None
 
             if config and "on_stage_enter" in config.get("narrative_triggers", {}):
@@ -267,12 +268,7 @@ class GameManager:
                  self._load_image(image_id)
              else:
                  # 找到该阶段的第一张图片ID
-                 first_image_id_in_stage = None
-                 # 按照 index 找到该阶段 index 为 1 的图片ID
-                 for img_id, cfg in self.image_configs.items():
-                     if cfg.get("stage") == stage_id and cfg.get("index") == 1:
-                         first_image_id_in_stage = img_id
-                         break
+                 first_image_id_in_stage = self._get_first_image_id_in_stage(stage_id)
                  if first_image_id_in_stage:
                       self._load_image(first_image_id_in_stage)
                  else:
@@ -280,6 +276,71 @@ class GameManager:
                       # TODO: 错误处理，例如加载一个错误占位图或回退到主菜单/引子
 
 
+    def _prefetch_stage_audio(self, stage_id):
+        """请求 AudioManager 在后台加载当前阶段和下一阶段图片配置中引用的音效 (叙事文本的AI声音、互动音效)"""
+        stage_order = [self.settings.STAGE_INTRO, self.settings.STAGE_1, self.settings.STAGE_2, self.settings.STAGE_3,
+                       self.settings.STAGE_4, self.settings.STAGE_5, self.settings.STAGE_6, self.settings.STAGE_GALLERY]
+        stage_ids = [stage_id]
+        if stage_id in stage_order and stage_order.index(stage_id) + 1 < len(stage_order):
+            stage_ids.append(stage_order[stage_order.index(stage_id) + 1])
+
+        sfx_ids = []
+        for cfg in self.image_configs.values():
+            if cfg.get("stage") in stage_ids:
+                sfx_ids.extend(self.settings.INTERACTION_SFX.get(cfg.get("type"), []))
+                self._collect_config_sfx_ids(cfg, sfx_ids)
+        self.audio_manager.prefetch_sfx(list(dict.fromkeys(sfx_ids))) # 去重并保持顺序 (当前阶段在前)
+
+
+    def _collect_config_sfx_ids(self, config_value, sfx_ids):
+        """递归收集图片配置 (包括混合玩法的子步骤) 中 narrative_triggers 引用的文本ID和 sfx_id"""
+        if isinstance(config_value, dict):
+            for key, value in config_value.items():
+                if key == "narrative_triggers" and isinstance(value, dict):
+                    for text_ids in value.values():
+                        if isinstance(text_ids, list):
+                            sfx_ids.extend(text_id for text_id in text_ids if isinstance(text_id, str))
+                elif key == "sfx_id" and isinstance(value, str):
+                    sfx_ids.append(value)
+                else:
+                    self._collect_config_sfx_ids(value, sfx_ids)
+        elif isinstance(config_value, list):
+            for item in config_value:
+                self._collect_config_sfx_ids(item, sfx_ids)
+
+
+    def _get_first_image_id_in_stage(self, stage_id):
+        """按照 index 找到该阶段 index 为 1 的图片ID，没有时返回 None"""
+        for img_id, cfg in self.image_configs.items():
+            if cfg.get("stage") == stage_id and cfg.get("index") == 1:
+                return img_id
+        return None
+
+
+    def _get_following_image_id(self, image_id):
+        """返回在指定图片之后将要加载的图片ID (同阶段的 next_image 或下一阶段的第一张图)，进入画廊或流程结束时返回 None"""
+        config = self.image_configs.get(image_id)
+        if not config:
+            return None
+        next_stage_id = config.get("next_stage")
+        if next_stage_id == self.settings.STAGE_GALLERY:
+            return None
+        if next_stage_id:
+            if next_stage_id in [self.settings.STAGE_1, self.settings.STAGE_2, self.settings.STAGE_3, self.settings.STAGE_4, self.settings.STAGE_5, self.settings.STAGE_6]:
+                return self._get_first_image_id_in_stage(next_stage_id)
+            return None
+        return config.get("next_image")
+
+
+    def _prefetch_following_image(self):
+        """请求后台预取当前图片之后的下一张图片"""
+        if self.image_prefetcher is None or not self.current_image_id:
+            return
+        next_image_id = self._get_following_image_id(self.current_image_id)
+        if next_image_id:
+            self.image_prefetcher.request(next_image_id, self.image_configs.get(next_image_id), self.screen.get_size())
+
+
     def _load_image(self, image_id):
         """加载指定图片及其互动配置"""
         config = self.image_configs.get(image_id)
@@ -305,7 +366,9 @@ class GameManager:
         if config.get("file"):
              # 使用 settings.IMAGE_DIR 获取完整路径
              image_path = os.path.join(self.settings.IMAGE_DIR, config["file"])
-             self.image_renderer.load_image(image_path) # load_image 中会计算 image_display_rect
+             # 如果后台已经预取了这张图片，直接交接准备好的 Surface，否则同步加载
+             prefetched = self.image_prefetcher.take(image_id, self.screen.get_size()) if self.image_prefetcher else None
+             self.image_renderer.load_image(image_path, prefetched) # load_image 中会计算 image_display_rect
 
              # 当图片加载完成且显示区域确定后，更新UI元素的位置
              self.ui_manager._calculate_ui_positions(self.image_renderer.image_display_rect)
@@ -313,7 +376,10 @@ class GameManager:
              # 应用初始效果
              if config.get("initial_effect"):
                  # ImageRenderer 应用效果时需要知道当前图片ID，以便在draw中根据状态绘制不同效果
-                 self.image_renderer.apply_effect(config["initial_effect"]["type"], config["initial_effect"].get("strength"), image_id) # 传递 image_id
+                 initial_effect = config["initial_effect"]
+                 # blur 的参数是初始强度，overlay 的参数是叠加纹理文件名
+                 effect_params = initial_effect.get("texture") if initial_effect["type"] == "overlay" else initial_effect.get("strength")
+                 self.image_renderer.apply_effect(initial_effect["type"], effect_params, image_id) # 传递 image_id
 
         else: # 纯文本图片 (如引子), 没有文件，清空当前图片显示
             self.image_renderer.current_image = None
@@ -329,7 +395,7 @@ class GameManager:
         if interaction_type == self.settings.INTERACTION_CLICK_REVEAL:
             self.current_image_interaction_state = ClickReveal(config, self.image_renderer) # 使用导入的类名
         elif interaction_type == self.settings.INTERACTION_CLEAN_ERASE:
-            self.current_image_interaction_state = CleanErase(config, self.image_renderer, self.screen) # 使用导入的类名
+            self.current_image_interaction_state = CleanErase(config, self.image_renderer) # 使用导入的类名
         elif interaction_type == self.settings.INTERACTION_DRAG_PUZZLE:
             self.current_image_interaction_state = DragPuzzle(config, self.image_renderer) # 使用导入的类名
         elif interaction_type and interaction_type.startswith("hybrid_"): # 混合玩法
@@ -349,12 +415,15 @@ class GameManager:
              self.unlocked_images[image_id] = True
 
 
-        self._save_game() # 加载新图后保存进度
+        self._save_game(background=True) # 加载新图后保存进度 (后台写入，不阻塞切换图片的这一帧)
 
 
         # 确保前进按钮初始隐藏
         self.ui_manager.set_element_visible("next_button", False)
 
+        # 当前图片互动进行期间，在后台准备下一张图片
+        self._prefetch_following_image()
+
 
     # handle_events 方法现在接收 events 列表
     def handle_events(self, events):
@@ -378,6 +447,8 @@ class GameManager:
                  # TODO: 通知其他需要知道屏幕尺寸变化的模块 (如 CleanErase 的 Render Texture)
                  if self.current_image_interaction_state and hasattr(self.current_image_interaction_state, 'resize'):
                       self.current_image_interaction_state.resize(new_width, new_height, current_image_display_rect) # 示例
+                 # 之前预取的下一张图片是按旧尺寸准备的，按新尺寸重新预取
+                 self._prefetch_following_image()
 
                  return # 事件已处理
 
@@ -578,8 +649,8 @@ class GameManager:
     #      return None
 
 
-    def _save_game(self):
-        """保存游戏进度"""
+    def _save_game(self, background=False):
+        """保存游戏进度。background 为 True 时在后台线程写入文件"""
         save_data = {
             "current_stage_id": self.current_stage_id,
             "current_image_id": self.current_image_id,
@@ -588,7 +659,10 @@ class GameManager:
             # TODO: 添加当前图片互动模块的状态保存数据
             # "current_interaction_state_data": self.current_image_interaction_state.get_state() if self.current_image_interaction_state else None
         }
-        self.save_manager.save_game(save_data)
+        if background:
+            self.save_manager.save_game_async(save_data)
+        else:
+            self.save_manager.save_game(save_data)
 
 
     # TODO: 添加_load_game方法，在初始化时调用 SaveManager 加载
@@ -599,4 +673,6 @@ class GameManager:
         """退出游戏"""
         # 在退出前保存游戏进度
         self._save_game()
+        if self.image_prefetcher:
+            self.image_prefetcher.shutdown()
         self.should_quit = True # 设置退出标志，主循环会检查它并退出
\ No newline at end of file
@@ -0,0 +1,167 @@
+# image_prefetcher.py
+import os
+import queue
+import threading
+
+import pygame
+from settings import Settings
+# 导入 ImageRenderer 类型提示，避免循环引用
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from image_renderer import ImageRenderer
+
+
+class PrefetchedImage:
+    """后台线程为某张图片准备好的资源，在切换到该图片时整体交给 ImageRenderer。"""
+
+    def __init__(self, image_id, screen_size: tuple[int, int]):
+        self.image_id = image_id
+        self.screen_size = screen_size # 准备时使用的屏幕尺寸，切换时尺寸不一致则作废
+        self.original_image: pygame.Surface | None = None # 原始图片 (已 convert_alpha)
+        self.display_image: pygame.Surface | None = None # 缩放裁剪到显示尺寸的图片
+        self.scaled_mask_textures = {} # {蒙版文件名: 缩放到显示尺寸的 Surface} (CleanErase 用)
+        self.blur_levels = {} # {模糊档位: Surface} (初始模糊效果用)
+
+
+class ImagePrefetcher:
+    """
+    在工作线程中预先解码、缩放并准备下一张图片及其互动资源。
+
+    GameManager 在当前图片加载完成后调用 request() 预取下一张图片，
+    切换时用 take() 取回准备好的结果，图片切换不再在主线程上解码和缩放。
+    工作线程只读取 image_configs 和 ImageRenderer 中在运行期不变的数据 (settings、蒙版纹理)，
+    准备结果只在持有锁时交接，主线程拿到之后才会被使用。
+    """
+
+    def __init__(self, settings: Settings, image_renderer: 'ImageRenderer'):
+        """初始化预取器并启动工作线程"""
+        self.settings = settings
+        self.image_renderer = image_renderer
+
+        self._lock = threading.Lock()
+        self._jobs = queue.Queue() # (image_id, config, screen_size)，None 表示退出
+        self._results = {} # {image_id: PrefetchedImage}
+        self._pending = {} # {image_id: (threading.Event, screen_size)}，排队或正在准备中的图片及其准备尺寸，完成后 set
+        self._latest_request_id = None # 最近一次 request() 的图片，只保留它的准备结果
+
+        self._thread = threading.Thread(target=self._worker_loop, name="ImagePrefetcher", daemon=True)
+        self._thread.start()
+
+
+    def request(self, image_id, config: dict, screen_size: tuple[int, int]):
+        """
+        请求在后台准备指定图片。已准备好或正在按相同尺寸准备的图片不会重复准备；
+        屏幕尺寸变化后再次请求时按新尺寸重新排队，旧尺寸的任务被跳过。
+        只保留最近请求的图片，其他已完成的结果会被丢弃以释放内存。
+        """
+        if not config or not config.get("file"):
+             return # 纯文本图片没有需要准备的资源
+
+        with self._lock:
+            self._latest_request_id = image_id
+            for other_id in [other_id for other_id in self._results if other_id != image_id]:
+                 del self._results[other_id]
+
+            result = self._results.get(image_id)
+            if result is not None and result.screen_size == screen_size:
+                 return
+            pending = self._pending.get(image_id)
+            if pending is not None and pending[1] == screen_size:
+                 return
+            # 沿用已有的 Event，等待旧尺寸任务的 take 会在新尺寸任务完成时被唤醒
+            pending_event = pending[0] if pending is not None else threading.Event()
+            self._pending[image_id] = (pending_event, screen_size)
+
+        self._jobs.put((image_id, config, screen_size))
+
+
+    def take(self, image_id, screen_size: tuple[int, int]) -> PrefetchedImage | None:
+        """
+        取回指定图片的准备结果。图片仍在准备中时最多等待 settings.PREFETCH_TAKE_TIMEOUT 秒 (通常仍比在主线程上重新加载快)。
+
+        Returns:
+            PrefetchedImage | None: 准备好的资源；没有请求过、准备失败、等待超时或尺寸不一致时返回 None，调用方应回退到同步加载。
+        """
+        with self._lock:
+            pending = self._pending.get(image_id)
+        if pending is not None and not pending[0].wait(self.settings.PREFETCH_TAKE_TIMEOUT):
+             print(f"警告：等待后台预取图片 {image_id} 超过 {self.settings.PREFETCH_TAKE_TIMEOUT} 秒，改为同步加载")
+             return None
+
+        with self._lock:
+            result = self._results.pop(image_id, None)
+        if result is not None and result.screen_size != screen_size:
+             print(f"图片预取: {image_id} 的准备尺寸 {result.screen_size} 与当前屏幕尺寸 {screen_size} 不一致，改为同步加载")
+             return None
+        return result
+
+
+    def shutdown(self):
+        """停止工作线程 (退出游戏时调用)"""
+        self._jobs.put(None)
+        self._thread.join(timeout=1.0)
+
+
+    def _worker_loop(self):
+        """工作线程主循环"""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                 return
+            image_id, config, screen_size = job
+            with self._lock:
+                 if not self._is_current_job(image_id, screen_size):
+                      continue # 同一图片已按新的屏幕尺寸重新排队
+
+            result = None
+            try:
+                 result = self._prepare(image_id, config, screen_size)
+            except Exception as e:
+                 # 任何异常都不能结束工作线程，否则之后的 take 等不到完成通知
+                 print(f"警告：后台预取图片 {image_id} 失败，将在切换时同步加载: {e}")
+            finally:
+                 pending_event = None
+                 with self._lock:
+                      if self._is_current_job(image_id, screen_size):
+                           # 准备期间已经请求了其他图片时丢弃结果，不保留过期图片占用内存
+                           if result is not None and image_id == self._latest_request_id:
+                                self._results[image_id] = result
+                           pending_event = self._pending.pop(image_id)[0]
+                 if pending_event is not None:
+                      pending_event.set()
+
+
+    def _is_current_job(self, image_id, screen_size: tuple[int, int]) -> bool:
+        """任务是否仍是该图片最新的准备请求 (调用时需持有锁)"""
+        pending = self._pending.get(image_id)
+        return pending is not None and pending[1] == screen_size
+
+
+    def _prepare(self, image_id, config: dict, screen_size: tuple[int, int]) -> PrefetchedImage:
+        """在工作线程中完成与 ImageRenderer.load_image 相同的解码和缩放裁剪，并预先准备互动模块需要的资源"""
+        renderer = self.image_renderer
+        result = PrefetchedImage(image_id, screen_size)
+
+        image_path = os.path.join(self.settings.IMAGE_DIR, config["file"])
+        result.original_image = pygame.image.load(image_path).convert_alpha()
+        result.display_image = renderer._scale_and_crop_image(result.original_image, screen_size)
+        display_size = result.display_image.get_size()
+
+        # CleanErase (以及以擦除开始的混合玩法) 首帧需要缩放到显示尺寸的蒙版纹理
+        mask_file_name = config.get("mask_texture")
+        if mask_file_name:
+             mask_texture = renderer.mask_textures.get(mask_file_name)
+             if mask_texture is not None:
+                  result.scaled_mask_textures[mask_file_name] = pygame.transform.scale(mask_texture, display_size)
+
+        # 初始模糊效果的第一个档位 (显影开始时的完全模糊状态)
+        initial_effect = config.get("initial_effect") or {}
+        if initial_effect.get("type") in ("blur", "blur_reveal"):
+             strength = initial_effect.get("strength", self.settings.BLUR_MAX_STRENGTH)
+             level = renderer._quantize_blur_strength(strength)
+             if level > 0:
+                  level_strength = level / self.settings.BLUR_STRENGTH_LEVELS * self.settings.BLUR_MAX_STRENGTH
+                  result.blur_levels[level] = renderer._apply_blur_effect_to_surface(result.display_image, level_strength)
+
+        print(f"图片预取完成: {image_id}, 显示尺寸: {display_size}")
+        return result
@@ -5,13 +5,12 @@ import os
 from settings import Settings
 # 修正导入路径，ImageRenderer 在根目录
 from image_renderer import ImageRenderer
+from .erase_brush import EraseBrush, EraseProgressCounter, UnerasableMask # 预计算印章的擦除笔刷、增量擦除进度计数和不可擦区域位图
 # 导入 AudioManager 类型提示
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from audio_manager import AudioManager # AudioManager 在根目录
 
-# TODO: 可以考虑一个更高效的 Render Texture 模拟或擦除实现，这里使用基础像素操作作为示例
-
 
 class CleanErase:
     """
@@ -39,14 +38,22 @@ class CleanErase:
         # 从config中加载蒙版和不可擦除区域信息
         self.mask_texture_filename = config.get("mask_texture", "default_mask.png") # 只存文件名，加载在_ensure_mask_surface
         self.unerasable_areas_config = config.get("unerasable_areas", []) # 不可擦除区域配置 (原始图片坐标 [x, y, w, h] 或形状+坐标)
+        # 不可擦除区域栅格化后的位图 (蒙版局部坐标)，随 mask_alpha_surface 一起创建/重建
+        self._unerasable_mask: UnerasableMask | None = None
 
         # 用于模拟 Render Texture 的 Surface
         # 这是一个与图片实际显示区域一样大的 Surface，用来控制蒙版的alpha
         self.mask_alpha_surface = None
         # 擦拭笔刷的视觉效果和大小
         self.erase_brush_size = config.get("brush_size", 40) # 从config获取笔刷大小
-        # TODO: 加载笔刷纹理 (如果需要)
-        # self.brush_texture = self.image_renderer.get_effect_texture("erase_brush.png") # 示例
+        # 预计算圆形印章的笔刷，软边比例可在 config 中用 brush_softness 覆盖
+        self.erase_brush = EraseBrush(
+            self.erase_brush_size,
+            self.settings.ERASE_BRUSH_STRENGTH,
+            config.get("brush_softness", self.settings.ERASE_BRUSH_SOFTNESS),
+            self.settings.ERASE_BRUSH_SPACING
+        )
+        self._last_brush_pos = None # 上一次盖章的位置 (蒙版局部坐标)，用于沿鼠标轨迹插值盖章
 
 
         self._is_erasing = False # 标记是否正在擦拭
@@ -54,6 +61,8 @@ class CleanErase:
 
         # 擦除进度
         self.erase_progress = 0.0
+        # 已擦除像素的增量计数器，随 mask_alpha_surface 一起创建/重建
+        self._progress_counter: EraseProgressCounter | None = None
         self.erase_threshold = config.get("erase_threshold", 0.95) # 完成阈值 (擦除比例)
 
         # 跟踪已触发的叙事事件
@@ -76,10 +85,9 @@ class CleanErase:
             self.mask_alpha_surface = pygame.Surface(image_display_rect.size, pygame.SRCALPHA)
 
             # 绘制初始蒙版纹理到 mask_alpha_surface 上 (如果存在)
-            mask_base_texture = self.image_renderer.mask_textures.get(self.mask_texture_filename)
-            if mask_base_texture:
-                 # 缩放蒙版纹理以适应图片显示区域尺寸
-                 scaled_mask_base = pygame.transform.scale(mask_base_texture, image_display_rect.size)
+            # 缩放到图片显示区域尺寸的蒙版纹理 (ImageRenderer 缓存，切换图片前可能已由后台预取准备好)
+            scaled_mask_base = self.image_renderer.get_scaled_mask_texture(self.mask_texture_filename, image_display_rect.size)
+            if scaled_mask_base is not None:
                  # 使用 BLEND_RGBA_MULT 将蒙版纹理的alpha通道应用到 mask_alpha_surface
                  # 假设蒙版纹理的alpha通道表示蒙版的透明度
                  self.mask_alpha_surface.blit(scaled_mask_base, (0,0), special_flags=pygame.BLEND_RGBA_MULT)
@@ -92,64 +100,30 @@ class CleanErase:
             # 根据不可擦除区域配置，在 mask_alpha_surface 上标记这些区域为不透明
             self._init_unerasable_areas_on_mask(image_display_rect)
 
+            # 蒙版内容确定后全量统计一次已擦除像素，之后只在笔刷盖章区域内增量更新
+            self._progress_counter = EraseProgressCounter(
+                image_display_rect.size,
+                self.settings.ERASE_ALPHA_THRESHOLD,
+                self.settings.ERASE_PROGRESS_TILE_SIZE
+            )
+            self._progress_counter.recount(self.mask_alpha_surface)
+
 
     def _init_unerasable_areas_on_mask(self, image_display_rect: pygame.Rect):
         """
-        在 mask_alpha_surface 上标记不可擦除区域为不透明。
+        将所有不可擦除区域栅格化为显示分辨率的位图，并在 mask_alpha_surface 上标记这些区域为不透明。
         image_display_rect: 当前图片在屏幕上的显示区域。
         """
         if not self.mask_alpha_surface: return
 
-        # 遍历不可擦除区域配置
-        for area_config in self.unerasable_areas_config:
-            area_type = area_config.get("type")
-            if area_type == "rect":
-                 original_x = area_config.get("x", 0)
-                 original_y = area_config.get("y", 0)
-                 original_width = area_config.get("width", 0)
-                 original_height = area_config.get("height", 0)
-
-                 # 将原始图片上的矩形转换为 mask_alpha_surface 上的矩形
-                 # 需要 ImageRenderer 的坐标和尺寸转换方法
-                 # 示例：使用 ImageRenderer 转换原始图片的左上角和尺寸到屏幕坐标
-                 screen_topleft = self.image_renderer.get_screen_coords_from_original(original_x, original_y)
-                 screen_size = self.image_renderer.get_screen_size_from_original(original_width, original_height)
-                 # 将屏幕坐标矩形转换为相对于 mask_alpha_surface 左上角的矩形
-                 mask_rect = pygame.Rect(
-                     screen_topleft[0] - image_display_rect.left,
-                     screen_topleft[1] - image_display_rect.top,
-                     screen_size[0],
-                     screen_size[1]
-                 ).clamp(self.mask_alpha_surface.get_rect()) # 确保不超出蒙版范围
-
-                 # 在 mask_alpha_surface 的这个区域内绘制一个完全不透明的矩形
-                 # Pygame 的 Surface.fill 不支持 alpha 通道，但可以使用 Surface.set_alpha 或 Surface.fill with alpha
-                 # 或者直接绘制到 mask_alpha_surface 的 subsurfac 并 fill 不透明颜色
-                 sub_mask_surface = self.mask_alpha_surface.subsurface(mask_rect)
-                 sub_mask_surface.fill((255, 255, 255, 255)) # 填充完全不透明白色
-
-            # TODO: 实现其他形状的不可擦区域 (circle, polygon)
-            elif area_type == "circle":
-                 original_center_x = area_config.get("x", 0)
-                 original_center_y = area_config.get("y", 0)
-                 original_radius = area_config.get("radius", 0)
-
-                 # 将原始图片上的中心坐标和半径转换为 mask_alpha_surface 上的坐标和半径
-                 screen_center = self.image_renderer.get_screen_coords_from_original(original_center_x, original_center_y)
-                 # 半径转换比较复杂，需要考虑缩放的各向异性，如果缩放不是均匀的。
-                 # 简化：假设半径是根据宽度或高度均匀缩放的
-                 screen_radius = int(original_radius * (image_display_rect.width / self.image_renderer.original_image_size[0])) # 示例按宽度缩放比例
-                 # 将屏幕坐标中心转换为相对于 mask_alpha_surface 左上角的中心
-                 mask_center = (
-                     screen_center[0] - image_display_rect.left,
-                     screen_center[1] - image_display_rect.top
-                 )
-
-                 # 在 mask_alpha_surface 的这个区域内绘制一个完全不透明的圆
-                 pygame.draw.circle(self.mask_alpha_surface, (255, 255, 255, 255), mask_center, screen_radius)
-
-
-            # TODO: 实现 polygon 等形状
+        # 蒙版每一列/每一行对应的原始图片坐标 (缩放裁剪是按轴独立的，逐列/逐行各转换一次即可)
+        # 区域在原始图片坐标系下判定，与逐点调用 get_image_coords 的碰撞检测结果一致
+        width, height = image_display_rect.size
+        original_xs = [self.image_renderer.get_image_coords(image_display_rect.left + x, image_display_rect.top)[0] for x in range(width)]
+        original_ys = [self.image_renderer.get_image_coords(image_display_rect.left, image_display_rect.top + y)[1] for y in range(height)]
+
+        self._unerasable_mask = UnerasableMask(image_display_rect.size, original_xs, original_ys, self.unerasable_areas_config)
+        self._unerasable_mask.paint_opaque(self.mask_alpha_surface)
 
     # 不再需要 _update_unerasable_area_display_rects 方法，碰撞检测和绘制直接使用转换后的坐标或在绘制时转换
 
@@ -168,10 +142,15 @@ class CleanErase:
             if image_display_rect.collidepoint(mouse_pos):
                 self._is_erasing = True
                 self._just_hit_unerasable_this_frame = False # 重置标记
+                self._last_brush_pos = None # 新的一笔，从第一次移动的位置开始盖章
                 # 触发开始擦拭叙事 (只触发一次) - 在 update 中检查并返回
 
         elif event.type == pygame.MOUSEBUTTONUP and event.button == 1: # 左键抬起
             self._is_erasing = False
+            self._last_brush_pos = None # 一笔结束
+            # 调试：每一笔结束后用全量统计校验增量计数
+            if self.settings.ERASE_PROGRESS_VALIDATE and self._progress_counter:
+                 self._progress_counter.validate(self.mask_alpha_surface)
             # 停止擦拭循环音效 sfx_erase_looping (如果正在播放)
             if self.audio_manager and self.audio_manager.is_sfx_playing("sfx_erase_looping"):
                  self.audio_manager.stop_sfx("sfx_erase_looping")
@@ -183,62 +162,16 @@ class CleanErase:
                 relative_pos = (mouse_pos[0] - image_display_rect.left, mouse_pos[1] - image_display_rect.top)
 
                 # 检查是否在不可擦除区域
-                is_in_unerasable = False
-                # 将鼠标的屏幕坐标转换为原始图片坐标进行不可擦区域碰撞检测
-                original_image_mouse_pos = self.image_renderer.get_image_coords(mouse_pos[0], mouse_pos[1])
-
-                for area_config in self.unerasable_areas_config:
-                     area_type = area_config.get("type")
-                     if area_type == "rect":
-                          original_x = area_config.get("x", 0)
-                          original_y = area_config.get("y", 0)
-                          original_width = area_config.get("width", 0)
-                          original_height = area_config.get("height", 0)
-                          original_rect = pygame.Rect(original_x, original_y, original_width, original_height)
-                          if original_rect.collidepoint(original_image_mouse_pos):
-                               is_in_unerasable = True
-                               self._just_hit_unerasable_this_frame = True # 标记本帧擦中了不可擦区域
-                               break
-                     elif area_type == "circle":
-                          original_center_x = area_config.get("x", 0)
-                          original_center_y = area_config.get("y", 0)
-                          original_radius = area_config.get("radius", 0)
-                          if (original_image_mouse_pos[0] - original_center_x)**2 + (original_image_mouse_pos[1] - original_center_y)**2 <= original_radius**2:
-                               is_in_unerasable = True
-                               self._just_hit_unerasable_this_frame = True
-                               break
-                     # TODO: 实现其他形状的碰撞检测
-
-                if not is_in_unerasable:
-                    # 在 mask_alpha_surface 上绘制透明笔刷 (降低 alpha)
-                    # 笔刷中心位置是 relative_pos (相对于图片显示区域左上角)
-                    brush_rect_on_mask = pygame.Rect(0, 0, self.erase_brush_size, self.erase_brush_size)
-                    brush_rect_on_mask.center = relative_pos
-
-                    # 将笔刷绘制到 mask_alpha_surface 上，模拟擦除效果 (降低 alpha)
-                    # 这是一个复杂且性能敏感的实现，取决于 Pygame 版本和方法选择
-                    # 使用 BLEND_RGBA_MULT 和一个黑色的笔刷纹理可以模拟擦除 (如果蒙版是白色alpha=255)
-                    # 加载一个简单的黑色圆形笔刷纹理
-                    # brush_surface = self.image_renderer.get_effect_texture("erase_brush.png") # 示例笔刷纹理
-                    # if brush_surface:
-                    #     scaled_brush = pygame.transform.scale(brush_surface, (self.erase_brush_size, self.erase_brush_size))
-                    #     # 绘制时使用 BLEND_RGBA_MULT 模式
-                    #     # target_rect = brush_rect_on_mask.clamp(self.mask_alpha_surface.get_rect()) # 限制绘制区域在蒙版范围内
-                    #     self.mask_alpha_surface.blit(scaled_brush, brush_rect_on_mask.topleft, special_flags=pygame.BLEND_RGBA_MULT)
-                    # else:
-                    # 简单模拟：直接在圆形区域内降低 alpha 值
-                    target_alpha_reduction = 30 # 每次移动降低的 alpha 值 # TODO: 可移动到settings
-                    mask_width, mask_height = self.mask_alpha_surface.get_size()
-                    # 遍历笔刷区域内的像素
-                    for px in range(max(0, brush_rect_on_mask.left), min(mask_width, brush_rect_on_mask.right)):
-                        for py in range(max(0, brush_rect_on_mask.top), min(mask_height, brush_rect_on_mask.bottom)):
-                            # 检查像素是否在圆内 (基于笔刷中心和半径)
-                            if (px - brush_rect_on_mask.centerx)**2 + (py - brush_rect_on_mask.centery)**2 <= (self.erase_brush_size//2)**2:
-                                current_color = self.mask_alpha_surface.get_at((px, py))
-                                # 不擦除完全不透明的像素 (不可擦区域)
-                                if current_color[3] < 255:
-                                     new_alpha = max(0, current_color[3] - target_alpha_reduction)
-                                     self.mask_alpha_surface.set_at((px, py), (current_color[0], current_color[1], current_color[2], new_alpha))
+                if not self._is_unerasable_at(relative_pos):
+                    # 从上一次盖章的位置到当前位置沿线段插值盖章，快速划动时也不会留下空隙
+                    # 插值位置落在不可擦除区域内的印章跳过 (与鼠标直接位于不可擦区域时的处理一致)
+                    stamp_centers = [
+                        center for center in self.erase_brush.segment_positions(self._last_brush_pos, relative_pos)
+                        if not self._is_unerasable_at(center)
+                    ]
+                    # 降低蒙版 alpha，不可擦区域位图内的像素不会被擦除
+                    self.erase_brush.apply(self.mask_alpha_surface, stamp_centers, self._unerasable_mask, self._progress_counter)
+                    self._last_brush_pos = relative_pos
 
 
                     # 触发擦拭音效和视觉反馈
@@ -249,6 +182,8 @@ class CleanErase:
 
 
                 else: # 在不可擦除区域
+                     self._just_hit_unerasable_this_frame = True # 标记本帧擦中了不可擦区域
+                     self._last_brush_pos = None # 轨迹在不可擦区域处中断，离开后重新开始插值
                      # 触发不可擦音效
                      if self.audio_manager:
                           # 检查是否已经播放了不可擦音效，避免重复触发
@@ -257,6 +192,16 @@ class CleanErase:
 
                      # TODO: 改变笔刷视觉等，提示不可擦拭
 
+            else:
+                # 鼠标离开图片区域 (或未在擦拭)，轨迹中断
+                self._last_brush_pos = None
+
+
+    def _is_unerasable_at(self, mask_pos: tuple[int, int]) -> bool:
+        """检查蒙版局部坐标 (相对于图片显示区域左上角) 处是否位于不可擦除区域 (查询预先栅格化的位图)。"""
+        if not self._unerasable_mask: return False
+        return self._unerasable_mask.is_unerasable(mask_pos[0], mask_pos[1])
+
 
     def update(self, image_display_rect: pygame.Rect) -> tuple[bool, dict]:
         """
@@ -270,9 +215,7 @@ class CleanErase:
             return True, {}
 
 
-        # 计算擦除进度
-        # 遍历 mask_alpha_surface 的像素，计算 alpha 值小于某个阈值的像素比例
-        # 这是一个性能敏感的操作，可以考虑降低计算频率，或者使用近似方法
+        # 计算擦除进度 (读取增量计数器，O(1))
         self.erase_progress = self._calculate_erase_progress()
 
 
@@ -336,34 +279,16 @@ class CleanErase:
 
     def _calculate_erase_progress(self):
         """
-        计算 mask_alpha_surface 中 alpha 值小于某个阈值的像素比例。
-        这是一个性能敏感的操作。
+        返回 mask_alpha_surface 中 alpha 值小于阈值 (settings.ERASE_ALPHA_THRESHOLD) 的像素比例。
+        已擦除像素数由笔刷在盖章区域内增量维护，这里不再遍历蒙版。
         """
-        if not self.mask_alpha_surface: return 0.0
-        total_pixels = self.mask_alpha_surface.get_width() * self.mask_alpha_surface.get_height()
-        if total_pixels == 0: return 0.0
-
-        erased_pixels = 0
-        alpha_threshold = 50 # 低于此alpha值视为已擦除
-
-        # 使用 tostring 获取像素数据，比 set_at 遍历快，但仍然是 CPU 密集型
-        # 格式必须匹配创建 Surface 时的格式，这里是 RGBA
-        try:
-            # 获取像素数据的 bytes 对象
-            pixel_bytes = pygame.image.tostring(self.mask_alpha_surface, "RGBA")
-
-            # 遍历像素，检查 alpha 通道
-            # 每个像素 4 个字节 (R, G, B, A)，alpha 在第 4 个字节 (索引 3)
-            for i in range(3, len(pixel_bytes), 4):
-                 if pixel_bytes[i] < alpha_threshold:
-                      erased_pixels += 1
-
-            # 返回擦除比例
-            return erased_pixels / total_pixels
-
-        except pygame.error as e:
-             print(f"警告：计算擦除进度时出错: {e}")
-             return 0.0 # 发生错误返回0
+        if not self.mask_alpha_surface or not self._progress_counter: return 0.0
+        return self._progress_counter.progress
+
+    def get_tile_erase_progress(self, tile_x: int, tile_y: int) -> float:
+        """返回蒙版上指定分块 (边长 settings.ERASE_PROGRESS_TILE_SIZE) 的擦除比例，用于局部进度提示等。"""
+        if not self._progress_counter: return 0.0
+        return self._progress_counter.get_tile_progress(tile_x, tile_y)
 
     # _init_unerasable_areas_on_mask 已实现
 
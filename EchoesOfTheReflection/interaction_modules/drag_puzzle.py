@@ -6,6 +6,7 @@ from settings import Settings
 from image_renderer import ImageRenderer # 导入用于坐标转换
 # 修正导入路径，puzzle_piece 在 interaction_modules 子目录
 from .puzzle_piece import PuzzlePiece # 导入类名
+from .piece_pick_index import PiecePickIndex # 未锁定碎片的网格分桶拾取索引
 import random # 用于打乱碎片
 # 导入 AudioManager 类型提示
 from typing import TYPE_CHECKING
@@ -49,6 +50,12 @@ class DragPuzzle:
 
         # 拼图碎片列表 (PuzzlePiece 对象列表)
         self.pieces: list[PuzzlePiece] = []
+        # 未锁定碎片的拾取索引和绘制顺序，锁定的碎片移出索引并烘焙到 _locked_layer
+        self._pick_index = PiecePickIndex(self.settings.PUZZLE_PICK_CELL_SIZE)
+        # 所有已锁定碎片合成的一张图层 (图片显示区域尺寸)，每帧只 blit 一次
+        self._locked_layer: pygame.Surface | None = None
+        self._locked_layer_rect: pygame.Rect | None = None # 图层对应的图片显示区域，变化时重建
+        self._locked_layer_bounds: pygame.Rect | None = None # 图层上已绘制内容的包围矩形 (图层局部坐标)，绘制时只 blit 这一部分
         # 在 __init__ 中不立即创建碎片 Surface，只存储配置，在 update 中第一次运行时根据 display_rect 创建
 
         self._dragging_piece: PuzzlePiece | None = None # 当前正在拖拽的碎片 (PuzzlePiece 对象)
@@ -195,6 +202,37 @@ class DragPuzzle:
 
 
         self._pieces_initialized = True # 标记碎片 Surface 已创建并初始化位置
+        self._rebuild_piece_index(image_display_rect)
+
+
+    def _rebuild_piece_index(self, image_display_rect: pygame.Rect):
+        """按 self.pieces 的顺序重建未锁定碎片的拾取索引，并重新烘焙已锁定碎片图层"""
+        self._pick_index.clear()
+        for piece in self.pieces:
+            if not piece.is_locked():
+                self._pick_index.add(piece)
+        self._rebuild_locked_layer(image_display_rect)
+
+    def _rebuild_locked_layer(self, image_display_rect: pygame.Rect):
+        """创建与图片显示区域同尺寸的锁定碎片图层，并绘制所有已锁定的碎片"""
+        self._locked_layer_rect = image_display_rect.copy()
+        self._locked_layer_bounds = None
+        if image_display_rect.width <= 0 or image_display_rect.height <= 0:
+            self._locked_layer = None
+            return
+        self._locked_layer = pygame.Surface(image_display_rect.size, pygame.SRCALPHA)
+        # 图层大部分是透明像素且很少修改，RLE 编码后每帧 blit 会跳过透明区域；代价是每次烘焙新碎片时重新编码
+        self._locked_layer.set_alpha(255, pygame.RLEACCEL)
+        for piece in self.pieces:
+            if piece.is_locked():
+                self._bake_locked_piece(piece)
+
+    def _bake_locked_piece(self, piece: PuzzlePiece):
+        """将锁定的碎片绘制到锁定碎片图层上 (坐标相对于图片显示区域左上角)"""
+        if self._locked_layer is None:
+            return
+        dirty_rect = self._locked_layer.blit(piece.surface, (piece.rect.left - self._locked_layer_rect.left, piece.rect.top - self._locked_layer_rect.top))
+        self._locked_layer_bounds = dirty_rect if self._locked_layer_bounds is None else self._locked_layer_bounds.union(dirty_rect)
 
 
     def resize(self, new_width, new_height, image_display_rect: pygame.Rect):
@@ -236,6 +274,9 @@ class DragPuzzle:
                        # new_screen_y = image_display_rect.top + int(state["relative_pos"][1] * image_display_rect.height)
                        # piece.set_position((new_screen_x, new_screen_y))
 
+             # 锁定状态恢复后重建拾取索引和锁定碎片图层
+             self._rebuild_piece_index(image_display_rect)
+
              # 恢复其他状态
              # self._triggered_narrative_events = ... # 需要在 load_state 中加载
              # self._has_dragged_first_time = ... # 需要在 load_state 中加载
@@ -307,6 +348,7 @@ class DragPuzzle:
         random.shuffle(self.pieces)
 
         self._pieces_initialized = True # 标记碎片 Surface 已创建并初始化位置
+        self._rebuild_piece_index(image_display_rect)
         self._is_completed = False # 确保重置完成状态
 
     def enable_dragging(self):
@@ -334,31 +376,26 @@ class DragPuzzle:
             # 检查点击是否在图片的显示区域内 (可选，如果碎片散在外面就不检查)
             # if image_display_rect.collidepoint(mouse_pos): # 示例检查
             # 检查是否点击到任何一个未锁定（可拖拽）的碎片
-            # 从后往前检查，确保点击到绘制在最上面的碎片
-            for piece in reversed(self.pieces):
-                # 只有当碎片可见且未锁定时才检查点击
-                # if not piece.is_locked() and piece.rect.collidepoint(mouse_pos):
-                # 如果实现了碎片可见性控制 (例如通过 HybridInteraction)，还需要检查 piece.is_visible()
-                if not piece.is_locked() and piece.rect.collidepoint(mouse_pos):
-                    self._dragging_piece = piece
-                    # 计算拖拽偏移 (鼠标位置 - 碎片左上角)
-                    self._drag_offset = (mouse_pos[0] - piece.rect.left, mouse_pos[1] - piece.rect.top)
-                    # 将被拖拽的碎片放到列表末尾，使其绘制在最上层
-                    self.pieces.remove(piece)
-                    self.pieces.append(piece)
-
-                    # 触发第一次拖拽叙事 (如果配置了且尚未触发)
-                    if not self._has_dragged_first_time and "on_drag_first_piece" in self.config.get("narrative_triggers", {}):
-                         self._has_dragged_first_time = True
-                         # 返回触发的事件，让 GameManager 启动叙事
-                         pass # 在 update 中统一返回叙事事件
-
-                    # TODO: 播放拾起音效 sfx_puzzle_pickup
-                    if self.audio_manager:
-                         # self.audio_manager.play_sfx("sfx_puzzle_pickup") # 示例音效ID
-                         pass # 待填充实际音效ID
-
-                    break # 只处理一个碎片
+            # 拾取索引只包含未锁定的碎片，返回鼠标所在网格中绘制在最上面的碎片
+            # 如果实现了碎片可见性控制 (例如通过 HybridInteraction)，还需要检查 piece.is_visible()
+            piece = self._pick_index.pick(mouse_pos)
+            if piece is not None:
+                self._dragging_piece = piece
+                # 计算拖拽偏移 (鼠标位置 - 碎片左上角)
+                self._drag_offset = (mouse_pos[0] - piece.rect.left, mouse_pos[1] - piece.rect.top)
+                # 将被拖拽的碎片提到最上层绘制
+                self._pick_index.raise_to_top(piece)
+
+                # 触发第一次拖拽叙事 (如果配置了且尚未触发)
+                if not self._has_dragged_first_time and "on_drag_first_piece" in self.config.get("narrative_triggers", {}):
+                     self._has_dragged_first_time = True
+                     # 返回触发的事件，让 GameManager 启动叙事
+                     pass # 在 update 中统一返回叙事事件
+
+                # TODO: 播放拾起音效 sfx_puzzle_pickup
+                if self.audio_manager:
+                     # self.audio_manager.play_sfx("sfx_puzzle_pickup") # 示例音效ID
+                     pass # 待填充实际音效ID
 
 
         elif event.type == pygame.MOUSEBUTTONUP and event.button == 1: # 左键抬起
@@ -377,6 +414,12 @@ class DragPuzzle:
                     # 吸附到位
                     self._dragging_piece.set_position(correct_screen_pos)
                     self._dragging_piece.set_locked(True) # 锁定碎片
+                    # 锁定的碎片不再参与拾取，烘焙到锁定碎片图层后不再单独绘制
+                    self._pick_index.remove(self._dragging_piece)
+                    if self._locked_layer_rect != image_display_rect:
+                         self._rebuild_locked_layer(image_display_rect)
+                    else:
+                         self._bake_locked_piece(self._dragging_piece)
                     # TODO: 播放吸附音效 sfx_puzzle_snap
                     if self.audio_manager:
                          # self.audio_manager.play_sfx("sfx_puzzle_snap") # 示例音效ID
@@ -423,8 +466,11 @@ class DragPuzzle:
         if self._is_completed:
             return True, {}
 
-        # 检查所有碎片是否都已锁定 (完成拼图)
-        if all(piece.is_locked() for piece in self.pieces):
+        # 检查所有碎片是否都已锁定 (完成拼图)。未锁定的碎片都在拾取索引中，索引非空时不必逐个检查；
+        # 索引为空时以碎片自身的锁定状态为准，索引与碎片不一致 (碎片绕过索引被设置) 时重建索引
+        if len(self._pick_index) == 0 and not all(piece.is_locked() for piece in self.pieces):
+            self._rebuild_piece_index(image_display_rect)
+        if len(self._pick_index) == 0:
             self._is_completed = True
             print(f"Drag Puzzle for {self.config.get('file', 'current image')} Completed!")
             # TODO: 播放拼图完成音效 sfx_puzzle_complete
@@ -453,8 +499,14 @@ class DragPuzzle:
              # 如果碎片还没初始化，可能需要先绘制一个占位背景或提示
              return # 不绘制碎片
 
-        # 绘制每个碎片
-        for piece in self.pieces:
+        # 已锁定的碎片合成在一张图层上，图片显示区域变化时重建
+        if self._locked_layer_rect != image_display_rect:
+            self._rebuild_locked_layer(image_display_rect)
+        if self._locked_layer is not None and self._locked_layer_bounds is not None:
+            screen.blit(self._locked_layer, self._locked_layer_rect.move(self._locked_layer_bounds.topleft).topleft, self._locked_layer_bounds)
+
+        # 只逐个绘制未锁定的碎片 (包括正在拖拽的碎片，它在最上层)
+        for piece in self._pick_index.pieces_bottom_to_top():
             piece.draw(screen)
 
         # TODO: 绘制吸附目标的视觉提示 (可选)
@@ -558,10 +610,59 @@ class DragPuzzle:
         self.pieces = pieces
         self._pieces_initialized = True # 标记碎片已初始化
         # 碎片的位置和锁定状态需要在 HybridInteraction 中生成时设置
+        # 先登记到拾取索引，之后 set_position 会通知索引更新所在网格；锁定碎片图层在下一次 draw 时按显示区域重建
+        self._pick_index.clear()
+        for piece in self.pieces:
+            if not piece.is_locked():
+                self._pick_index.add(piece)
+        self._locked_layer_rect = None
 
     def enable_dragging(self):
          """启用碎片的拖拽 (如果需要分步启用拖拽)"""
          # 默认碎片就是可拖拽的 (除非 locked)
          # 如果有分步启用拖拽的需求，可以在 PuzzlePiece 中添加 is_draggable 标志，并在绘制/handle_event 中检查
          print("Dragging enabled for puzzle pieces.")
-         pass # 目前不需要特殊处理，碎片默认就是可拖拽的
\ No newline at end of file
+         pass # 目前不需要特殊处理，碎片默认就是可拖拽的
+
+if __name__ == "__main__":
+    # 回归检查：混合玩法 (Stage 5.2) 路径 set_pieces -> set_position -> update / handle_event / draw
+    # 运行: python -m interaction_modules.drag_puzzle (在项目根目录，无窗口环境可设置 SDL_VIDEODRIVER=dummy)
+    from types import SimpleNamespace
+
+    pygame.init()
+    check_screen = pygame.display.set_mode((800, 600))
+    check_settings = Settings()
+    check_settings.game_manager = SimpleNamespace(audio_manager=None)
+    display_rect = pygame.Rect(100, 100, 400, 400)
+    puzzle = DragPuzzle({"puzzle_config": {}}, SimpleNamespace(settings=check_settings))
+
+    # 与 HybridInteraction 相同的顺序：先交给 DragPuzzle，再设置散开位置
+    hybrid_pieces = []
+    for piece_row in range(2):
+        for piece_col in range(2):
+            piece_surface = pygame.Surface((200, 200), pygame.SRCALPHA)
+            piece_surface.fill((200, 100, 50, 255))
+            hybrid_pieces.append(PuzzlePiece(f"piece_{piece_row}_{piece_col}", piece_surface, (piece_col * 200, piece_row * 200)))
+    puzzle.set_pieces(hybrid_pieces)
+    for piece_number, piece in enumerate(hybrid_pieces):
+        piece.set_position((20 + piece_number * 190, 380))
+        piece.set_locked(False)
+
+    assert puzzle.update(display_rect) == (False, {}), "未锁定碎片时不应报告完成"
+    first_piece = hybrid_pieces[0]
+    assert puzzle._pick_index.pick(first_piece.rect.center) is first_piece, "set_pieces 之后碎片应可拾取"
+    puzzle.draw(check_screen, display_rect)
+    assert check_screen.get_at(first_piece.rect.center)[:3] == (200, 100, 50), "未锁定碎片应被绘制"
+
+    # 逐个拖到正确位置吸附锁定，全部锁定后才报告完成
+    for piece in hybrid_pieces:
+        assert puzzle.update(display_rect)[0] is False
+        target_pos = (display_rect.left + piece.correct_pos_local[0] + 5, display_rect.top + piece.correct_pos_local[1] + 5)
+        grab_pos = (piece.rect.left + 5, piece.rect.top + 5)
+        puzzle.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=grab_pos), display_rect)
+        puzzle.handle_event(pygame.event.Event(pygame.MOUSEMOTION, pos=target_pos, rel=(0, 0), buttons=(1, 0, 0)), display_rect)
+        puzzle.handle_event(pygame.event.Event(pygame.MOUSEBUTTONUP, button=1, pos=target_pos), display_rect)
+        assert piece.is_locked(), f"{piece.id} 应吸附锁定"
+    assert puzzle.update(display_rect)[0] is True, "全部锁定后应报告完成"
+    print("DragPuzzle set_pieces 回归检查通过。")
+    pygame.quit()
@@ -0,0 +1,353 @@
+# interaction_modules/erase_brush.py
+import bisect
+import math
+import pygame
+
+try:
+    import numpy
+    NUMPY_AVAILABLE = True
+except ImportError:
+    print("警告: NumPy 未安装，擦除笔刷将使用逐像素回退实现 (较慢)。建议安装: pip install numpy")
+    NUMPY_AVAILABLE = False
+
+
+class EraseBrush:
+    """
+    Clean Erase 使用的擦除笔刷。
+    预先计算一个圆形 (可选软边) 的 alpha 印章，擦除时直接从蒙版 alpha 通道中减去印章值，
+    并沿相邻两次鼠标位置之间的线段插值盖章，避免快速划动时留下空隙。
+    """
+
+    def __init__(self, size: int, strength: int, softness: float = 0.0, spacing: float = 0.25):
+        """
+        初始化笔刷。
+        size: 笔刷直径 (像素)。
+        strength: 每次盖章在笔刷中心降低的 alpha 值。
+        softness: 软边宽度占半径的比例 (0 为硬边，1 为从中心线性衰减到边缘)。
+        spacing: 线段插值时相邻印章的间距，占笔刷直径的比例。
+        """
+        self.size = max(1, int(size))
+        self.radius = self.size // 2
+        self.strength = int(strength)
+        self.softness = min(1.0, max(0.0, float(softness)))
+        self.spacing = max(1.0, self.size * spacing)
+
+        # 印章左上角相对于笔刷中心的偏移 (与 pygame.Rect(0, 0, size, size).center 的取整方式一致)
+        self.offset = (-(self.size // 2), -(self.size // 2))
+        # 印章数据，按 [x][y] 索引 (与 pygame.surfarray 的数组布局一致)
+        self.stamp = self._build_stamp()
+
+    def _build_stamp(self):
+        """计算印章中每个像素的 alpha 降低量，圆外为 0。"""
+        radius_sq = self.radius ** 2
+        soft_width = self.radius * self.softness
+        columns = []
+        for sx in range(self.size):
+            dx = sx + self.offset[0]
+            column = []
+            for sy in range(self.size):
+                dy = sy + self.offset[1]
+                dist_sq = dx * dx + dy * dy
+                if dist_sq > radius_sq:
+                    column.append(0)
+                elif soft_width > 0:
+                    # 软边：从 (半径 - 软边宽度) 处开始线性衰减到边缘
+                    falloff = min(1.0, (self.radius - math.sqrt(dist_sq)) / soft_width)
+                    column.append(int(round(self.strength * falloff)))
+                else:
+                    column.append(self.strength)
+            columns.append(column)
+
+        if NUMPY_AVAILABLE:
+            return numpy.array(columns, dtype=numpy.uint8)
+        return columns
+
+    def segment_positions(self, start: tuple[int, int] | None, end: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        返回从 start 到 end 需要盖章的中心位置 (不含 start，含 end)。
+        start 为 None 时只在 end 盖一次章。
+        """
+        if start is None:
+            return [end]
+        dx = end[0] - start[0]
+        dy = end[1] - start[1]
+        steps = max(1, int(math.hypot(dx, dy) / self.spacing))
+        return [(start[0] + round(dx * i / steps), start[1] + round(dy * i / steps)) for i in range(1, steps + 1)]
+
+    def stamp_rect(self, center: tuple[int, int]) -> pygame.Rect:
+        """印章在蒙版上覆盖的矩形 (未裁剪)。"""
+        return pygame.Rect(center[0] + self.offset[0], center[1] + self.offset[1], self.size, self.size)
+
+    def apply(self, mask_surface: pygame.Surface, centers: list[tuple[int, int]],
+              unerasable_mask: 'UnerasableMask' = None, progress_counter: 'EraseProgressCounter' = None):
+        """
+        在 mask_surface 上依次盖章，降低 alpha 值。
+        mask_surface: 带 per-pixel alpha 的蒙版 Surface。
+        centers: 印章中心位置列表 (蒙版局部坐标)。
+        unerasable_mask: 不可擦除区域的位图，位于其中的像素保持不变。
+        progress_counter: 可选的擦除进度计数器，只在印章区域内统计本次越过擦除阈值的像素。
+        """
+        if not centers:
+            return
+        if NUMPY_AVAILABLE:
+            alpha = pygame.surfarray.pixels_alpha(mask_surface)
+            try:
+                for center in centers:
+                    self._apply_numpy(alpha, center, unerasable_mask, progress_counter)
+            finally:
+                del alpha # 释放数组引用以解锁 Surface
+        else:
+            for center in centers:
+                self._apply_pixels(mask_surface, center, unerasable_mask, progress_counter)
+
+    def _clip(self, center: tuple[int, int], mask_size: tuple[int, int]):
+        """计算印章与蒙版相交的区域，返回 (蒙版切片范围, 印章切片范围)，不相交时返回 None。"""
+        left = center[0] + self.offset[0]
+        top = center[1] + self.offset[1]
+        x0 = max(0, left)
+        y0 = max(0, top)
+        x1 = min(mask_size[0], left + self.size)
+        y1 = min(mask_size[1], top + self.size)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return (x0, y0, x1, y1), (x0 - left, y0 - top, x1 - left, y1 - top)
+
+    def _apply_numpy(self, alpha, center: tuple[int, int], unerasable_mask: 'UnerasableMask' = None,
+                     progress_counter: 'EraseProgressCounter' = None):
+        clipped = self._clip(center, alpha.shape)
+        if clipped is None:
+            return
+        (x0, y0, x1, y1), (sx0, sy0, sx1, sy1) = clipped
+        region = alpha[x0:x1, y0:y1]
+        stamp = self.stamp[sx0:sx1, sy0:sy1]
+        if unerasable_mask is not None and unerasable_mask.has_areas:
+            # 不可擦区域内的印章值置 0，直接屏蔽
+            stamp = numpy.where(unerasable_mask.bitmap[x0:x1, y0:y1], 0, stamp).astype(numpy.uint8)
+        if progress_counter is not None:
+            not_erased_before = region >= progress_counter.alpha_threshold
+        # 饱和减法：alpha - min(alpha, stamp)
+        numpy.subtract(region, numpy.minimum(region, stamp), out=region)
+        if progress_counter is not None:
+            # 本次盖章中从 "未擦除" 变为 "已擦除" 的像素
+            progress_counter.add_crossed(x0, y0, not_erased_before & (region < progress_counter.alpha_threshold))
+
+    def _apply_pixels(self, mask_surface: pygame.Surface, center: tuple[int, int], unerasable_mask: 'UnerasableMask' = None,
+                      progress_counter: 'EraseProgressCounter' = None):
+        """无 NumPy 时的逐像素回退实现。"""
+        clipped = self._clip(center, mask_surface.get_size())
+        if clipped is None:
+            return
+        (x0, y0, x1, y1), (sx0, sy0, _, _) = clipped
+        for px in range(x0, x1):
+            column = self.stamp[px - x0 + sx0]
+            for py in range(y0, y1):
+                reduction = column[py - y0 + sy0]
+                if reduction <= 0 or (unerasable_mask is not None and unerasable_mask.is_unerasable(px, py)):
+                    continue
+                color = mask_surface.get_at((px, py))
+                new_alpha = max(0, color[3] - reduction)
+                mask_surface.set_at((px, py), (color[0], color[1], color[2], new_alpha))
+                if progress_counter is not None and color[3] >= progress_counter.alpha_threshold > new_alpha:
+                    progress_counter.add_pixel(px, py)
+
+
+class UnerasableMask:
+    """
+    不可擦除区域的显示分辨率位图 (蒙版局部坐标)。
+    所有 rect/circle 区域只在蒙版创建或 resize 时栅格化一次，之后的命中检测是一次数组查询，
+    笔刷也直接用它屏蔽印章。
+    有 NumPy 时位图是按 [x][y] 索引的布尔数组，否则使用 pygame.mask.Mask。
+    """
+
+    def __init__(self, size: tuple[int, int], original_xs: list[int], original_ys: list[int], areas_config: list[dict]):
+        """
+        size: 蒙版尺寸 (宽, 高)。
+        original_xs / original_ys: 蒙版上每一列/每一行像素对应的原始图片 x/y 坐标 (单调不减)，
+                                   由 ImageRenderer.get_image_coords 逐列/逐行得到，保证与原始坐标系下的碰撞检测结果一致。
+        areas_config: 图片配置中的 unerasable_areas 列表 (原始图片坐标)。
+        """
+        self.width, self.height = size
+        self.has_areas = False # 至少有一个像素被标记时为 True，没有不可擦区域时笔刷可跳过屏蔽
+        if NUMPY_AVAILABLE:
+            self.bitmap = numpy.zeros(size, dtype=bool)
+            xs = numpy.array(original_xs, dtype=numpy.int64)
+            ys = numpy.array(original_ys, dtype=numpy.int64)
+        else:
+            self.bitmap = pygame.mask.Mask(size)
+
+        for area_config in areas_config:
+            area_type = area_config.get("type")
+            if area_type == "rect":
+                 x = area_config.get("x", 0)
+                 y = area_config.get("y", 0)
+                 # 与 pygame.Rect.collidepoint 一致: x <= px < x + width
+                 x0, x1 = bisect.bisect_left(original_xs, x), bisect.bisect_left(original_xs, x + area_config.get("width", 0))
+                 y0, y1 = bisect.bisect_left(original_ys, y), bisect.bisect_left(original_ys, y + area_config.get("height", 0))
+                 if x0 >= x1 or y0 >= y1:
+                      continue
+                 if NUMPY_AVAILABLE:
+                      self.bitmap[x0:x1, y0:y1] = True
+                 else:
+                      filled = pygame.mask.Mask((x1 - x0, y1 - y0), fill=True)
+                      self.bitmap.draw(filled, (x0, y0))
+                 self.has_areas = True
+
+            elif area_type == "circle":
+                 center_x = area_config.get("x", 0)
+                 center_y = area_config.get("y", 0)
+                 radius = area_config.get("radius", 0)
+                 # 先按外接矩形缩小范围，再在范围内按原始坐标计算圆方程
+                 x0, x1 = bisect.bisect_left(original_xs, center_x - radius), bisect.bisect_right(original_xs, center_x + radius)
+                 y0, y1 = bisect.bisect_left(original_ys, center_y - radius), bisect.bisect_right(original_ys, center_y + radius)
+                 if x0 >= x1 or y0 >= y1:
+                      continue
+                 if NUMPY_AVAILABLE:
+                      inside = ((xs[x0:x1] - center_x) ** 2)[:, None] + ((ys[y0:y1] - center_y) ** 2)[None, :] <= radius ** 2
+                      self.bitmap[x0:x1, y0:y1] |= inside
+                      self.has_areas = self.has_areas or bool(inside.any())
+                 else:
+                      for px in range(x0, x1):
+                           dx_sq = (original_xs[px] - center_x) ** 2
+                           for py in range(y0, y1):
+                                if dx_sq + (original_ys[py] - center_y) ** 2 <= radius ** 2:
+                                     self.bitmap.set_at((px, py), 1)
+                                     self.has_areas = True
+            # TODO: 实现 polygon 等形状
+
+    def is_unerasable(self, x: int, y: int) -> bool:
+        """检查蒙版局部坐标处是否位于不可擦除区域，超出蒙版范围返回 False。"""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+        if NUMPY_AVAILABLE:
+            return bool(self.bitmap[x, y])
+        return bool(self.bitmap.get_at((x, y)))
+
+    def paint_opaque(self, mask_surface: pygame.Surface):
+        """将不可擦除区域在蒙版上绘制为完全不透明的白色。"""
+        if not self.has_areas:
+            return
+        if NUMPY_AVAILABLE:
+            rgb = pygame.surfarray.pixels3d(mask_surface)
+            rgb[self.bitmap] = 255
+            del rgb
+            alpha = pygame.surfarray.pixels_alpha(mask_surface)
+            alpha[self.bitmap] = 255
+            del alpha
+        else:
+            mask_surface.blit(self.bitmap.to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 0)), (0, 0))
+
+
+class EraseProgressCounter:
+    """
+    擦除进度计数器。
+    维护 alpha 低于阈值 (视为已擦除) 的像素数量，只在笔刷盖章区域内按 "越过阈值" 的像素增量更新，
+    每帧查询进度是 O(1) 的。可选维护粗粒度的分块进度网格。
+    全量重新统计只在蒙版重建时和调试校验时使用。
+    """
+
+    def __init__(self, size: tuple[int, int], alpha_threshold: int, tile_size: int = 0):
+        """
+        size: 蒙版尺寸 (宽, 高)。
+        alpha_threshold: 低于此 alpha 值的像素视为已擦除。
+        tile_size: 分块进度网格的块边长 (像素)，0 表示不维护分块网格。
+        """
+        self.width, self.height = size
+        self.total_pixels = self.width * self.height
+        self.alpha_threshold = alpha_threshold
+        self.erased_pixels = 0
+
+        self.tile_size = max(0, int(tile_size))
+        self.tile_counts = None # [tile_x][tile_y] 每块中已擦除的像素数量
+        if self.tile_size > 0:
+            self.tiles_x = math.ceil(self.width / self.tile_size)
+            self.tiles_y = math.ceil(self.height / self.tile_size)
+            self.tile_counts = [[0] * self.tiles_y for _ in range(self.tiles_x)]
+
+    @property
+    def progress(self) -> float:
+        """已擦除像素的比例 (0.0 - 1.0)。"""
+        if self.total_pixels == 0:
+            return 0.0
+        return self.erased_pixels / self.total_pixels
+
+    def add_crossed(self, x0: int, y0: int, crossed):
+        """
+        累加一个盖章区域内越过阈值的像素 (NumPy 路径)。
+        x0, y0: 区域左上角在蒙版上的位置。
+        crossed: 按 [x][y] 索引的布尔数组，True 表示该像素本次从未擦除变为已擦除。
+        """
+        count = int(numpy.count_nonzero(crossed))
+        if count == 0:
+            return
+        self.erased_pixels += count
+        if self.tile_counts is None:
+            return
+        # 笔刷区域只覆盖少量分块，逐块切片统计
+        width, height = crossed.shape
+        tile = self.tile_size
+        for tile_x in range(x0 // tile, (x0 + width - 1) // tile + 1):
+            cx0 = max(0, tile_x * tile - x0)
+            cx1 = min(width, (tile_x + 1) * tile - x0)
+            for tile_y in range(y0 // tile, (y0 + height - 1) // tile + 1):
+                cy0 = max(0, tile_y * tile - y0)
+                cy1 = min(height, (tile_y + 1) * tile - y0)
+                self.tile_counts[tile_x][tile_y] += int(numpy.count_nonzero(crossed[cx0:cx1, cy0:cy1]))
+
+    def add_pixel(self, px: int, py: int):
+        """累加单个越过阈值的像素 (逐像素回退路径)。"""
+        self.erased_pixels += 1
+        if self.tile_counts is not None:
+            self.tile_counts[px // self.tile_size][py // self.tile_size] += 1
+
+    def get_tile_progress(self, tile_x: int, tile_y: int) -> float:
+        """返回指定分块的擦除比例。未启用分块网格时返回整体进度。"""
+        if self.tile_counts is None:
+            return self.progress
+        tile_w = min(self.tile_size, self.width - tile_x * self.tile_size)
+        tile_h = min(self.tile_size, self.height - tile_y * self.tile_size)
+        return self.tile_counts[tile_x][tile_y] / (tile_w * tile_h)
+
+    def count_surface(self, mask_surface: pygame.Surface) -> tuple[int, list | None]:
+        """
+        全量统计 mask_surface 中已擦除的像素数量和分块数量 (不修改计数器)。
+        返回 (已擦除像素数, 分块计数网格或 None)。
+        """
+        tile_counts = None
+        if NUMPY_AVAILABLE:
+            erased = pygame.surfarray.pixels_alpha(mask_surface) < self.alpha_threshold # 比较结果是新数组，不再引用 Surface
+            erased_pixels = int(numpy.count_nonzero(erased))
+            if self.tile_counts is not None:
+                tile = self.tile_size
+                tile_counts = [[int(numpy.count_nonzero(erased[tx * tile:(tx + 1) * tile, ty * tile:(ty + 1) * tile]))
+                                for ty in range(self.tiles_y)] for tx in range(self.tiles_x)]
+            return erased_pixels, tile_counts
+
+        # 回退实现：遍历 RGBA 字节中的 alpha 通道
+        pixel_bytes = pygame.image.tostring(mask_surface, "RGBA")
+        erased_pixels = 0
+        if self.tile_counts is not None:
+            tile_counts = [[0] * self.tiles_y for _ in range(self.tiles_x)]
+        for index in range(3, len(pixel_bytes), 4):
+            if pixel_bytes[index] < self.alpha_threshold:
+                erased_pixels += 1
+                if tile_counts is not None:
+                    pixel_index = index // 4
+                    tile_counts[(pixel_index % self.width) // self.tile_size][(pixel_index // self.width) // self.tile_size] += 1
+        return erased_pixels, tile_counts
+
+    def recount(self, mask_surface: pygame.Surface):
+        """根据 mask_surface 的当前内容重置计数 (蒙版创建或重建后调用)。"""
+        self.erased_pixels, tile_counts = self.count_surface(mask_surface)
+        if tile_counts is not None:
+            self.tile_counts = tile_counts
+
+    def validate(self, mask_surface: pygame.Surface) -> bool:
+        """全量重新统计并与增量计数比较，不一致时打印警告并以全量结果为准。"""
+        erased_pixels, tile_counts = self.count_surface(mask_surface)
+        is_valid = erased_pixels == self.erased_pixels and (tile_counts is None or tile_counts == self.tile_counts)
+        if not is_valid:
+            print(f"警告：擦除进度增量计数 ({self.erased_pixels}) 与全量统计 ({erased_pixels}) 不一致，已按全量统计修正。")
+            self.erased_pixels = erased_pixels
+            if tile_counts is not None:
+                self.tile_counts = tile_counts
+        return is_valid
@@ -93,7 +93,7 @@ class HybridInteraction:
             try:
                 if step_type == self.settings.INTERACTION_CLEAN_ERASE:
                     # CleanErase 需要 screen, image_renderer, config (这里传递step_config)
-                    self.sub_interactions[step_id] = CleanErase(step_config, self.image_renderer, self.screen)
+                    self.sub_interactions[step_id] = CleanErase(step_config, self.image_renderer)
                 elif step_type == self.settings.INTERACTION_CLICK_REVEAL:
                     # ClickReveal 需要 image_renderer, config (这里传递step_config)
                     self.sub_interactions[step_id] = ClickReveal(step_config, self.image_renderer)
@@ -0,0 +1,125 @@
+# interaction_modules/piece_pick_index.py
+import pygame
+# 导入 PuzzlePiece 类型提示
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from .puzzle_piece import PuzzlePiece
+
+
+class PiecePickIndex:
+    """
+    未锁定拼图碎片的网格分桶拾取索引和绘制顺序。
+
+    屏幕按 cell_size 划分为网格，每个碎片登记在其 rect 覆盖的所有网格中，
+    鼠标拾取只检查鼠标所在网格内的碎片，不再遍历全部碎片。
+    碎片的前后顺序用递增的层级值表示，提到最上层是 O(1) 操作，不需要在列表中 remove/append。
+    碎片通过 PuzzlePiece.set_position 通知索引更新其所在网格。
+    """
+
+    def __init__(self, cell_size: int):
+        self.cell_size = max(1, int(cell_size))
+        self._buckets = {} # {(网格x, 网格y): set(PuzzlePiece)}
+        self._piece_cells = {} # {PuzzlePiece: (x0, y0, x1, y1) 碎片覆盖的网格范围}
+        self._z_order = {} # {PuzzlePiece: 层级值}，值越大越靠上；按插入顺序即为从下到上的绘制顺序
+        self._next_z = 0
+
+    def __len__(self):
+        return len(self._z_order)
+
+    def __contains__(self, piece: 'PuzzlePiece'):
+        return piece in self._z_order
+
+    def _cell_range(self, rect: pygame.Rect) -> tuple[int, int, int, int]:
+        """rect 覆盖的网格范围 (含两端)"""
+        cell_size = self.cell_size
+        return (rect.left // cell_size, rect.top // cell_size,
+                (rect.right - 1) // cell_size, (rect.bottom - 1) // cell_size)
+
+    def add(self, piece: 'PuzzlePiece'):
+        """登记碎片并放到最上层"""
+        if piece in self._z_order:
+            self.raise_to_top(piece)
+            self.update(piece)
+            return
+        self._z_order[piece] = self._next_z
+        self._next_z += 1
+        cells = self._cell_range(piece.rect)
+        self._piece_cells[piece] = cells
+        self._add_to_buckets(piece, cells)
+        piece.pick_index = self
+
+    def remove(self, piece: 'PuzzlePiece'):
+        """移除碎片 (例如碎片吸附锁定后)"""
+        if piece not in self._z_order:
+            return
+        self._remove_from_buckets(piece, self._piece_cells.pop(piece))
+        del self._z_order[piece]
+        if piece.pick_index is self:
+            piece.pick_index = None
+
+    def clear(self):
+        """移除所有碎片"""
+        for piece in self._z_order:
+            if piece.pick_index is self:
+                piece.pick_index = None
+        self._buckets.clear()
+        self._piece_cells.clear()
+        self._z_order.clear()
+
+    def update(self, piece: 'PuzzlePiece'):
+        """碎片位置改变后更新其所在网格 (由 PuzzlePiece.set_position 调用)，网格未变化时不做任何操作"""
+        old_cells = self._piece_cells.get(piece)
+        if old_cells is None:
+            return
+        new_cells = self._cell_range(piece.rect)
+        if new_cells != old_cells:
+            self._remove_from_buckets(piece, old_cells)
+            self._add_to_buckets(piece, new_cells)
+            self._piece_cells[piece] = new_cells
+
+    def raise_to_top(self, piece: 'PuzzlePiece'):
+        """将碎片提到最上层 (拾取时调用)"""
+        if piece in self._z_order:
+            del self._z_order[piece]
+            self._z_order[piece] = self._next_z
+            self._next_z += 1
+
+    def pick(self, pos: tuple[int, int]) -> 'PuzzlePiece | None':
+        """返回 pos 处最上层的碎片，没有时返回 None"""
+        bucket = self._buckets.get((pos[0] // self.cell_size, pos[1] // self.cell_size))
+        if not bucket:
+            return None
+        top_piece = None
+        top_z = -1
+        for piece in bucket:
+            z = self._z_order[piece]
+            if z > top_z and piece.rect.collidepoint(pos):
+                top_piece = piece
+                top_z = z
+        return top_piece
+
+    def pieces_bottom_to_top(self):
+        """按从下到上的顺序返回所有碎片 (用于绘制)"""
+        return self._z_order.keys()
+
+    def _add_to_buckets(self, piece, cells):
+        x0, y0, x1, y1 = cells
+        buckets = self._buckets
+        for cell_y in range(y0, y1 + 1):
+            for cell_x in range(x0, x1 + 1):
+                bucket = buckets.get((cell_x, cell_y))
+                if bucket is None:
+                    buckets[(cell_x, cell_y)] = {piece}
+                else:
+                    bucket.add(piece)
+
+    def _remove_from_buckets(self, piece, cells):
+        x0, y0, x1, y1 = cells
+        buckets = self._buckets
+        for cell_y in range(y0, y1 + 1):
+            for cell_x in range(x0, x1 + 1):
+                bucket = buckets.get((cell_x, cell_y))
+                if bucket is not None:
+                    bucket.discard(piece)
+                    if not bucket:
+                        del buckets[(cell_x, cell_y)]
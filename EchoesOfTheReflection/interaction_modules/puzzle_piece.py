@@ -22,10 +22,13 @@ class PuzzlePiece:
         self.grid_pos = grid_pos # 在网格中的正确位置
 
         self._is_locked = False # 是否已锁定在正确位置
+        self.pick_index = None # 登记了该碎片的 PiecePickIndex (由索引设置)，位置改变时通知索引
 
     def set_position(self, screen_pos: tuple[int, int]):
         """设置碎片在屏幕上的位置 (左上角)"""
         self.rect.topleft = screen_pos
+        if self.pick_index is not None:
+            self.pick_index.update(self)
 
     def get_position(self) -> tuple[int, int]:
         """获取碎片在屏幕上的位置 (左上角)"""
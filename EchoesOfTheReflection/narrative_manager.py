@@ -13,6 +13,56 @@ if TYPE_CHECKING:
 # 定义文本文件路径 (相对于根目录)
 TEXT_CONTENT_FILE = os.path.join("data", "texts.json")
 
+# 换行禁则：这些标点不能出现在行首，与前一个字符绑定
+_NO_LINE_START_CHARS = set("，。、；：！？）》」』】〉”’…—·．,.;:!?)]}%")
+# 这些标点不能出现在行尾，与后一个字符绑定
+_NO_LINE_END_CHARS = set("（《「『【〈“‘([{")
+
+
+def _is_cjk(char):
+    """是否为中日韩文字或全角标点 (每个字符之间都可以换行)"""
+    code = ord(char)
+    return (0x3000 <= code <= 0x30FF or 0x3400 <= code <= 0x4DBF or 0x4E00 <= code <= 0x9FFF
+            or 0xF900 <= code <= 0xFAFF or 0xFF00 <= code <= 0xFFEF)
+
+
+def _split_wrap_tokens(text):
+    """
+    将文本切分为不可再分的换行单元，返回 [(起始下标, 结束下标)]。
+    单元为：一个中日韩字符 (连同禁则绑定的标点)、一个连续的西文单词、一段连续空白或一个换行符。
+    """
+    tokens = []
+    length = len(text)
+    i = 0
+    while i < length:
+        char = text[i]
+        if char == "\n":
+            tokens.append((i, i + 1))
+            i += 1
+            continue
+        if char.isspace():
+            j = i
+            while j < length and text[j].isspace() and text[j] != "\n":
+                j += 1
+            tokens.append((i, j))
+            i = j
+            continue
+
+        j = i
+        while j < length and text[j] in _NO_LINE_END_CHARS: # 开括号、前引号与后面的字符绑定
+            j += 1
+        if j < length and _is_cjk(text[j]) and text[j] not in _NO_LINE_START_CHARS:
+            j += 1
+        else:
+            while j < length and not text[j].isspace() and not _is_cjk(text[j]):
+                j += 1
+        j = max(j, i + 1)
+        while j < length and text[j] in _NO_LINE_START_CHARS: # 逗号、句号、省略号等与前面的字符绑定
+            j += 1
+        tokens.append((i, j))
+        i = j
+    return tokens
+
 
 class NarrativeManager:
     """
@@ -50,6 +100,16 @@ class NarrativeManager:
         # 文本框绘制相关
         self.text_area_rect = pygame.Rect(0, 0, 0, 0) # 文本绘制区域的矩形，由 draw 方法根据图片区域计算
 
+        # 文本排版和渲染缓存
+        # 排版结果 {(文本, 最大宽度, 字体): (每个字符的位置 [(x, 行号) 或 None], 行数)}，按插入顺序淘汰
+        self._layout_cache = {}
+        self._glyph_advance_cache = {} # {字符: 前进宽度}
+        self._glyph_surface_cache = {} # {字符: 渲染好的字符 Surface}，所有文本共用
+        # 逐字显示的持久文本层：新显示的字符追加绘制到这个 Surface 上，每帧只 blit 一次
+        self._typewriter_surface = None
+        self._typewriter_key = None # 文本层对应的 (文本, 最大宽度, 字体, 可见行数)
+        self._typewriter_drawn_count = 0 # 文本层上已绘制的字符数
+
         # 字体加载
         try:
             # 尝试加载指定的字体文件
@@ -240,21 +300,110 @@ class NarrativeManager:
         # 绘制当前显示的文本，自动换行
         # 确保有文本内容可绘制
         if self.current_display_text:
-            # 文本自动换行
-            lines = self._wrap_text(self.current_display_text, self.text_area_rect.width)
-            line_y = self.text_area_rect.top # 文本绘制起始Y坐标
-            line_height = self.font.get_linesize() # 每行文本的高度
-
-            # 绘制每一行文本
-            for line in lines:
-                 # 防止文本超出绘制区域底部
-                 if line_y + line_height <= self.text_area_rect.bottom + 2: # 加一点容忍度
-                     rendered_line = self.font.render(line, True, self.settings.TEXT_COLOR)
-                     screen.blit(rendered_line, (self.text_area_rect.left, line_y))
-                     line_y += line_height # 更新下一行的Y坐标
-                 else:
-                     # 超出区域，停止绘制后续行
-                     break
+            text_surface = self._update_typewriter_surface(self.current_text_content, len(self.current_display_text), self.text_area_rect)
+            if text_surface:
+                 screen.blit(text_surface, self.text_area_rect.topleft)
+
+
+    def _update_typewriter_surface(self, text, visible_count, text_area_rect: pygame.Rect):
+        """
+        返回显示了 text 前 visible_count 个字符的文本层 Surface。
+
+        排版基于完整文本 (逐字显示过程中已显示的字符不会因为后续字符而换行跳动)，
+        文本、区域宽度或字体不变时，只把新显示的字符追加绘制到持久的文本层上。
+        """
+        max_width = int(text_area_rect.width)
+        positions, line_count = self._layout_text(text, max_width)
+        line_height = self.font.get_linesize() # 每行文本的高度
+        # 防止文本超出绘制区域底部 (加一点容忍度)
+        visible_lines = min(line_count, max(0, int((text_area_rect.height + 2) // line_height)))
+        if visible_lines == 0 or max_width <= 0:
+             return None
+
+        typewriter_key = (text, max_width, self.font, visible_lines)
+        if typewriter_key != self._typewriter_key or visible_count < self._typewriter_drawn_count:
+             self._typewriter_surface = pygame.Surface((max_width, visible_lines * line_height), pygame.SRCALPHA)
+             # 透明底色使用文本颜色，字符以 BLEND_RGBA_MAX 叠加时只改变 alpha，边缘不会混入黑色
+             self._typewriter_surface.fill((*self.settings.TEXT_COLOR, 0))
+             self._typewriter_key = typewriter_key
+             self._typewriter_drawn_count = 0
+
+        for index in range(self._typewriter_drawn_count, min(visible_count, len(text))):
+             position = positions[index]
+             if position is None or position[1] >= visible_lines or text[index].isspace():
+                  continue
+             self._typewriter_surface.blit(self._get_glyph_surface(text[index]), (position[0], position[1] * line_height),
+                                           special_flags=pygame.BLEND_RGBA_MAX)
+        self._typewriter_drawn_count = max(self._typewriter_drawn_count, min(visible_count, len(text)))
+        return self._typewriter_surface
+
+
+    def _get_glyph_advance(self, char):
+        """字符的前进宽度 (缓存)"""
+        advance = self._glyph_advance_cache.get(char)
+        if advance is None:
+             metrics = self.font.metrics(char)
+             if metrics and metrics[0] is not None:
+                  advance = metrics[0][4]
+             else:
+                  advance = self.font.size(char)[0] # 字体中没有该字形时按实际渲染宽度
+             self._glyph_advance_cache[char] = advance
+        return advance
+
+    def _get_glyph_surface(self, char):
+        """渲染好的单个字符 Surface (缓存，所有文本共用)"""
+        glyph = self._glyph_surface_cache.get(char)
+        if glyph is None:
+             glyph = self.font.render(char, True, self.settings.TEXT_COLOR)
+             self._glyph_surface_cache[char] = glyph
+        return glyph
+
+
+    def _layout_text(self, text, max_width):
+        """
+        按最大宽度对文本排版 (支持中日韩文字逐字换行和标点禁则)，结果按 (文本, 宽度, 字体) 缓存。
+
+        Returns:
+            tuple: (positions, line_count)。positions[i] 为第 i 个字符的 (x, 行号)，
+                   换行处被吞掉的空白和换行符为 None。
+        """
+        cache_key = (text, max_width, self.font)
+        layout = self._layout_cache.get(cache_key)
+        if layout is not None:
+             return layout
+
+        positions = [None] * len(text)
+        line = 0
+        x = 0
+        for start, end in _split_wrap_tokens(text):
+             if text[start] == "\n":
+                  line += 1
+                  x = 0
+                  continue
+             advances = [self._get_glyph_advance(char) for char in text[start:end]]
+             if text[start].isspace():
+                  if x == 0:
+                       continue # 行首空白不显示
+                  if x + sum(advances) > max_width:
+                       line += 1 # 空白处换行，空白本身被吞掉
+                       x = 0
+                       continue
+             elif x > 0 and x + sum(advances) > max_width:
+                  line += 1
+                  x = 0
+             for offset, advance in enumerate(advances):
+                  # 单元本身比整行还宽 (很长的西文单词)，在字符之间强制换行
+                  if x > 0 and x + advance > max_width:
+                       line += 1
+                       x = 0
+                  positions[start + offset] = (x, line)
+                  x += advance
+
+        layout = (positions, line + 1)
+        if len(self._layout_cache) >= self.settings.TEXT_LAYOUT_CACHE_SIZE:
+             del self._layout_cache[next(iter(self._layout_cache))] # 淘汰最早的排版结果
+        self._layout_cache[cache_key] = layout
+        return layout
 
 
     def is_narrative_active(self):
@@ -264,33 +413,13 @@ class NarrativeManager:
 
 
     def _wrap_text(self, text, max_width):
-        """将文本按最大宽度进行自动换行"""
-        words = text.split(' ')
-        if not words: return []
-
-        lines = []
-        current_line_words = []
-
-        for word in words:
-            # 检查当前行加上新单词是否超出宽度
-            test_line = ' '.join(current_line_words + [word])
-            if self.font.size(test_line)[0] <= max_width:
-                current_line_words.append(word)
-            else:
-                # 如果新单词本身就超出最大宽度，单独一行显示
-                # Pygame render 不支持裁剪，长单词会超出边界
-                # 如果不希望长单词超界，需要在代码中手动截断单词或使用其他库
-                if not current_line_words: # 当前行没有单词，且新单词太长
-                    lines.append(word) # 简单处理：长单词自己一行
-                    current_line_words = []
-                else:
-                    lines.append(' '.join(current_line_words))
-                    current_line_words = [word]
-
-        if current_line_words: # 添加最后一行
-            lines.append(' '.join(current_line_words))
-
-        return lines
+        """将文本按最大宽度进行自动换行，返回每行的字符串 (使用与绘制相同的排版结果)"""
+        positions, line_count = self._layout_text(text, max_width)
+        lines = [[] for _ in range(line_count)]
+        for char, position in zip(text, positions):
+            if position is not None:
+                lines[position[1]].append(char)
+        return ["".join(line).rstrip() for line in lines]
 
     # TODO: 实现获取文本内容的方法 (_get_text_content)
     # 这个方法需要在初始化时加载所有文本内容字典
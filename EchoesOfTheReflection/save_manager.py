@@ -1,6 +1,7 @@
 # save_manager.py
 import json
 import os
+import threading
 
 class SaveManager:
     """管理游戏进度保存和加载"""
@@ -8,15 +9,68 @@ class SaveManager:
     def __init__(self, save_file_path):
         """初始化保存管理器"""
         self.save_file_path = save_file_path
+        # 后台写入时保证只有一个线程在写文件，且较旧的存档不会覆盖较新的存档
+        self._write_lock = threading.Lock()
+        self._save_sequence = 0 # 每次保存请求递增
+        self._written_sequence = 0 # 已写入文件的最新保存请求
+        # 后台保存只有一个写入槽位：写入线程忙时新的存档替换槽位中尚未写入的旧存档
+        self._slot_lock = threading.Lock()
+        self._pending_save = None # (存档文本, 保存请求序号)，等待后台写入的最新存档
+        self._writer_thread = None # 正在运行的写入线程，槽位清空后退出
 
     def save_game(self, game_state: dict):
         """保存游戏状态到文件"""
-        try:
-            with open(self.save_file_path, 'w', encoding='utf-8') as f:
-                json.dump(game_state, f, indent=4)
-            print("游戏进度已保存。")
-        except IOError as e:
-            print(f"警告：无法保存游戏进度到 {self.save_file_path}: {e}")
+        self._write_save_text(json.dumps(game_state, indent=4), self._next_sequence())
+
+    def save_game_async(self, game_state: dict):
+        """
+        在后台线程中保存游戏状态，不阻塞当前帧 (例如切换图片时)。
+        游戏状态在调用时序列化，之后对 game_state 的修改不影响本次保存。
+        同一时间最多只有一个写入线程；写入线程不是守护线程，退出游戏时解释器会等待写入完成。
+        """
+        save_text = json.dumps(game_state, indent=4)
+        sequence = self._next_sequence()
+        with self._slot_lock:
+            self._pending_save = (save_text, sequence)
+            if self._writer_thread is None:
+                self._writer_thread = threading.Thread(target=self._writer_loop, name="SaveWriter")
+                self._writer_thread.start()
+
+    def _writer_loop(self):
+        """后台写入线程：依次写入槽位中的最新存档，槽位为空时退出"""
+        while True:
+            with self._slot_lock:
+                pending = self._pending_save
+                self._pending_save = None
+                if pending is None:
+                    self._writer_thread = None
+                    return
+            self._write_save_text(*pending)
+
+    def _next_sequence(self) -> int:
+        with self._write_lock:
+            self._save_sequence += 1
+            return self._save_sequence
+
+    def _write_save_text(self, save_text: str, sequence: int):
+        """
+        将序列化后的存档写入文件。如果已经写入了更新的存档，则跳过。
+        先写入临时文件并落盘，再原子重命名覆盖正式存档，写入中途退出不会留下损坏的存档。
+        """
+        with self._write_lock:
+            if sequence < self._written_sequence:
+                return
+            temp_path = self.save_file_path + ".tmp"
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(save_text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.save_file_path)
+                self._written_sequence = sequence
+                print("游戏进度已保存。")
+            except IOError as e:
+                print(f"警告：无法保存游戏进度到 {self.save_file_path}: {e}")
 
     def load_game(self) -> dict | None:
         """从文件加载游戏状态"""
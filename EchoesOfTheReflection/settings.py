@@ -190,6 +190,25 @@ class Settings:
         self.TEXT_BOX_PADDING = 20 # 文本框内边距 (像素)
         self.TEXT_BOX_HEIGHT = 150 # 文本框固定高度 (像素) # 恢复为更合理的值
         self.TEXT_DISPLAY_WAIT_TIME = 1.0 # 每段文本显示完毕后自动进入下一段前的等待时间 (秒) # 缩短等待时间示例
+        self.TEXT_LAYOUT_CACHE_SIZE = 64 # 文本排版缓存保留的条目数 (文本, 宽度, 字体)
+
+        # Drag Puzzle 设置
+        self.PUZZLE_PICK_CELL_SIZE = 128 # 碎片拾取索引的网格边长 (像素)，与典型碎片尺寸同量级时效果最好
+
+        # Clean Erase 擦除笔刷设置
+        self.ERASE_BRUSH_STRENGTH = 30 # 每次盖章在笔刷中心降低的 alpha 值
+        self.ERASE_BRUSH_SOFTNESS = 0.0 # 笔刷软边宽度占半径的比例 (0 为硬边)，可在图片配置中用 brush_softness 覆盖
+        self.ERASE_BRUSH_SPACING = 0.25 # 沿鼠标轨迹插值盖章的间距，占笔刷直径的比例
+        self.ERASE_ALPHA_THRESHOLD = 50 # 蒙版 alpha 低于此值的像素视为已擦除
+        self.ERASE_PROGRESS_TILE_SIZE = 32 # 分块擦除进度网格的块边长 (像素)，0 表示不维护分块网格
+        self.ERASE_PROGRESS_VALIDATE = False # 调试：每一笔结束后用全量统计校验增量擦除计数
+
+        # 图片全局效果 (ImageRenderer) 设置
+        self.BLUR_MAX_STRENGTH = 50 # 模糊强度上限，图片配置 initial_effect.strength 按此值映射到缓存档位
+        self.BLUR_STRENGTH_LEVELS = 16 # 模糊强度量化档位数，显影过程中每个档位只模糊一次并缓存
+        self.BLUR_DOWNSCALE_PER_STRENGTH = 0.2 # 每单位强度增加的缩小倍数 (缩小再放大模拟模糊，强度 50 约缩小 11 倍)
+        self.PREFETCH_NEXT_IMAGE = True # 当前图片互动期间在后台线程预取下一张图片，切换时不再同步解码和缩放
+        self.PREFETCH_TAKE_TIMEOUT = 2.0 # 切换图片时等待后台预取完成的最长秒数，超时改为同步加载
 
         # 画廊设置
         self.GALLERY_THUMBNAIL_SIZE = (200, 150) # 缩略图显示尺寸 (像素)
@@ -197,6 +216,8 @@ class Settings:
         self.GALLERY_PADDING = 50 # 画廊区域边距 (像素)
         self.GALLERY_THUMBNAIL_SPACING_X = 20 # 缩略图水平间距
         self.GALLERY_THUMBNAIL_SPACING_Y = 20 # 缩略图垂直间距
+        self.GALLERY_THUMBNAIL_PLACEHOLDER_COLOR = (40, 40, 48) # 缩略图在后台生成期间显示的占位色
+        self.THUMBNAIL_CACHE_DIR = os.path.join("cache", "thumbnails") # 缩略图磁盘缓存目录
 
 
         # 保存文件路径
@@ -236,6 +257,17 @@ class Settings:
         self.INTERACTION_GALLERY_INTRO = "gallery_intro" # 画廊入口类型
         self.INTERACTION_GALLERY_IMAGE = "gallery_image" # 画廊图片详情类型
 
+        # 各互动类型会播放的通用音效ID (进入阶段时用于预取音效)
+        erase_sfx = ["sfx_erase_looping", "sfx_unerasable_hit"]
+        puzzle_sfx = ["sfx_puzzle_pickup", "sfx_puzzle_drop", "sfx_puzzle_snap", "sfx_puzzle_complete"]
+        self.INTERACTION_SFX = {
+            self.INTERACTION_CLEAN_ERASE: erase_sfx,
+            self.INTERACTION_DRAG_PUZZLE: puzzle_sfx,
+            self.INTERACTION_HYBRID_ERASE_THEN_CLICK: erase_sfx,
+            self.INTERACTION_HYBRID_CLICK_THEN_DRAG: puzzle_sfx,
+            self.INTERACTION_HYBRID_FINAL_ACTIVATION: erase_sfx + puzzle_sfx,
+        }
+
 
         # 其他常量和配置
         self.TRANSITION_DURATION = 0.8 # 过渡动画时长 (秒) # 缩短示例
@@ -243,5 +275,9 @@ class Settings:
         self.SFX_VOLUME = 0.8
         self.AI_SFX_VOLUME = 0.7 # AI声音的独立音量控制
 
+        # 音效按需加载设置
+        self.SFX_CACHE_BUDGET_BYTES = 16 * 1024 * 1024 # 已解码音效的内存预算，超出时淘汰最久未播放的音效
+        self.PRELOAD_SFX = ["sfx_ui_click", "sfx_ui_back"] # 所有阶段都会用到的音效，启动时在后台预取
+
         # 确保 game_manager 属性存在，尽管它在 GameManager 中被设置
         self.game_manager = None # 初始为 None
\ No newline at end of file
@@ -0,0 +1,148 @@
+# thumbnail_cache.py
+import hashlib
+import os
+import queue
+import threading
+
+import pygame
+from settings import Settings
+
+
+def make_thumbnail(original_image: pygame.Surface, size: tuple[int, int]) -> pygame.Surface:
+    """缩略图裁剪和缩放策略：保持比例，短边匹配，长边裁剪"""
+    original_width, original_height = original_image.get_size()
+    original_aspect = original_width / original_height
+    target_width, target_height = size
+    target_aspect = target_width / target_height
+
+    if original_aspect > target_aspect:
+        # 原始图片更宽，匹配目标高度，裁剪宽度
+        scaled_height = target_height
+        scaled_width = int(scaled_height * original_aspect)
+        scaled_image = pygame.transform.scale(original_image, (scaled_width, scaled_height))
+        crop_width = scaled_width - target_width
+        return scaled_image.subsurface(pygame.Rect(crop_width // 2, 0, target_width, target_height)).copy()
+    else:
+        # 原始图片更高或同比例，匹配目标宽度，裁剪高度
+        scaled_width = target_width
+        scaled_height = int(scaled_width / original_aspect)
+        scaled_image = pygame.transform.scale(original_image, (scaled_width, scaled_height))
+        crop_height = scaled_height - target_height
+        return scaled_image.subsurface(pygame.Rect(0, crop_height // 2, target_width, target_height)).copy()
+
+
+class ThumbnailCache:
+    """
+    画廊缩略图缓存。
+
+    缓存键为 (图片路径, 文件修改时间, 缩略图尺寸)，图片文件被替换或缩略图尺寸改变后自动失效。
+    - 内存缓存：在多次进入画廊之间保留，命中时不做任何 IO。
+    - 磁盘缓存：settings.THUMBNAIL_CACHE_DIR 下的 PNG 文件，跨游戏会话保留。
+    - 两级缓存都未命中时，在工作线程中加载原图生成缩略图并写入磁盘缓存；
+      主线程通过 poll_ready() 取回生成好的缩略图。
+    """
+
+    def __init__(self, settings: Settings):
+        """初始化缩略图缓存并启动工作线程"""
+        self.settings = settings
+        self.cache_dir = settings.THUMBNAIL_CACHE_DIR
+
+        self._memory_cache = {} # {缓存键: Surface}，只在主线程中访问
+
+        self._lock = threading.Lock()
+        self._jobs = queue.Queue() # (缓存键, 图片路径)
+        self._requested = set() # 已提交但尚未被 poll_ready 取回的缓存键
+        self._ready = [] # [(缓存键, Surface 或 None)]，工作线程完成后追加
+
+        self._thread = threading.Thread(target=self._worker_loop, name="ThumbnailCache", daemon=True)
+        self._thread.start()
+
+
+    def make_key(self, image_path, size: tuple[int, int]):
+        """返回缓存键；图片文件不存在时返回 None"""
+        try:
+            mtime_ns = os.stat(image_path).st_mtime_ns
+        except OSError:
+            return None
+        return (os.path.abspath(image_path), mtime_ns, tuple(size))
+
+
+    def get(self, key) -> pygame.Surface | None:
+        """从内存缓存中获取缩略图，未命中返回 None (不做任何 IO)"""
+        return self._memory_cache.get(key)
+
+
+    def request(self, key):
+        """请求在后台准备缩略图 (先查磁盘缓存，再从原图生成)。已在内存中或已在排队的请求会被忽略。"""
+        if key is None or key in self._memory_cache:
+            return
+        with self._lock:
+            if key in self._requested:
+                return
+            self._requested.add(key)
+        self._jobs.put(key)
+
+
+    def poll_ready(self) -> list:
+        """
+        取回自上次调用以来后台准备好的缩略图，并放入内存缓存。
+
+        Returns:
+            list: [(缓存键, Surface 或 None)]，生成失败时 Surface 为 None。
+        """
+        with self._lock:
+            if not self._ready:
+                return []
+            ready = self._ready
+            self._ready = []
+            for key, _ in ready:
+                self._requested.discard(key)
+        for key, thumbnail in ready:
+            if thumbnail is not None:
+                self._memory_cache[key] = thumbnail
+        return ready
+
+
+    def _disk_path(self, key) -> str:
+        """缓存键对应的磁盘缓存文件路径"""
+        image_path, mtime_ns, (width, height) = key
+        digest = hashlib.sha1(f"{image_path}|{mtime_ns}|{width}x{height}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.png")
+
+
+    def _worker_loop(self):
+        """工作线程主循环"""
+        while True:
+            key = self._jobs.get()
+            thumbnail = None
+            try:
+                thumbnail = self._load_or_generate(key)
+            except (pygame.error, OSError, ValueError) as e:
+                print(f"警告：无法生成缩略图 {key[0]}: {e}")
+            with self._lock:
+                self._ready.append((key, thumbnail))
+
+
+    def _load_or_generate(self, key) -> pygame.Surface:
+        """在工作线程中读取磁盘缓存，未命中时从原图生成并写入磁盘缓存"""
+        disk_path = self._disk_path(key)
+        if os.path.exists(disk_path):
+            try:
+                thumbnail = pygame.image.load(disk_path).convert_alpha()
+                if thumbnail.get_size() == key[2]:
+                    return thumbnail
+            except pygame.error as e:
+                print(f"警告：缩略图缓存文件损坏，重新生成 {disk_path}: {e}")
+
+        original_image = pygame.image.load(key[0]).convert_alpha()
+        thumbnail = make_thumbnail(original_image, key[2])
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # 先写临时文件再替换，避免中途退出留下不完整的缓存文件
+            temp_path = disk_path + ".tmp.png"
+            pygame.image.save(thumbnail, temp_path)
+            os.replace(temp_path, disk_path)
+        except (pygame.error, OSError) as e:
+            print(f"警告：无法写入缩略图缓存 {disk_path}: {e}")
+        return thumbnail
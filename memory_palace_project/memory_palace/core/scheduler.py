@@ -0,0 +1,79 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from .node import Node
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EASE_FACTOR = 2.5
+MIN_EASE_FACTOR = 1.3
+PASSING_QUALITY = 3 # 回忆质量 0-5，低于此值视为遗忘，间隔重置
+
+
+@dataclass
+class ReviewSchedule:
+    """一个节点在一个时间轴的一个模式下的复习计划 (对应 NodeMemoryProgress 的一行)"""
+    node_id: int
+    timeline_id: int
+    mode: str = "review_memory"
+    ease_factor: float = DEFAULT_EASE_FACTOR
+    interval_days: float = 0
+    repetitions: int = 0 # 连续回忆成功的次数
+    next_due: Optional[datetime] = None # None 表示还没有复习过，不在待复习队列中
+    last_completed_at: Optional[datetime] = None
+    is_completed: bool = False
+
+
+def schedule_next_review(schedule: ReviewSchedule, quality: int, now: Optional[datetime] = None) -> ReviewSchedule:
+    """
+    按 SM-2 算法根据本次回忆质量 (0-5) 计算下一次复习时间，直接修改并返回 schedule。
+    """
+    quality = max(0, min(5, int(quality)))
+    now = now or datetime.now(timezone.utc)
+
+    if quality < PASSING_QUALITY:
+        schedule.repetitions = 0
+        schedule.interval_days = 1
+    else:
+        if schedule.repetitions == 0:
+            schedule.interval_days = 1
+        elif schedule.repetitions == 1:
+            schedule.interval_days = 6
+        else:
+            schedule.interval_days = round(schedule.interval_days * schedule.ease_factor)
+        schedule.repetitions += 1
+
+    schedule.ease_factor = max(MIN_EASE_FACTOR,
+                               schedule.ease_factor + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    schedule.next_due = now + timedelta(days=schedule.interval_days)
+    schedule.last_completed_at = now
+    schedule.is_completed = quality >= PASSING_QUALITY
+    return schedule
+
+
+class ReviewScheduler:
+    """
+    间隔复习调度。复习计划存储在 NodeMemoryProgress 中，
+    待复习队列通过 (mode, next_due) 索引查询，查询代价只与返回的条数有关，与宫殿中的节点总数无关。
+    """
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def record_review(self, node_id: int, timeline_id: int, quality: int,
+                      mode: str = "review_memory", now: Optional[datetime] = None) -> Optional[ReviewSchedule]:
+        """记录一次复习结果并保存下一次复习时间，失败时返回 None"""
+        schedule = self.db_manager.get_review_schedule(node_id, timeline_id, mode)
+        if schedule is None:
+            schedule = ReviewSchedule(node_id=node_id, timeline_id=timeline_id, mode=mode)
+        schedule_next_review(schedule, quality, now)
+        if not self.db_manager.save_review_schedule(schedule):
+            return None
+        logger.debug(f"Node {node_id} ({mode}) next review in {schedule.interval_days} days, ease {schedule.ease_factor:.2f}")
+        return schedule
+
+    def get_due_nodes(self, limit: int, mode: str = "review_memory", now: Optional[datetime] = None) -> List[Node]:
+        """返回到期需要复习的节点，最早到期的在前"""
+        return self.db_manager.get_due_nodes(limit, mode, now or datetime.now(timezone.utc))
@@ -10,6 +10,7 @@ class Segment:
     background_image_path: Optional[str] = None # 存储在应用数据目录中的背景图副本路径
     background_image_original_width: Optional[int] = None
     background_image_original_height: Optional[int] = None
+    background_image_hash: Optional[str] = None # 背景图在内容寻址图片库中的哈希 (ImageStore.content_hash)，旧数据为 None
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
     # 未来可以添加字段，如片段名称/摘要 (如果需要直接显示在carousel上)
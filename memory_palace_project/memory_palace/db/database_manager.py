@@ -1,14 +1,16 @@
 import sqlite3
 import os
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timezone # timezone 用于 UTC
 from ..utils.constants import DATABASE_PATH, DATA_DIR
 from ..core.timeline import Timeline # 导入Timeline数据类
-from typing import Optional, List # 如果你后面也会用到 List 类型提示，可以一并导入
+from typing import Optional, List, Tuple # 如果你后面也会用到 List 类型提示，可以一并导入
 from ..core.segment import Segment # <<<<<<<<<<<<<<<<<<<<<<<<<<< 导入 Segment
 from ..core.node import Node       # <<<<<<<<<<<<<<<<<<<<<<<<<<< 导入 Node
+from ..core.scheduler import ReviewSchedule
 from ..utils.constants import DEFAULT_NODE_MAX_WIDTH_PX # 导入默认节点最大宽度
-from ..utils.file_utils import copy_image_to_data_dir, delete_app_data_file # (稍后创建file_utils.py)
+from ..utils.file_utils import store_image_by_content, delete_stored_image
 from ..utils.constants import DATABASE_PATH, DATA_DIR, DEFAULT_NODE_MAX_WIDTH_PX, DEFAULT_SEGMENT_BACKGROUND_ALIAS # <<<<<<< 添加
 
 logger = logging.getLogger(__name__)
@@ -24,6 +26,64 @@ def convert_datetime_iso(val):
 sqlite3.register_adapter(datetime, adapt_datetime_iso)
 sqlite3.register_converter("DATETIME", convert_datetime_iso) # 注意这里的 "DATETIME" 必须与你在CREATE TABLE中使用的类型匹配，或者用一个通用名
 
+# 版本化的数据库结构迁移: (目标版本, SQL脚本)。
+# 已应用的版本记录在 PRAGMA user_version 中，启动时只执行比当前版本新的迁移。
+# 新增迁移时在列表末尾追加，不要修改已发布的迁移。
+SCHEMA_MIGRATIONS = [
+    (1, """
+        /* 外键列的二级索引，避免按时间轴/片段查询时全表扫描；
+           同时包含排序列，ORDER BY order_index / order_in_segment 和 MAX(order_index) 可直接走索引 */
+        CREATE INDEX IF NOT EXISTS idx_segments_timeline_order ON Segments(timeline_id, order_index);
+        CREATE INDEX IF NOT EXISTS idx_nodes_segment_order ON Nodes(segment_id, order_in_segment);
+        /* node_id 已由 UNIQUE(node_id, timeline_id, mode) 覆盖，这里补上 timeline_id (按时间轴查询进度和级联删除时使用) */
+        CREATE INDEX IF NOT EXISTS idx_progress_timeline_mode ON NodeMemoryProgress(timeline_id, mode);
+    """),
+    (2, """
+        /* 间隔复习计划 (见 core/scheduler.py)，next_due 为 NULL 表示还没有复习过 */
+        ALTER TABLE NodeMemoryProgress ADD COLUMN next_due DATETIME;
+        ALTER TABLE NodeMemoryProgress ADD COLUMN ease_factor REAL DEFAULT 2.5;
+        ALTER TABLE NodeMemoryProgress ADD COLUMN interval_days REAL DEFAULT 0;
+        ALTER TABLE NodeMemoryProgress ADD COLUMN repetitions INTEGER DEFAULT 0;
+        /* 待复习队列: WHERE mode = ? AND next_due <= ? ORDER BY next_due LIMIT ? 只扫描返回的行 */
+        CREATE INDEX IF NOT EXISTS idx_progress_mode_next_due ON NodeMemoryProgress(mode, next_due);
+    """),
+    (3, """
+        /* 内容寻址图片库: 相同内容的背景图只存一份文件，ref_count 为引用它的片段数 (由下面的触发器维护) */
+        CREATE TABLE IF NOT EXISTS ImageStore (
+            content_hash TEXT PRIMARY KEY, /* 图片内容的 sha256 */
+            file_path TEXT NOT NULL,
+            width INTEGER,
+            height INTEGER,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        /* 部分索引只包含引用计数归零的图片，垃圾回收只扫描这些行 */
+        CREATE INDEX IF NOT EXISTS idx_image_store_orphans ON ImageStore(content_hash) WHERE ref_count <= 0;
+
+        ALTER TABLE Segments ADD COLUMN background_image_hash TEXT REFERENCES ImageStore(content_hash);
+        CREATE INDEX IF NOT EXISTS idx_segments_image_hash ON Segments(background_image_hash);
+
+        /* 片段插入、删除 (包括删除时间轴时的级联删除) 和更换背景图时维护引用计数 */
+        CREATE TRIGGER IF NOT EXISTS trg_segments_image_ref_insert AFTER INSERT ON Segments
+        WHEN NEW.background_image_hash IS NOT NULL
+        BEGIN
+            UPDATE ImageStore SET ref_count = ref_count + 1 WHERE content_hash = NEW.background_image_hash;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_segments_image_ref_delete AFTER DELETE ON Segments
+        WHEN OLD.background_image_hash IS NOT NULL
+        BEGIN
+            UPDATE ImageStore SET ref_count = ref_count - 1 WHERE content_hash = OLD.background_image_hash;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_segments_image_ref_update AFTER UPDATE OF background_image_hash ON Segments
+        WHEN OLD.background_image_hash IS NOT NEW.background_image_hash
+        BEGIN
+            UPDATE ImageStore SET ref_count = ref_count - 1 WHERE content_hash = OLD.background_image_hash;
+            UPDATE ImageStore SET ref_count = ref_count + 1 WHERE content_hash = NEW.background_image_hash;
+        END;
+    """),
+]
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
 class DatabaseManager:
     # ... (之前的 __init__, _ensure_db_directory_exists, get_connection, close_connection, _execute_script, _create_tables_if_not_exists 方法保持不变) ...
     def __init__(self, db_path=DATABASE_PATH):
@@ -31,7 +91,13 @@ class DatabaseManager:
         if self.db_path != ":memory:": # <<<<<<<<<<<< 添加这个判断
             self._ensure_db_directory_exists()
         self.conn = None
+        self._transaction_depth = 0 # transaction() 的嵌套层数，大于0时各CRUD方法不单独提交
+        self._transaction_failed = False # 事务中有操作失败时置位，最外层事务结束时回滚而不是提交
+        self._change_listeners = [] # 数据变更回调 callback(table, action, row_id)，见 add_change_listener
+        self._pending_changes = [] # 已执行但尚未提交的变更，提交后再通知，回滚时丢弃
+        self._stored_resource_images = {} # {Qt资源路径: (内容哈希, 文件路径, 宽, 高)}，资源在运行期不变，不必每次重新读取和哈希
         self._create_tables_if_not_exists()
+        self._apply_schema_migrations()
 
     def _ensure_db_directory_exists(self):
         db_dir = os.path.dirname(self.db_path)
@@ -49,6 +115,12 @@ class DatabaseManager:
                 self.conn.row_factory = sqlite3.Row
                 # 启用外键约束，应该在每次获取新连接时执行
                 self.conn.execute("PRAGMA foreign_keys = ON;")
+                if self.db_path != ":memory:":
+                    # WAL 模式: 读不阻塞写，提交时只追加日志而不重写数据库页；WAL 下 synchronous=NORMAL 仍能保证数据库不损坏
+                    journal_mode = self.conn.execute("PRAGMA journal_mode = WAL;").fetchone()[0]
+                    if journal_mode.lower() != "wal":
+                        logger.warning(f"Could not enable WAL journal mode, current mode: {journal_mode}")
+                    self.conn.execute("PRAGMA synchronous = NORMAL;")
                 logger.info(f"Database connection established to: {self.db_path}")
             except sqlite3.Error as e:
                 logger.error(f"Error connecting to database {self.db_path}: {e}")
@@ -61,6 +133,86 @@ class DatabaseManager:
             self.conn = None
             logger.info("Database connection closed.")
 
+    @contextmanager
+    def transaction(self):
+        """
+        将多个写操作合并为一个事务 (只提交一次)，可以嵌套，只有最外层负责提交或回滚。
+        事务内 add_xxx/update_xxx/delete_xxx 不会单独提交；其中任何一个失败，或代码块抛出异常，整个事务都会回滚。
+        内部操作失败 (方法本身只返回 None/False/[]) 导致回滚时，最外层在结束时抛出 sqlite3.DatabaseError，调用方不会误以为已经提交。
+
+        用法:
+            with db_manager.transaction():
+                segment_id = db_manager.add_segment(segment)
+                db_manager.add_nodes_bulk(nodes)
+        """
+        conn = self.get_connection()
+        if not conn:
+            raise sqlite3.OperationalError(f"No database connection to {self.db_path}")
+        if self._transaction_depth == 0:
+            self._transaction_failed = False
+            conn.execute("BEGIN")
+        self._transaction_depth += 1
+        try:
+            yield conn
+        except Exception:
+            self._transaction_failed = True
+            raise
+        finally:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                if self._transaction_failed:
+                    conn.rollback()
+                    self._pending_changes.clear()
+                    logger.warning("Transaction rolled back.")
+                else:
+                    conn.commit()
+                    self._dispatch_pending_changes()
+        # 只有代码块正常结束时才会执行到这里：块内没有异常，但有操作失败，整个事务已被回滚
+        if self._transaction_depth == 0 and self._transaction_failed:
+            raise sqlite3.DatabaseError("transaction rolled back because an operation inside it failed")
+
+    def _commit(self, conn):
+        """单个操作成功后提交；在 transaction() 内部时由最外层统一提交"""
+        if self._transaction_depth == 0:
+            conn.commit()
+            self._dispatch_pending_changes()
+
+    def _rollback(self, conn):
+        """单个操作失败后回滚；在 transaction() 内部时标记整个事务在结束时回滚"""
+        if self._transaction_depth == 0:
+            conn.rollback()
+            self._pending_changes.clear()
+        else:
+            self._transaction_failed = True
+
+    # --- 变更通知 ---
+    def add_change_listener(self, callback):
+        """
+        注册数据变更回调 callback(table, action, row_id)，action 为 "insert" / "update" / "delete"。
+        回调在数据提交后、在执行写操作的线程中调用；目前只通知 Timelines 表的变更。
+        """
+        if callback not in self._change_listeners:
+            self._change_listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        if callback in self._change_listeners:
+            self._change_listeners.remove(callback)
+
+    def _record_change(self, table: str, action: str, row_id: int):
+        """记录一条变更，随下一次提交 (_commit 或最外层事务结束) 一起通知"""
+        if self._change_listeners:
+            self._pending_changes.append((table, action, row_id))
+
+    def _dispatch_pending_changes(self):
+        changes = self._pending_changes
+        self._pending_changes = []
+        for table, action, row_id in changes:
+            for callback in list(self._change_listeners):
+                try:
+                    callback(table, action, row_id)
+                except Exception as e:
+                    logger.error(f"Error in change listener for {table} {action} {row_id}: {e}")
+
     def _execute_script(self, script):
         conn = self.get_connection()
         if not conn: return False
@@ -143,6 +295,25 @@ class DatabaseManager:
         else:
             logger.error("Failed to check/create database tables.")
 
+    def _apply_schema_migrations(self):
+        """按版本顺序执行尚未应用的结构迁移，每个迁移与其版本号在同一个事务中提交"""
+        conn = self.get_connection()
+        if not conn: return
+        current_version = conn.execute("PRAGMA user_version;").fetchone()[0]
+        for version, script in SCHEMA_MIGRATIONS:
+            if version <= current_version:
+                continue
+            try:
+                # executescript 会先提交挂起的事务，所以显式 BEGIN/COMMIT，保证迁移失败时版本号不变
+                conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+                current_version = version
+                logger.info(f"Database schema migrated to version {version}.")
+            except sqlite3.Error as e:
+                logger.error(f"Error applying schema migration to version {version}: {e}")
+                if conn.in_transaction:
+                    conn.rollback()
+                return
+
 
     # --- Timeline CRUD ---
     def add_timeline(self, timeline: Timeline) -> Optional[int]:
@@ -156,13 +327,14 @@ class DatabaseManager:
                 VALUES (?, ?, ?, ?, ?)
             """, (timeline.name, timeline.default_memory_mode, timeline.cover_icon_data,
                   timeline.created_at, timeline.updated_at))
-            conn.commit()
             new_id = cursor.lastrowid
+            self._record_change("Timelines", "insert", new_id)
+            self._commit(conn)
             logger.info(f"Timeline added with id: {new_id}, name: {timeline.name}")
             return new_id
         except sqlite3.Error as e:
             logger.error(f"Error adding timeline '{timeline.name}': {e}")
-            conn.rollback()
+            self._rollback(conn)
             return None
 
     def get_timeline(self, timeline_id: int) -> Optional[Timeline]:
@@ -209,12 +381,13 @@ class DatabaseManager:
                 WHERE id = ?
             """, (timeline.name, timeline.default_memory_mode, timeline.cover_icon_data,
                   timeline.updated_at, timeline.id))
-            conn.commit()
+            self._record_change("Timelines", "update", timeline.id)
+            self._commit(conn)
             logger.info(f"Timeline updated with id: {timeline.id}, name: {timeline.name}")
             return True
         except sqlite3.Error as e:
             logger.error(f"Error updating timeline with id {timeline.id}: {e}")
-            conn.rollback()
+            self._rollback(conn)
             return False
 
     def delete_timeline(self, timeline_id: int) -> bool:
@@ -225,12 +398,14 @@ class DatabaseManager:
             cursor = conn.cursor()
             # 由于设置了 ON DELETE CASCADE，删除Timeline会自动删除其Segments, Nodes, NodeMemoryProgress
             cursor.execute("DELETE FROM Timelines WHERE id = ?", (timeline_id,))
-            conn.commit()
+            if cursor.rowcount > 0:
+                self._record_change("Timelines", "delete", timeline_id)
+            self._commit(conn)
             logger.info(f"Timeline deleted with id: {timeline_id}")
             return True
         except sqlite3.Error as e:
             logger.error(f"Error deleting timeline with id {timeline_id}: {e}")
-            conn.rollback()
+            self._rollback(conn)
             return False
 
     # --- Segment CRUD (骨架，后续填充) ---
@@ -266,20 +441,67 @@ class DatabaseManager:
             cursor.execute("""
                 INSERT INTO Segments (timeline_id, order_index, background_image_path,
                                     background_image_original_width, background_image_original_height,
-                                    created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                                    background_image_hash, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """, (segment.timeline_id, segment.order_index, segment.background_image_path,
                   segment.background_image_original_width, segment.background_image_original_height,
-                  segment.created_at, segment.updated_at))
+                  segment.background_image_hash, segment.created_at, segment.updated_at))
             segment_id = cursor.lastrowid
-            conn.commit()
+            self._commit(conn)
             logger.info(f"Segment added with id: {segment_id} to timeline {segment.timeline_id}, order: {segment.order_index}")
             return segment_id
         except sqlite3.Error as e:
             logger.error(f"Error adding segment to timeline {segment.timeline_id}: {e}")
-            conn.rollback()
+            self._rollback(conn)
             return None
 
+    def add_segments_bulk(self, segments: List[Segment]) -> List[int]:
+        """
+        批量添加片段 (executemany，一次提交)。每个时间轴的 order_index 接在该时间轴现有片段之后按列表顺序递增。
+        返回新片段ID列表 (与输入顺序一致)，失败时返回空列表。
+        """
+        if not segments: return []
+        if any(segment.timeline_id is None for segment in segments):
+            logger.error("Cannot add segments in bulk: some segments have no timeline_id.")
+            return []
+        conn = self.get_connection()
+        if not conn: return []
+        try:
+            with self.transaction():
+                cursor = conn.cursor()
+                next_order = {}
+                for segment in segments:
+                    if segment.timeline_id not in next_order:
+                        cursor.execute("SELECT MAX(order_index) FROM Segments WHERE timeline_id = ?", (segment.timeline_id,))
+                        max_order = cursor.fetchone()[0]
+                        next_order[segment.timeline_id] = (max_order + 1) if max_order is not None else 0
+                    segment.order_index = next_order[segment.timeline_id]
+                    next_order[segment.timeline_id] += 1
+
+                cursor.executemany("""
+                    INSERT INTO Segments (timeline_id, order_index, background_image_path,
+                                        background_image_original_width, background_image_original_height,
+                                        background_image_hash, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(segment.timeline_id, segment.order_index, segment.background_image_path,
+                       segment.background_image_original_width, segment.background_image_original_height,
+                       segment.background_image_hash, segment.created_at, segment.updated_at) for segment in segments])
+                segment_ids = self._last_inserted_ids(cursor, len(segments))
+            logger.info(f"{len(segment_ids)} segments added in bulk.")
+            return segment_ids
+        except sqlite3.Error as e:
+            logger.error(f"Error adding {len(segments)} segments in bulk: {e}")
+            return []
+
+    def _last_inserted_ids(self, cursor, count: int) -> List[int]:
+        """
+        executemany 批量插入后的ID列表。
+        事务持有写锁，AUTOINCREMENT 在同一事务中连续分配，所以是以最后一行ID结尾的连续区间。
+        """
+        cursor.execute("SELECT last_insert_rowid()")
+        last_id = cursor.fetchone()[0]
+        return list(range(last_id - count + 1, last_id + 1))
+
     def get_segment(self, segment_id: int) -> Optional[Segment]:
         conn = self.get_connection()
         if not conn: return None
@@ -319,17 +541,17 @@ class DatabaseManager:
                 UPDATE Segments
                 SET timeline_id = ?, order_index = ?, background_image_path = ?,
                     background_image_original_width = ?, background_image_original_height = ?,
-                    updated_at = ?
+                    background_image_hash = ?, updated_at = ?
                 WHERE id = ?
             """, (segment.timeline_id, segment.order_index, segment.background_image_path,
                   segment.background_image_original_width, segment.background_image_original_height,
-                  segment.updated_at, segment.id))
-            conn.commit()
+                  segment.background_image_hash, segment.updated_at, segment.id))
+            self._commit(conn)
             logger.info(f"Segment updated with id: {segment.id}")
             return True
         except sqlite3.Error as e:
             logger.error(f"Error updating segment with id {segment.id}: {e}")
-            conn.rollback()
+            self._rollback(conn)
             return False
 
     def delete_segment(self, segment_id: int) -> bool:
@@ -339,12 +561,12 @@ class DatabaseManager:
             cursor = conn.cursor()
             # 删除Segment会自动删除其Nodes和NodeMemoryProgress (通过外键CASCADE)
             cursor.execute("DELETE FROM Segments WHERE id = ?", (segment_id,))
-            conn.commit()
+            self._commit(conn)
             logger.info(f"Segment deleted with id: {segment_id}")
             return True
         except sqlite3.Error as e:
             logger.error(f"Error deleting segment with id {segment_id}: {e}")
-            conn.rollback()
+            self._rollback(conn)
             return False
 
     # --- Node CRUD ---
@@ -371,14 +593,46 @@ class DatabaseManager:
                   node.current_width_px, node.current_height_px, node.max_width_px, node.order_in_segment,
                   node.created_at, node.updated_at, node.visual_style_json))
             node_id = cursor.lastrowid
-            conn.commit()
+            self._commit(conn)
             logger.info(f"Node added with id: {node_id} to segment {node.segment_id}")
             return node_id
         except sqlite3.Error as e:
             logger.error(f"Error adding node to segment {node.segment_id}: {e}")
-            conn.rollback()
+            self._rollback(conn)
             return None
 
+    def add_nodes_bulk(self, nodes: List[Node]) -> List[int]:
+        """
+        批量添加节点 (executemany，一次提交)，order_in_segment 由调用者设置 (与 add_node 相同)。
+        返回新节点ID列表 (与输入顺序一致)，失败时返回空列表。
+        """
+        if not nodes: return []
+        if any(node.segment_id is None for node in nodes):
+            logger.error("Cannot add nodes in bulk: some nodes have no segment_id.")
+            return []
+        conn = self.get_connection()
+        if not conn: return []
+        for node in nodes:
+            if node.max_width_px is None: # 如果未设置，从常量获取
+                node.max_width_px = DEFAULT_NODE_MAX_WIDTH_PX
+        try:
+            with self.transaction():
+                cursor = conn.cursor()
+                cursor.executemany("""
+                    INSERT INTO Nodes (segment_id, name, detail, anchor_x_percent, anchor_y_percent,
+                                       current_width_px, current_height_px, max_width_px, order_in_segment,
+                                       created_at, updated_at, visual_style_json)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(node.segment_id, node.name, node.detail, node.anchor_x_percent, node.anchor_y_percent,
+                       node.current_width_px, node.current_height_px, node.max_width_px, node.order_in_segment,
+                       node.created_at, node.updated_at, node.visual_style_json) for node in nodes])
+                node_ids = self._last_inserted_ids(cursor, len(nodes))
+            logger.info(f"{len(node_ids)} nodes added in bulk.")
+            return node_ids
+        except sqlite3.Error as e:
+            logger.error(f"Error adding {len(nodes)} nodes in bulk: {e}")
+            return []
+
     def get_nodes_for_segment(self, segment_id: int) -> List[Node]:
         conn = self.get_connection()
         if not conn: return []
@@ -396,8 +650,120 @@ class DatabaseManager:
 
     # ... (update_node, delete_node, get_node 等可以后续添加) ...
 
-    # --- NodeMemoryProgress CRUD (保持骨架) ---
-    # ...
+    # --- ImageStore (内容寻址图片库) ---
+    def store_image(self, source_path_or_qresource_alias: str,
+                    original_filename: Optional[str] = None) -> Tuple[Optional[str], Optional[str], Optional[int], Optional[int]]:
+        """
+        将图片放入内容寻址图片库并登记到 ImageStore，相同内容的图片共享一个文件。
+        返回 (内容哈希, 文件路径, 宽, 高)；片段通过 background_image_hash 引用它，引用计数由触发器维护。
+        """
+        stored = self._stored_resource_images.get(source_path_or_qresource_alias)
+        if stored is None or not os.path.exists(stored[1]):
+            stored = store_image_by_content(source_path_or_qresource_alias, original_filename)
+            if stored[0] is None:
+                return None, None, None, None
+            if source_path_or_qresource_alias.startswith(":/"):
+                self._stored_resource_images[source_path_or_qresource_alias] = stored
+
+        content_hash, file_path, width, height = stored
+        conn = self.get_connection()
+        if not conn: return None, None, None, None
+        try:
+            conn.execute("""
+                INSERT INTO ImageStore (content_hash, file_path, width, height) VALUES (?, ?, ?, ?)
+                ON CONFLICT(content_hash) DO UPDATE SET file_path = excluded.file_path
+            """, (content_hash, file_path, width, height))
+            self._commit(conn)
+            return stored
+        except sqlite3.Error as e:
+            logger.error(f"Error registering stored image {content_hash}: {e}")
+            self._rollback(conn)
+            return None, None, None, None
+
+    def collect_orphaned_images(self) -> int:
+        """一次性删除所有引用计数为零的图片文件、缩略图和 ImageStore 记录，返回删除的图片数"""
+        conn = self.get_connection()
+        if not conn: return 0
+        try:
+            orphans = conn.execute("SELECT content_hash, file_path FROM ImageStore WHERE ref_count <= 0").fetchall()
+            if not orphans:
+                return 0
+            conn.executemany("DELETE FROM ImageStore WHERE content_hash = ? AND ref_count <= 0",
+                             [(row["content_hash"],) for row in orphans])
+            self._commit(conn)
+        except sqlite3.Error as e:
+            logger.error(f"Error collecting orphaned images: {e}")
+            self._rollback(conn)
+            return 0
+        # 记录删除成功后再删文件，删除文件失败只会留下无人引用的文件，不会留下指向不存在文件的记录
+        orphan_hashes = {row["content_hash"] for row in orphans}
+        self._stored_resource_images = {alias: stored for alias, stored in self._stored_resource_images.items()
+                                        if stored[0] not in orphan_hashes}
+        for row in orphans:
+            delete_stored_image(row["content_hash"], row["file_path"])
+        logger.info(f"Garbage-collected {len(orphans)} orphaned images.")
+        return len(orphans)
+
+    # --- NodeMemoryProgress CRUD ---
+    def get_review_schedule(self, node_id: int, timeline_id: int, mode: str) -> Optional[ReviewSchedule]:
+        conn = self.get_connection()
+        if not conn: return None
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT node_id, timeline_id, mode, ease_factor, interval_days, repetitions,
+                       next_due, last_completed_at, is_completed
+                FROM NodeMemoryProgress
+                WHERE node_id = ? AND timeline_id = ? AND mode = ?
+            """, (node_id, timeline_id, mode))
+            row = cursor.fetchone()
+            if row:
+                return ReviewSchedule(**dict(row))
+            return None
+        except sqlite3.Error as e:
+            logger.error(f"Error getting review schedule for node {node_id} ({mode}): {e}")
+            return None
+
+    def save_review_schedule(self, schedule: ReviewSchedule) -> bool:
+        """插入或更新复习计划 (按 UNIQUE(node_id, timeline_id, mode))"""
+        conn = self.get_connection()
+        if not conn: return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO NodeMemoryProgress (node_id, timeline_id, mode, is_completed, last_completed_at,
+                                                next_due, ease_factor, interval_days, repetitions)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(node_id, timeline_id, mode) DO UPDATE SET
+                    is_completed = excluded.is_completed, last_completed_at = excluded.last_completed_at,
+                    next_due = excluded.next_due, ease_factor = excluded.ease_factor,
+                    interval_days = excluded.interval_days, repetitions = excluded.repetitions
+            """, (schedule.node_id, schedule.timeline_id, schedule.mode, schedule.is_completed, schedule.last_completed_at,
+                  schedule.next_due, schedule.ease_factor, schedule.interval_days, schedule.repetitions))
+            self._commit(conn)
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error saving review schedule for node {schedule.node_id} ({schedule.mode}): {e}")
+            self._rollback(conn)
+            return False
+
+    def get_due_nodes(self, limit: int, mode: str, now: datetime) -> List[Node]:
+        """返回 next_due <= now 的节点 (最早到期的在前)，通过 (mode, next_due) 索引查询"""
+        conn = self.get_connection()
+        if not conn: return []
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT Nodes.* FROM NodeMemoryProgress
+                JOIN Nodes ON Nodes.id = NodeMemoryProgress.node_id
+                WHERE NodeMemoryProgress.mode = ? AND NodeMemoryProgress.next_due <= ?
+                ORDER BY NodeMemoryProgress.next_due ASC
+                LIMIT ?
+            """, (mode, now, limit))
+            return [Node(**dict(row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Error getting due nodes ({mode}): {e}")
+            return []
 
     # Helper for creating default timeline content
 
@@ -410,10 +776,9 @@ class DatabaseManager:
             DEFAULT_SEGMENT_BACKGROUND_ALIAS # 使用常量中的默认值
         )
 
-        # 使用 file_utils 复制图片
-        copied_bg_path, width, height = copy_image_to_data_dir(
-            source_path_or_qresource_alias=default_bg_alias,
-            timeline_id_str=str(timeline_id), # 文件夹通常用字符串ID
+        # 默认背景图在图片库中只存一份，所有默认片段共享
+        content_hash, copied_bg_path, width, height = self.store_image(
+            default_bg_alias,
             original_filename="default_background.png" # 提供一个原始文件名用于确定扩展名
         )
         if not copied_bg_path:
@@ -426,7 +791,8 @@ class DatabaseManager:
             timeline_id=timeline_id,
             background_image_path=copied_bg_path,
             background_image_original_width=width,
-            background_image_original_height=height
+            background_image_original_height=height,
+            background_image_hash=content_hash
         )
         segment_id = self.add_segment(default_segment)
         # ... (后续创建默认节点的逻辑不变) ...
@@ -500,5 +866,27 @@ if __name__ == '__main__':
             print(tl)
 
 
+    # 测试批量导入 (一个事务，一次提交)
+    print("\n--- Testing bulk import ---")
+    bulk_tl_id = db_manager.add_timeline(Timeline(name="Bulk Timeline"))
+    with db_manager.transaction():
+        bulk_segment_ids = db_manager.add_segments_bulk([Segment(timeline_id=bulk_tl_id) for _ in range(100)])
+        bulk_node_ids = db_manager.add_nodes_bulk([Node(segment_id=segment_id, name=f"节点{i}", order_in_segment=i)
+                                                   for segment_id in bulk_segment_ids for i in range(10)])
+    print(f"Bulk added {len(bulk_segment_ids)} segments and {len(bulk_node_ids)} nodes")
+    assert [segment.id for segment in db_manager.get_segments_for_timeline(bulk_tl_id)] == bulk_segment_ids
+    assert [node.id for node in db_manager.get_nodes_for_segment(bulk_segment_ids[-1])] == bulk_node_ids[-10:]
+
+    # 测试索引是否被使用
+    print("\n--- Testing schema indexes ---")
+    schema_version = db_manager.get_connection().execute("PRAGMA user_version;").fetchone()[0]
+    print(f"Schema version: {schema_version}")
+    assert schema_version == SCHEMA_VERSION
+    plan_rows = db_manager.get_connection().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM Segments WHERE timeline_id = ? ORDER BY order_index ASC", (1,)).fetchall()
+    plan = " ".join(row["detail"] for row in plan_rows)
+    print(f"Segments query plan: {plan}")
+    assert "idx_segments_timeline_order" in plan and "TEMP B-TREE" not in plan
+
     db_manager.close_connection()
     print("\nDatabaseManager Timeline CRUD test finished.")
\ No newline at end of file
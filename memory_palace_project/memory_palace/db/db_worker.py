@@ -0,0 +1,105 @@
+import logging
+import itertools
+from typing import Callable, Optional
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+from .database_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class _DatabaseWorkerObject(QObject):
+    """在工作线程中执行查询的对象。拥有自己的 DatabaseManager (sqlite3 连接不能跨线程使用)。"""
+    result_ready = pyqtSignal(int, object)  # (请求ID, 返回值)
+    error_occurred = pyqtSignal(int, str)   # (请求ID, 错误信息)
+
+    def __init__(self, db_path: str):
+        super().__init__()
+        self.db_path = db_path
+        self.db_manager: Optional[DatabaseManager] = None  # 在工作线程中第一次请求时创建
+
+    @pyqtSlot(int, str, tuple, dict)
+    def run_request(self, request_id: int, method_name: str, args: tuple, kwargs: dict):
+        try:
+            if self.db_manager is None:
+                self.db_manager = DatabaseManager(db_path=self.db_path)
+            result = getattr(self.db_manager, method_name)(*args, **kwargs)
+            self.result_ready.emit(request_id, result)
+        except Exception as e:
+            logger.error(f"DB worker request {request_id} ({method_name}) failed: {e}")
+            self.error_occurred.emit(request_id, str(e))
+
+    @pyqtSlot()
+    def shutdown(self):
+        """在工作线程中关闭连接并结束线程的事件循环"""
+        if self.db_manager is not None:
+            self.db_manager.close_connection()
+            self.db_manager = None
+        QThread.currentThread().quit()
+
+
+class DatabaseWorker(QObject):
+    """
+    后台数据库线程。在 GUI 线程中创建和使用，查询在 QThread 中执行，结果通过 Qt 信号回到 GUI 线程。
+
+    submit() 接受 DatabaseManager 的方法名和参数，例如:
+        db_worker.submit("get_all_timelines", callback=self.populate_timelines)
+    回调在 GUI 线程中执行，可以直接操作控件。
+    工作线程使用自己的连接 (WAL 模式下与 GUI 线程的连接可以同时读写)。
+    """
+    result_ready = pyqtSignal(int, object)  # (请求ID, 返回值)，所有请求的结果
+    error_occurred = pyqtSignal(int, str)   # (请求ID, 错误信息)
+    _request = pyqtSignal(int, str, tuple, dict)
+    _shutdown_requested = pyqtSignal()
+
+    def __init__(self, db_path: str, parent=None):
+        super().__init__(parent)
+        self._request_ids = itertools.count(1)
+        self._callbacks = {}  # {请求ID: (callback, error_callback)}
+
+        self._thread = QThread()
+        self._thread.setObjectName("DatabaseWorker")
+        self._worker = _DatabaseWorkerObject(db_path)
+        self._worker.moveToThread(self._thread)
+        # 跨线程的信号连接自动使用 QueuedConnection：请求在工作线程中按提交顺序执行，结果在 GUI 线程中处理
+        self._request.connect(self._worker.run_request)
+        self._shutdown_requested.connect(self._worker.shutdown)
+        self._worker.result_ready.connect(self._on_result_ready)
+        self._worker.error_occurred.connect(self._on_error_occurred)
+        self._thread.start()
+        logger.info(f"Database worker thread started for: {db_path}")
+
+    def submit(self, method_name: str, *args,
+               callback: Optional[Callable] = None,
+               error_callback: Optional[Callable] = None, **kwargs) -> int:
+        """
+        提交一个 DatabaseManager 方法调用到后台线程，立即返回请求ID。
+        callback(result) / error_callback(error_message) 在 GUI 线程中调用。
+        """
+        request_id = next(self._request_ids)
+        if callback is not None or error_callback is not None:
+            self._callbacks[request_id] = (callback, error_callback)
+        self._request.emit(request_id, method_name, args, kwargs)
+        return request_id
+
+    def shutdown(self, timeout_ms: int = 3000):
+        """等待已提交的请求执行完毕后关闭工作线程的连接并停止线程 (退出程序时调用)"""
+        if not self._thread.isRunning():
+            return
+        self._shutdown_requested.emit()
+        if not self._thread.wait(timeout_ms):
+            logger.warning("Database worker thread did not stop in time.")
+        else:
+            logger.info("Database worker thread stopped.")
+
+    def _on_result_ready(self, request_id: int, result):
+        callback, _ = self._callbacks.pop(request_id, (None, None))
+        if callback is not None:
+            callback(result)
+        self.result_ready.emit(request_id, result)
+
+    def _on_error_occurred(self, request_id: int, error_message: str):
+        _, error_callback = self._callbacks.pop(request_id, (None, None))
+        if error_callback is not None:
+            error_callback(error_message)
+        self.error_occurred.emit(request_id, error_message)
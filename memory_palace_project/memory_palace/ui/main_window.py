@@ -5,6 +5,7 @@ from PyQt6.QtCore import Qt
 # from PySide6.QtCore import Qt
 
 from ..db.database_manager import DatabaseManager
+from ..db.db_worker import DatabaseWorker
 from ..utils.config_manager import ConfigManager
 from ..utils.constants import APP_NAME
 
@@ -24,6 +25,8 @@ class MainWindow(QMainWindow):
         self.setWindowTitle(APP_NAME)
 
         self.db_manager = DatabaseManager() # 初始化数据库管理器
+        self.db_manager.collect_orphaned_images() # 清理上次运行中删除片段/时间轴后不再被引用的背景图
+        self.db_worker = DatabaseWorker(self.db_manager.db_path, self) # 后台数据库线程，视图加载列表数据时使用，避免阻塞界面
         self.config_manager = ConfigManager() # 加载settings.json
 
         window_settings = self.config_manager.get_setting("window", {})
@@ -42,8 +45,8 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(self.stacked_widget)
 
         # 初始化视图 (现在只是骨架)
-        self.timeline_list_view = TimelineListView(self.db_manager, self.config_manager, self)
-        self.segment_carousel_view = SegmentCarouselView(self.db_manager, self.config_manager, self)
+        self.timeline_list_view = TimelineListView(self.db_manager, self.config_manager, self, db_worker=self.db_worker)
+        self.segment_carousel_view = SegmentCarouselView(self.db_manager, self.config_manager, self, db_worker=self.db_worker)
         self.segment_detail_view = SegmentDetailView(self.db_manager, self.config_manager, self)
 
         self.stacked_widget.addWidget(self.timeline_list_view)
@@ -109,5 +112,7 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         """确保在关闭窗口时关闭数据库连接"""
         logger.info("Closing application...")
+        self.segment_carousel_view.shutdown()
+        self.db_worker.shutdown()
         self.db_manager.close_connection()
         event.accept()
\ No newline at end of file
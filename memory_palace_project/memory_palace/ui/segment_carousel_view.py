@@ -9,6 +9,7 @@ from typing import Optional # <<<<<<<<<<<<<<<<<<<<<<<<<<<< 添加 Optional 导
 from ..core.timeline import Timeline
 from ..core.segment import Segment # 导入Segment (为后续显示片段做准备)
 from .dialogs import confirm_dialog # 导入确认对话框
+from .widgets.segment_carousel import SegmentCarousel
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +18,14 @@ class SegmentCarouselView(QWidget):
     back_to_timeline_list = pyqtSignal()
     timeline_updated_or_deleted = pyqtSignal()
 
-    def __init__(self, db_manager, config_manager, parent=None):
+    def __init__(self, db_manager, config_manager, parent=None, db_worker=None):
         super().__init__(parent)
         self.db_manager = db_manager
+        self.db_worker = db_worker # 可选的后台数据库线程，有则在后台查询片段列表
         self.config_manager = config_manager
         self.parent_window = parent
         self.current_timeline: Optional[Timeline] = None
+        self._select_segment_id_after_load: Optional[int] = None # 片段列表加载后要切换到的片段 (例如新建的片段)
 
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(10,10,10,10)
@@ -64,11 +67,28 @@ class SegmentCarouselView(QWidget):
 
         main_layout.addLayout(top_bar_layout)
 
-        self.carousel_area_label = QLabel("片段轮播区域 (Placeholder)")
-        self.carousel_area_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        self.carousel_area_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.carousel_area_label.setStyleSheet("QLabel { border: 1px solid lightgray; background-color: #f0f0f0; }")
-        main_layout.addWidget(self.carousel_area_label)
+        # 片段轮播：只绘制可见的片段，背景图在后台线程中按需解码 (见 widgets/segment_carousel.py)
+        carousel_layout = QHBoxLayout()
+        self.previous_segment_button = QPushButton("<")
+        self.previous_segment_button.setToolTip("上一个片段")
+        self.previous_segment_button.setFixedWidth(32)
+        carousel_layout.addWidget(self.previous_segment_button)
+        self.carousel = SegmentCarousel(
+            visible_radius=1,
+            prefetch_radius=self.config_manager.get_setting("carousel.prefetch_radius", 2),
+            max_cached_pixmaps=self.config_manager.get_setting("carousel.max_cached_pixmaps", 12),
+            parent=self
+        )
+        self.carousel.segment_activated.connect(self.on_carousel_segment_activated)
+        self.carousel.current_index_changed.connect(self.update_carousel_buttons)
+        carousel_layout.addWidget(self.carousel)
+        self.next_segment_button = QPushButton(">")
+        self.next_segment_button.setToolTip("下一个片段")
+        self.next_segment_button.setFixedWidth(32)
+        carousel_layout.addWidget(self.next_segment_button)
+        self.previous_segment_button.clicked.connect(self.carousel.show_previous)
+        self.next_segment_button.clicked.connect(self.carousel.show_next)
+        main_layout.addLayout(carousel_layout)
 
         bottom_bar_layout = QHBoxLayout()
         self.add_segment_button_bottom_left = QPushButton(" 新建片段") # 加空格
@@ -178,11 +198,35 @@ class SegmentCarouselView(QWidget):
 
     def load_segments_for_carousel(self, timeline_id: int):
         logger.debug(f"Loading segments for timeline {timeline_id} into carousel...")
-        segments = self.db_manager.get_segments_for_timeline(timeline_id)
-        self.carousel_area_label.setText(f"时间轴ID: {timeline_id} - 包含 {len(segments)} 个片段 (轮播区占位)")
+        if self.db_worker is not None:
+            self.db_worker.submit("get_segments_for_timeline", timeline_id,
+                                  callback=lambda segments: self.on_segments_loaded(timeline_id, segments))
+        else:
+            self.on_segments_loaded(timeline_id, self.db_manager.get_segments_for_timeline(timeline_id))
+
+    def on_segments_loaded(self, timeline_id: int, segments: list[Segment]):
+        if not self.current_timeline or self.current_timeline.id != timeline_id:
+            return # 结果返回前已切换到其他时间轴
         if not segments:
             logger.info(f"No segments found for timeline {timeline_id}.")
-        # TODO: 将segments渲染到轮播区域
+        select_segment_id = self._select_segment_id_after_load
+        self._select_segment_id_after_load = None
+        if self.carousel.segments and self.carousel.segments[0].timeline_id != timeline_id:
+            self.carousel.current_index = 0 # 换了时间轴，从第一个片段开始
+        self.carousel.set_segments(segments, select_segment_id)
+
+    def update_carousel_buttons(self, current_index: int):
+        self.previous_segment_button.setEnabled(current_index > 0)
+        self.next_segment_button.setEnabled(current_index < len(self.carousel.segments) - 1)
+
+    def on_carousel_segment_activated(self, index: int):
+        segment = self.carousel.current_segment()
+        if segment and segment.id is not None and self.current_timeline and self.current_timeline.id is not None:
+            self.segment_selected.emit(segment.id, self.current_timeline.id)
+
+    def shutdown(self):
+        """停止轮播的后台解码线程 (关闭窗口时调用)"""
+        self.carousel.shutdown()
 
     def handle_add_segment(self):
         if not self.current_timeline or self.current_timeline.id is None:
@@ -195,6 +239,7 @@ class SegmentCarouselView(QWidget):
         )
         if new_segment_id:
             logger.info(f"New default segment (ID: {new_segment_id}) added to timeline '{self.current_timeline.name}'.")
+            self._select_segment_id_after_load = new_segment_id
             self.load_segments_for_carousel(self.current_timeline.id)
         else:
             QMessageBox.critical(self, "错误", "创建新片段失败。")
@@ -1,5 +1,5 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,QListWidget, QListWidgetItem, QInputDialog, QMenu, QMessageBox) # 增加QMenu, QMessageBox
-from PyQt6.QtCore import pyqtSignal, Qt
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListView, QInputDialog, QLineEdit, QMenu, QMessageBox) # 增加QMenu, QMessageBox
+from PyQt6.QtCore import pyqtSignal, Qt, QAbstractListModel, QModelIndex
 from PyQt6.QtGui import QIcon # <<<<<<<<<<<<<<<<<<<<<<<<<<<< 添加 QIcon 导入
 
 import logging
@@ -9,18 +9,112 @@ from .dialogs import NewTimelineDialog, confirm_dialog
 
 logger = logging.getLogger(__name__)
 
-class TimelineListItem(QListWidgetItem):
-    def __init__(self, timeline: Timeline, parent=None):
-        super().__init__(timeline.name, parent)
-        self.timeline = timeline
+class TimelineListModel(QAbstractListModel):
+    """
+    时间轴列表模型 (按创建时间倒序，与 get_all_timelines 一致)。
+    通过 DatabaseManager 的变更通知逐行插入、更新、删除，只有受影响的行会重绘，选中项和滚动位置保持不变。
+    """
+    TimelineRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self._timelines: list[Timeline] = []
+        self.change_generation = 0 # 每应用一次变更通知递增，用于识别在通知之前提交的后台查询结果
+        self.db_manager.add_change_listener(self.on_database_changed)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._timelines)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._timelines):
+            return None
+        timeline = self._timelines[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return timeline.name
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"创建于 {timeline.created_at}"
+        if role == self.TimelineRole:
+            return timeline
+        return None
+
+    def timeline_at(self, row: int) -> Optional[Timeline]:
+        if 0 <= row < len(self._timelines):
+            return self._timelines[row]
+        return None
+
+    def row_of(self, timeline_id: int) -> Optional[int]:
+        for row, timeline in enumerate(self._timelines):
+            if timeline.id == timeline_id:
+                return row
+        return None
+
+    def sync_timelines(self, timelines: list[Timeline], generation: Optional[int] = None) -> bool:
+        """
+        与完整的时间轴列表对齐，只对有差异的行发出插入/更新/删除 (不会 reset 整个模型)。
+        generation 为查询提交时的 change_generation；之后又应用过变更通知时结果已过期 (可能缺少新插入的行)，
+        不做对齐并返回 False，调用方应重新查询。
+        """
+        if generation is not None and generation != self.change_generation:
+            return False
+        new_ids = {timeline.id for timeline in timelines}
+        for row in range(len(self._timelines) - 1, -1, -1):
+            if self._timelines[row].id not in new_ids:
+                self._remove_row(row)
+        for row, timeline in enumerate(timelines):
+            if row < len(self._timelines) and self._timelines[row].id == timeline.id:
+                if self._timelines[row] != timeline:
+                    self._update_row(row, timeline)
+                continue
+            existing_row = self.row_of(timeline.id)
+            if existing_row is not None: # 顺序变化 (前面的行都已对齐，所以它一定在后面)
+                self._remove_row(existing_row)
+            self._insert_row(row, timeline)
+        return True
+
+    def on_database_changed(self, table: str, action: str, row_id: int):
+        if table != "Timelines":
+            return
+        self.change_generation += 1
+        row = self.row_of(row_id)
+        if action == "delete":
+            if row is not None:
+                self._remove_row(row)
+            return
+        timeline = self.db_manager.get_timeline(row_id)
+        if timeline is None:
+            return
+        if row is not None:
+            self._update_row(row, timeline)
+        else:
+            # 按创建时间倒序找到插入位置 (新建的时间轴通常在第一行)
+            insert_row = next((i for i, existing in enumerate(self._timelines)
+                               if str(existing.created_at) <= str(timeline.created_at)), len(self._timelines))
+            self._insert_row(insert_row, timeline)
+
+    def _insert_row(self, row: int, timeline: Timeline):
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._timelines.insert(row, timeline)
+        self.endInsertRows()
+
+    def _remove_row(self, row: int):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._timelines[row]
+        self.endRemoveRows()
+
+    def _update_row(self, row: int, timeline: Timeline):
+        self._timelines[row] = timeline
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
 
 class TimelineListView(QWidget):
     timeline_selected = pyqtSignal(int)
     new_timeline_created_and_selected = pyqtSignal(int, bool)
 
-    def __init__(self, db_manager, config_manager, parent=None):
+    def __init__(self, db_manager, config_manager, parent=None, db_worker=None):
         super().__init__(parent)
         self.db_manager = db_manager
+        self.db_worker = db_worker # 可选的后台数据库线程，有则在后台查询列表数据
         self.config_manager = config_manager
         self.parent_window = parent
 
@@ -34,14 +128,27 @@ class TimelineListView(QWidget):
         top_button_layout.addStretch()
         main_layout.addLayout(top_button_layout)
 
-        self.timeline_list_widget = QListWidget()
-        self.timeline_list_widget.setStyleSheet("QListWidget::item { padding: 5px; }")
-        self.timeline_list_widget.itemDoubleClicked.connect(self.handle_timeline_double_clicked)
+        self.timeline_model = TimelineListModel(self.db_manager, self)
+        self.timeline_list_widget = QListView()
+        self.timeline_list_widget.setModel(self.timeline_model)
+        self.timeline_list_widget.setUniformItemSizes(True) # 所有行同高，大列表不必逐行计算尺寸
+        self.timeline_list_widget.setStyleSheet("QListView::item { padding: 5px; }")
+        self.timeline_list_widget.doubleClicked.connect(self.handle_timeline_double_clicked)
         # 启用右键菜单策略
         self.timeline_list_widget.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.timeline_list_widget.customContextMenuRequested.connect(self.show_context_menu)
         main_layout.addWidget(self.timeline_list_widget)
 
+        self.empty_hint_label = QLabel("没有时间轴，点击上方按钮创建新的记忆宫殿吧！")
+        self.empty_hint_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.empty_hint_label.setStyleSheet("QLabel { color: gray; }")
+        main_layout.addWidget(self.empty_hint_label)
+        self.timeline_model.rowsInserted.connect(self.update_empty_hint)
+        self.timeline_model.rowsRemoved.connect(self.update_empty_hint)
+        self.timeline_model.modelReset.connect(self.update_empty_hint)
+        self._data_loaded = False
+        self.update_empty_hint()
+
         bottom_button_layout = QHBoxLayout()
         self.settings_button = QPushButton(" 设置") # 加空格
         self.settings_button.setIcon(QIcon(":/assets/icons/common_settings.png")) # << MODIFIED
@@ -59,16 +166,28 @@ class TimelineListView(QWidget):
 
     def load_data(self):
         logger.debug("TimelineListView loading data...")
-        self.timeline_list_widget.clear()
-        timelines = self.db_manager.get_all_timelines()
-        if not timelines:
-            no_timeline_item = QListWidgetItem("没有时间轴，点击上方按钮创建新的记忆宫殿吧！")
-            no_timeline_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            no_timeline_item.setFlags(no_timeline_item.flags() & ~Qt.ItemFlag.ItemIsSelectable & ~Qt.ItemFlag.ItemIsEnabled) # 不可选，灰色
-            self.timeline_list_widget.addItem(no_timeline_item)
-        for tl in timelines:
-            item = TimelineListItem(tl)
-            self.timeline_list_widget.addItem
+        if self.db_worker is not None:
+            # 后台查询，结果按提交顺序回到GUI线程，最后一次的结果覆盖之前的
+            # 记录提交时的变更代数，查询期间模型已应用的变更通知不会被较旧的结果覆盖
+            generation = self.timeline_model.change_generation
+            self.db_worker.submit("get_all_timelines",
+                                  callback=lambda timelines: self.populate_timelines(timelines, generation))
+        else:
+            self.populate_timelines(self.db_manager.get_all_timelines())
+
+    def populate_timelines(self, timelines: list[Timeline], generation: Optional[int] = None):
+        # 逐行对齐而不是清空重建，保留选中项和滚动位置；之后的增删改由模型的变更通知处理
+        if not self.timeline_model.sync_timelines(timelines, generation):
+            logger.debug("Timeline list query result is older than applied changes, reloading.")
+            self.load_data()
+            return
+        self._data_loaded = True
+        self.update_empty_hint()
+
+    def update_empty_hint(self, *args):
+        has_timelines = self.timeline_model.rowCount() > 0
+        self.empty_hint_label.setVisible(self._data_loaded and not has_timelines)
+        self.timeline_list_widget.setVisible(has_timelines or not self._data_loaded)
 
     def handle_add_timeline(self):
         logger.debug("Add timeline button clicked.")
@@ -88,27 +207,25 @@ class TimelineListView(QWidget):
                         logger.warning(f"Could not create default segment for new timeline '{timeline_name}'.")
 
                     logger.info(f"New timeline '{timeline_name}' created with ID: {new_timeline_id}.")
-                    self.load_data()
                     self.new_timeline_created_and_selected.emit(new_timeline_id, True)
                 else:
                     QMessageBox.critical(self, "错误", f"创建时间轴 '{timeline_name}' 失败。")
             else:
                 QMessageBox.warning(self, "警告", "时间轴名称不能为空。")
 
-    def handle_timeline_double_clicked(self, item: QListWidgetItem): # 参数类型改为 QListWidgetItem
-        if isinstance(item, TimelineListItem) and item.timeline.id is not None:
-            logger.debug(f"Timeline item double-clicked: {item.timeline.name} (ID: {item.timeline.id})")
-            self.timeline_selected.emit(item.timeline.id)
-        elif not isinstance(item, TimelineListItem) and item.flags() & Qt.ItemFlag.ItemIsEnabled:
-            logger.debug(f"Non-TimelineListItem double-clicked: {item.text()}")
-            # 如果是其他类型的可点击项（虽然目前没有），可以在这里处理
+    def handle_timeline_double_clicked(self, index: QModelIndex):
+        timeline = self.timeline_model.timeline_at(index.row()) if index.isValid() else None
+        if timeline is not None and timeline.id is not None:
+            logger.debug(f"Timeline item double-clicked: {timeline.name} (ID: {timeline.id})")
+            self.timeline_selected.emit(timeline.id)
         else:
-            logger.warning(f"Invalid item double-clicked or timeline ID is None. Item text: {item.text()}")
+            logger.warning(f"Invalid item double-clicked or timeline ID is None. Row: {index.row()}")
 
 
     def show_context_menu(self, position):
-        item = self.timeline_list_widget.itemAt(position)
-        if isinstance(item, TimelineListItem) and item.timeline.id is not None: # 确保是有效的时间轴项
+        index = self.timeline_list_widget.indexAt(position)
+        timeline = self.timeline_model.timeline_at(index.row()) if index.isValid() else None
+        if timeline is not None and timeline.id is not None: # 确保是有效的时间轴项
             menu = QMenu(self)
             rename_action = menu.addAction(QIcon(":/assets/icons/common_edit_pencil.png"), "重命名") # 添加图标
             delete_action = menu.addAction(QIcon(":/assets/icons/common_delete_trash.png"), "删除") # 添加图标
@@ -120,13 +237,13 @@ class TimelineListView(QWidget):
             action = menu.exec(self.timeline_list_widget.mapToGlobal(position))
 
             if action == rename_action:
-                self.handle_rename_timeline(item.timeline)
+                self.handle_rename_timeline(timeline)
             elif action == delete_action:
-                self.handle_delete_timeline(item.timeline)
+                self.handle_delete_timeline(timeline)
             # elif action == duplicate_action:
-                # self.handle_duplicate_timeline(item.timeline)
+                # self.handle_duplicate_timeline(timeline)
             # elif action == export_action:
-                # self.handle_export_timeline(item.timeline)
+                # self.handle_export_timeline(timeline)
 
 
     def handle_rename_timeline(self, timeline: Timeline):
@@ -135,8 +252,7 @@ class TimelineListView(QWidget):
         if ok and new_name.strip() and new_name.strip() != timeline.name:
             old_name = timeline.name
             timeline.name = new_name.strip()
-            if self.db_manager.update_timeline(timeline):
-                self.load_data()
+            if self.db_manager.update_timeline(timeline): # 模型通过变更通知只更新这一行
                 logger.info(f"Timeline ID {timeline.id} renamed from '{old_name}' to '{timeline.name}'.")
             else:
                 QMessageBox.critical(self, "错误", f"重命名时间轴 '{timeline.name}' 失败。")
@@ -150,8 +266,7 @@ class TimelineListView(QWidget):
         if confirm_dialog(self, "确认删除", f"确定要删除时间轴 '{timeline.name}' 吗？\n此操作将同时删除其下所有片段和节点，且无法恢复。"):
             timeline_id_to_delete = timeline.id
             timeline_name_deleted = timeline.name
-            if self.db_manager.delete_timeline(timeline_id_to_delete):
-                self.load_data()
+            if self.db_manager.delete_timeline(timeline_id_to_delete): # 模型通过变更通知只删除这一行
                 logger.info(f"Timeline ID {timeline_id_to_delete} ('{timeline_name_deleted}') deleted.")
             else:
                 QMessageBox.critical(self, "错误", f"删除时间轴 '{timeline_name_deleted}' 失败。")
\ No newline at end of file
@@ -0,0 +1,314 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from PyQt6.QtWidgets import QWidget, QSizePolicy
+from PyQt6.QtCore import QObject, QThread, QRectF, Qt, pyqtSignal, pyqtSlot
+from PyQt6.QtGui import QColor, QImage, QImageReader, QPainter, QPen, QPixmap
+
+from ...core.segment import Segment
+from ...utils.constants import THUMBNAIL_SIZES
+from ...utils.file_utils import get_image_lod_path
+
+logger = logging.getLogger(__name__)
+
+
+class _ImageDecodeWorker(QObject):
+    """在后台线程中解码背景图 (QPixmap 只能在GUI线程创建，这里只生成 QImage)"""
+    image_decoded = pyqtSignal(object, QImage, bool)  # (缓存键, 图片, 是否跳过)，解码失败或跳过时为空 QImage
+
+    def __init__(self, loader: 'SegmentPixmapLoader'):
+        super().__init__()
+        self._loader = loader
+
+    @pyqtSlot(object)
+    def decode(self, key):
+        if not self._loader.is_wanted(key):
+            self.image_decoded.emit(key, QImage(), True) # 排队期间已滚出预取窗口，跳过解码
+            return
+        image_path, long_edge = key
+        reader = QImageReader(get_image_lod_path(image_path, long_edge))
+        reader.setAutoTransform(True)
+        size = reader.size() # 只读文件头
+        if size.isValid() and max(size.width(), size.height()) > long_edge:
+            reader.setScaledSize(size.scaled(long_edge, long_edge, Qt.AspectRatioMode.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            logger.warning(f"Failed to decode segment background '{image_path}': {reader.errorString()}")
+        self.image_decoded.emit(key, image, False)
+
+
+class SegmentPixmapLoader(QObject):
+    """
+    片段背景图的后台解码和 LRU 缓存。
+    缓存键为 (图片路径, 解码长边)；最多保留 max_cached_pixmaps 张，当前预取窗口内的不会被淘汰。
+    """
+    pixmap_ready = pyqtSignal(object)  # 缓存键
+    _decode_requested = pyqtSignal(object)
+
+    def __init__(self, max_cached_pixmaps: int, parent=None):
+        super().__init__(parent)
+        self.max_cached_pixmaps = max(1, max_cached_pixmaps)
+        self._pixmaps = OrderedDict() # {缓存键: QPixmap}，最近使用的在末尾
+        self._failed = set() # 解码失败的键，不再重试
+        self._pending = set() # 已提交解码、结果尚未返回的键
+        self._window_keys = set() # 当前预取窗口内的键
+        self._lock = threading.Lock() # 保护 _window_keys (工作线程会读取)
+
+        self._thread = QThread()
+        self._thread.setObjectName("SegmentPixmapLoader")
+        self._worker = _ImageDecodeWorker(self)
+        self._worker.moveToThread(self._thread)
+        self._decode_requested.connect(self._worker.decode)
+        self._worker.image_decoded.connect(self._on_image_decoded)
+        self._thread.start()
+
+    def get(self, key) -> Optional[QPixmap]:
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def is_wanted(self, key) -> bool:
+        with self._lock:
+            return key in self._window_keys
+
+    def request_window(self, keys: List):
+        """设置当前预取窗口 (按优先级排列，先提交的先解码)，提交窗口内尚未缓存也未在解码中的图片"""
+        with self._lock:
+            self._window_keys = set(keys)
+        for key in keys:
+            if key in self._pixmaps:
+                self._pixmaps.move_to_end(key)
+            elif key not in self._pending and key not in self._failed:
+                self._pending.add(key)
+                self._decode_requested.emit(key)
+
+    def clear(self):
+        self._pixmaps.clear()
+        self._failed.clear()
+        with self._lock:
+            self._window_keys = set()
+
+    def shutdown(self):
+        """停止解码线程 (关闭窗口时调用)"""
+        with self._lock:
+            self._window_keys = set() # 让排队中的解码全部跳过
+        self._thread.quit()
+        self._thread.wait()
+
+    def _on_image_decoded(self, key, image: QImage, skipped: bool):
+        self._pending.discard(key)
+        if skipped:
+            # 跳过的结果返回前又滚回了预取窗口 (request_window 当时因为仍在 _pending 中没有重新提交)，这里补交
+            if self.is_wanted(key) and key not in self._pixmaps:
+                self._pending.add(key)
+                self._decode_requested.emit(key)
+            return
+        if image.isNull():
+            self._failed.add(key) # 真正的解码失败，不再重试
+            return
+        self._pixmaps[key] = QPixmap.fromImage(image)
+        self._evict_over_capacity()
+        self.pixmap_ready.emit(key)
+
+    def _evict_over_capacity(self):
+        with self._lock:
+            window_keys = set(self._window_keys)
+        for key in list(self._pixmaps):
+            if len(self._pixmaps) <= self.max_cached_pixmaps:
+                break
+            if key not in window_keys:
+                del self._pixmaps[key]
+
+
+class SegmentCarousel(QWidget):
+    """
+    虚拟化的片段轮播。只保存片段数据，不为每个片段创建控件：
+    绘制时只画当前片段和两侧各 visible_radius 个片段，背景图只为当前片段两侧 prefetch_radius 范围内的片段在后台解码。
+    """
+    current_index_changed = pyqtSignal(int)
+    segment_activated = pyqtSignal(int)  # 点击当前片段 (或按回车) 时发出，参数为片段索引
+
+    CENTER_WIDTH_RATIO = 0.56
+    CENTER_HEIGHT_RATIO = 0.86
+    SIDE_SCALE = 0.7
+    SIDE_OFFSET_RATIO = 0.36 # 相邻片段中心相对控件中心的水平偏移 (占控件宽度)
+
+    def __init__(self, visible_radius: int = 1, prefetch_radius: int = 2, max_cached_pixmaps: int = 12, parent=None):
+        super().__init__(parent)
+        self.visible_radius = visible_radius
+        self.prefetch_radius = max(prefetch_radius, visible_radius)
+        self.segments: List[Segment] = []
+        self.current_index = 0
+
+        self.pixmap_loader = SegmentPixmapLoader(max(max_cached_pixmaps, 2 * self.prefetch_radius + 1), self)
+        self.pixmap_loader.pixmap_ready.connect(self._on_pixmap_ready)
+
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.setMinimumHeight(200)
+
+    def set_segments(self, segments: List[Segment], select_segment_id: Optional[int] = None):
+        """替换片段列表；select_segment_id 指定要显示的片段，否则尽量保持当前位置"""
+        self.segments = list(segments)
+        if select_segment_id is not None:
+            for index, segment in enumerate(self.segments):
+                if segment.id == select_segment_id:
+                    self.current_index = index
+                    break
+        self.current_index = max(0, min(self.current_index, len(self.segments) - 1))
+        self._request_window()
+        self.update()
+        self.current_index_changed.emit(self.current_index)
+
+    def current_segment(self) -> Optional[Segment]:
+        if 0 <= self.current_index < len(self.segments):
+            return self.segments[self.current_index]
+        return None
+
+    def set_current_index(self, index: int):
+        if not self.segments:
+            return
+        index = max(0, min(index, len(self.segments) - 1))
+        if index == self.current_index:
+            return
+        self.current_index = index
+        self._request_window()
+        self.update()
+        self.current_index_changed.emit(index)
+
+    def show_next(self):
+        self.set_current_index(self.current_index + 1)
+
+    def show_previous(self):
+        self.set_current_index(self.current_index - 1)
+
+    def shutdown(self):
+        self.pixmap_loader.shutdown()
+
+    # --- 预取 ---
+    def _decode_long_edge(self) -> int:
+        """按当前片段显示框的大小选择解码尺寸，取不小于显示尺寸的缩略图档位，避免窗口尺寸微调时重复解码"""
+        center_rect = self._slot_rect(0)
+        needed = int(max(center_rect.width(), center_rect.height()))
+        for size in sorted(THUMBNAIL_SIZES):
+            if size >= needed:
+                return size
+        return (needed + 255) // 256 * 256
+
+    def _pixmap_key(self, segment: Segment, long_edge: int):
+        if not segment.background_image_path:
+            return None
+        return (segment.background_image_path, long_edge)
+
+    def _request_window(self):
+        if not self.segments:
+            self.pixmap_loader.clear()
+            return
+        long_edge = self._decode_long_edge()
+        keys = []
+        # 当前片段优先，然后由近到远
+        for distance in range(self.prefetch_radius + 1):
+            for index in {self.current_index - distance, self.current_index + distance}:
+                if 0 <= index < len(self.segments):
+                    key = self._pixmap_key(self.segments[index], long_edge)
+                    if key is not None and key not in keys:
+                        keys.append(key)
+        self.pixmap_loader.request_window(keys)
+
+    def _on_pixmap_ready(self, key):
+        self.update()
+
+    # --- 绘制 ---
+    def _slot_rect(self, offset: int) -> QRectF:
+        """相对当前片段偏移 offset 的片段显示框"""
+        width = self.width() * self.CENTER_WIDTH_RATIO
+        height = self.height() * self.CENTER_HEIGHT_RATIO
+        if offset != 0:
+            scale = self.SIDE_SCALE ** abs(offset)
+            width *= scale
+            height *= scale
+        center_x = self.width() / 2 + offset * self.width() * self.SIDE_OFFSET_RATIO
+        center_y = self.height() / 2
+        return QRectF(center_x - width / 2, center_y - height / 2, width, height)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.fillRect(self.rect(), QColor("#f0f0f0"))
+
+        if not self.segments:
+            painter.setPen(QColor("gray"))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "当前时间轴还没有片段，点击下方按钮新建片段。")
+            return
+
+        long_edge = self._decode_long_edge()
+        # 先画两侧 (远的先画)，最后画当前片段，让它盖在最上面
+        offsets = sorted(range(-self.visible_radius, self.visible_radius + 1), key=lambda offset: -abs(offset))
+        for offset in offsets:
+            index = self.current_index + offset
+            if 0 <= index < len(self.segments):
+                self._paint_segment(painter, index, self._slot_rect(offset), long_edge, is_current=(offset == 0))
+        painter.end()
+
+    def _paint_segment(self, painter: QPainter, index: int, slot_rect: QRectF, long_edge: int, is_current: bool):
+        segment = self.segments[index]
+        key = self._pixmap_key(segment, long_edge)
+        pixmap = self.pixmap_loader.get(key) if key is not None else None
+
+        if pixmap is not None and not pixmap.isNull():
+            size = pixmap.size().toSizeF().scaled(slot_rect.size(), Qt.AspectRatioMode.KeepAspectRatio)
+            target_rect = QRectF(slot_rect.center().x() - size.width() / 2, slot_rect.center().y() - size.height() / 2,
+                                 size.width(), size.height())
+            painter.drawPixmap(target_rect, pixmap, QRectF(pixmap.rect()))
+        else:
+            target_rect = slot_rect
+            painter.fillRect(target_rect, QColor("#dcdcdc"))
+            painter.setPen(QColor("gray"))
+            painter.drawText(target_rect, Qt.AlignmentFlag.AlignCenter, "加载中..." if key is not None else "无背景图")
+
+        if not is_current:
+            painter.fillRect(target_rect, QColor(255, 255, 255, 110)) # 两侧片段淡化
+        painter.setPen(QPen(QColor("#5a8dee") if is_current else QColor("lightgray"), 2 if is_current else 1))
+        painter.drawRect(target_rect)
+        if is_current:
+            painter.setPen(QColor("black"))
+            painter.drawText(target_rect.adjusted(0, 0, 0, -8), Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignBottom,
+                             f"片段 {index + 1} / {len(self.segments)}")
+
+    # --- 交互 ---
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._request_window()
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.MouseButton.LeftButton or not self.segments:
+            return super().mousePressEvent(event)
+        position = event.position()
+        if self._slot_rect(0).contains(position):
+            self.segment_activated.emit(self.current_index)
+            return
+        for offset in range(1, self.visible_radius + 1):
+            for signed_offset in (-offset, offset):
+                if self._slot_rect(signed_offset).contains(position):
+                    self.set_current_index(self.current_index + signed_offset)
+                    return
+
+    def wheelEvent(self, event):
+        delta = event.angleDelta().y() or event.angleDelta().x()
+        if delta < 0:
+            self.show_next()
+        elif delta > 0:
+            self.show_previous()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Right:
+            self.show_next()
+        elif event.key() == Qt.Key.Key_Left:
+            self.show_previous()
+        elif event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter) and self.segments:
+            self.segment_activated.emit(self.current_index)
+        else:
+            super().keyPressEvent(event)
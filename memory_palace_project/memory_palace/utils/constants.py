@@ -27,5 +27,10 @@ DEFAULT_SEGMENT_BACKGROUND_ALIAS = ":/assets/images/default_segment_background.p
 DEFAULT_SOUND_RECITE_SUCCESS_ALIAS = ":/assets/sounds/recite_success.wav"
 
 
+# 背景图缩略图 (多级细节) 缓存目录，文件按图片内容哈希命名，导入图片时生成
+THUMBNAIL_DIR = os.path.join(DATA_DIR, "thumbnails")
+THUMBNAIL_SIZES = (256, 512, 1024) # 缩略图长边像素，只生成小于原图的尺寸
+
+
 # 最大宽度常量等可以放在这里或settings.json
 DEFAULT_NODE_MAX_WIDTH_PX = 300
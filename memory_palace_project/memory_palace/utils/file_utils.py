@@ -1,90 +1,172 @@
 import os
-import shutil
-import uuid
+import hashlib
 import logging
-from PyQt6.QtGui import QImage, QPixmap, QIcon # QIcon 可能不需要在这里，但在UI部分需要
-from PyQt6.QtCore import QFile, QIODevice, Qt # Qt 可能不需要在这里
+from PyQt6.QtGui import QImageReader
+from PyQt6.QtCore import QFile, QIODevice, Qt, QBuffer, QByteArray, QSize
 from typing import Optional, Tuple # <<<<<<<<<<<<<<<<<<<<<<<<<<<< 确保导入了 Optional 和 Tuple
 
-from .constants import DATA_DIR
+from .constants import DATA_DIR, THUMBNAIL_DIR, THUMBNAIL_SIZES
 
 logger = logging.getLogger(__name__)
 
-def get_timeline_data_dir(timeline_id_str: str) -> str:
-    """获取特定时间轴的数据存储目录"""
-    return os.path.join(DATA_DIR, "timelines", timeline_id_str)
+BACKGROUND_IMAGE_PREFIX = "segment_bg_"
+CONTENT_HASH_LENGTH = 32 # 文件名中使用的 sha256 十六进制前缀长度
+THUMBNAIL_JPEG_QUALITY = 85
+THUMBNAIL_EXTENSIONS = (".jpg", ".png") # 不透明图片的缩略图存为 JPG，带透明通道的存为 PNG
 
-def get_timeline_background_images_dir(timeline_id_str: str) -> str:
-    """获取特定时间轴的背景图片存储目录"""
-    return os.path.join(get_timeline_data_dir(timeline_id_str), "background_images")
+def get_image_store_dir() -> str:
+    """获取内容寻址图片库目录 (多个时间轴/片段共享同一份图片文件，引用计数见 DatabaseManager.store_image)"""
+    return os.path.join(DATA_DIR, "images")
 
-def copy_image_to_data_dir(source_path_or_qresource_alias: str,
-                           timeline_id_str: str,
-                           original_filename: Optional[str] = None) -> Tuple[Optional[str], Optional[int], Optional[int]]: # 使用 Tuple
+def store_image_by_content(source_path_or_qresource_alias: str,
+                           original_filename: Optional[str] = None) -> Tuple[Optional[str], Optional[str], Optional[int], Optional[int]]:
     """
-    将图片文件复制到应用数据目录下对应时间轴的背景图片文件夹中。
-    返回 (新的文件路径, 原始宽度, 原始高度) 或 (None, None, None) 如果失败。
-    source_path_or_qresource_alias: 可以是本地文件系统路径，也可以是Qt资源路径 (e.g., ":/assets/images/default.png")
+    将图片保存到内容寻址图片库 (get_image_store_dir)，相同内容的图片只保存一份。
+    返回 (内容哈希, 文件路径, 原始宽度, 原始高度) 或 (None, None, None, None) 如果失败。
     """
-    target_dir = get_timeline_background_images_dir(timeline_id_str)
-    os.makedirs(target_dir, exist_ok=True)
-
     _, ext = os.path.splitext(original_filename if original_filename else source_path_or_qresource_alias)
     if not ext:
         ext = ".png"
-
-    new_filename = f"segment_bg_{uuid.uuid4().hex}{ext}"
-    target_path = os.path.join(target_dir, new_filename)
-
-    width, height = None, None
-
     try:
-        if source_path_or_qresource_alias.startswith(":/"):
-            qfile = QFile(source_path_or_qresource_alias)
-            if qfile.open(QIODevice.OpenModeFlag.ReadOnly):
-                image_data = qfile.readAll().data()
-                qfile.close()
-
-                img = QImage()
-                if img.loadFromData(image_data):
-                    width = img.width()
-                    height = img.height()
-                    if img.save(target_path):
-                        logger.info(f"Image from Qt resource '{source_path_or_qresource_alias}' copied to '{target_path}'")
-                        return target_path, width, height
-                    else:
-                        logger.error(f"Failed to save image data from Qt resource to '{target_path}'")
-                else:
-                    logger.error(f"Failed to load image data from Qt resource: {source_path_or_qresource_alias}")
-            else:
-                logger.error(f"Failed to open Qt resource file: {source_path_or_qresource_alias}, Error: {qfile.errorString()}")
-        else:
-            if os.path.exists(source_path_or_qresource_alias):
-                try:
-                    img = QImage(source_path_or_qresource_alias)
-                    if not img.isNull():
-                        width = img.width()
-                        height = img.height()
-                    else:
-                        pix = QPixmap(source_path_or_qresource_alias)
-                        if not pix.isNull():
-                            width = pix.width()
-                            height = pix.height()
-                        else:
-                             logger.warning(f"Could not determine dimensions of image: {source_path_or_qresource_alias}")
-                except Exception as e_img:
-                    logger.warning(f"Error getting image dimensions for {source_path_or_qresource_alias}: {e_img}")
-
-                shutil.copy2(source_path_or_qresource_alias, target_path)
-                logger.info(f"Image '{source_path_or_qresource_alias}' copied to '{target_path}'")
-                return target_path, width, height
-            else:
-                logger.error(f"Source image file not found: {source_path_or_qresource_alias}")
-
+        target_dir = get_image_store_dir()
+        os.makedirs(target_dir, exist_ok=True)
+        return _save_image_by_content(source_path_or_qresource_alias, target_dir, ext)
     except Exception as e:
-        logger.error(f"Error copying image to data directory: {e}")
-
-    return None, None, None
+        logger.error(f"Error storing image '{source_path_or_qresource_alias}' in image store: {e}")
+    return None, None, None, None
+
+
+def _save_image_by_content(source_path_or_qresource_alias: str, target_dir: str,
+                           ext: str) -> Tuple[Optional[str], Optional[str], Optional[int], Optional[int]]:
+    """按内容哈希命名保存图片 (已存在则复用) 并生成缩略图，返回 (内容哈希, 文件路径, 宽, 高)"""
+    image_data = _read_image_bytes(source_path_or_qresource_alias)
+    if image_data is None:
+        return None, None, None, None
+
+    content_hash = hashlib.sha256(image_data).hexdigest()
+    target_path = os.path.join(target_dir, f"{BACKGROUND_IMAGE_PREFIX}{content_hash[:CONTENT_HASH_LENGTH]}{ext}")
+
+    width, height = probe_image_size(image_data)
+    if width is None:
+        logger.warning(f"Could not determine dimensions of image: {source_path_or_qresource_alias}")
+
+    if os.path.exists(target_path):
+        logger.info(f"Image '{source_path_or_qresource_alias}' already stored as '{target_path}', reusing it")
+    else:
+        # 先写临时文件再替换，避免中途失败留下不完整的图片
+        temp_path = target_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(image_data)
+        os.replace(temp_path, target_path)
+        logger.info(f"Image '{source_path_or_qresource_alias}' copied to '{target_path}'")
+    ensure_thumbnails(image_data, content_hash)
+    return content_hash, target_path, width, height
+
+
+def _read_image_bytes(source_path_or_qresource_alias: str) -> Optional[bytes]:
+    """读取本地文件或Qt资源文件的原始字节，失败时返回 None"""
+    if source_path_or_qresource_alias.startswith(":/"):
+        qfile = QFile(source_path_or_qresource_alias)
+        if not qfile.open(QIODevice.OpenModeFlag.ReadOnly):
+            logger.error(f"Failed to open Qt resource file: {source_path_or_qresource_alias}, Error: {qfile.errorString()}")
+            return None
+        image_data = qfile.readAll().data()
+        qfile.close()
+        return image_data
+
+    if not os.path.exists(source_path_or_qresource_alias):
+        logger.error(f"Source image file not found: {source_path_or_qresource_alias}")
+        return None
+    with open(source_path_or_qresource_alias, "rb") as f:
+        return f.read()
+
+
+def probe_image_size(image_data: bytes) -> Tuple[Optional[int], Optional[int]]:
+    """只读取图片文件头获取尺寸 (QImageReader.size 不解码像素数据)，无法识别时返回 (None, None)"""
+    buffer = QBuffer()
+    buffer.setData(QByteArray(image_data))
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    size = QImageReader(buffer).size()
+    buffer.close()
+    if not size.isValid():
+        return None, None
+    return size.width(), size.height()
+
+
+def get_thumbnail_path(content_hash: str, size: int, ext: str = ".jpg") -> str:
+    """内容哈希、长边尺寸和扩展名 (THUMBNAIL_EXTENSIONS 之一) 对应的缩略图路径"""
+    return os.path.join(THUMBNAIL_DIR, f"{content_hash[:CONTENT_HASH_LENGTH]}_{size}{ext}")
+
+
+def _find_thumbnail(content_hash: str, size: int) -> Optional[str]:
+    """返回已生成的缩略图路径 (JPG 或 PNG)，还没有生成时返回 None"""
+    for ext in THUMBNAIL_EXTENSIONS:
+        thumbnail_path = get_thumbnail_path(content_hash, size, ext)
+        if os.path.exists(thumbnail_path):
+            return thumbnail_path
+    return None
+
+
+def ensure_thumbnails(image_data: bytes, content_hash: str, sizes: Tuple[int, ...] = THUMBNAIL_SIZES) -> bool:
+    """
+    生成图片各尺寸的缩略图 (已存在的跳过)，只生成长边小于原图的尺寸。
+    解码一次：按最大的缺失尺寸让 QImageReader 直接缩小解码 (JPEG 可以在解码时缩小)，更小的尺寸从它缩放。
+    带透明通道的图片保存为 PNG (JPG 会把透明区域变成黑色)，其他图片保存为 JPG。
+    """
+    width, height = probe_image_size(image_data)
+    if width is None:
+        return False
+    long_edge = max(width, height)
+    missing_sizes = sorted((size for size in sizes
+                            if size < long_edge and _find_thumbnail(content_hash, size) is None),
+                           reverse=True)
+    if not missing_sizes:
+        return True
+
+    os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+    buffer = QBuffer()
+    buffer.setData(QByteArray(image_data))
+    buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+    reader = QImageReader(buffer)
+    scale = missing_sizes[0] / long_edge
+    reader.setScaledSize(QSize(max(1, round(width * scale)), max(1, round(height * scale))))
+    image = reader.read()
+    buffer.close()
+    if image.isNull():
+        logger.warning(f"Failed to decode image for thumbnails ({content_hash[:CONTENT_HASH_LENGTH]}): {reader.errorString()}")
+        return False
+
+    if image.hasAlphaChannel():
+        ext, image_format, quality = ".png", "PNG", -1
+    else:
+        ext, image_format, quality = ".jpg", "JPG", THUMBNAIL_JPEG_QUALITY
+    for size in missing_sizes:
+        if max(image.width(), image.height()) > size:
+            image = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        thumbnail_path = get_thumbnail_path(content_hash, size, ext)
+        if not image.save(thumbnail_path, image_format, quality):
+            logger.warning(f"Failed to save thumbnail: {thumbnail_path}")
+    logger.debug(f"Thumbnails {missing_sizes} generated for image {content_hash[:CONTENT_HASH_LENGTH]}")
+    return True
+
+
+def get_image_lod_path(image_path: Optional[str], target_long_edge: int) -> Optional[str]:
+    """
+    返回显示 image_path 时够用的最小缩略图路径 (长边 >= target_long_edge)，没有合适的缩略图时返回原图路径。
+    只适用于 store_image_by_content 保存的图片 (文件名中包含内容哈希)。
+    """
+    if not image_path:
+        return image_path
+    file_stem = os.path.splitext(os.path.basename(image_path))[0]
+    if not file_stem.startswith(BACKGROUND_IMAGE_PREFIX):
+        return image_path
+    content_hash = file_stem[len(BACKGROUND_IMAGE_PREFIX):]
+    for size in sorted(THUMBNAIL_SIZES):
+        if size >= target_long_edge:
+            thumbnail_path = _find_thumbnail(content_hash, size)
+            if thumbnail_path is not None:
+                return thumbnail_path
+    return image_path
 
 
 def delete_app_data_file(file_path_in_data_dir: str) -> bool:
@@ -107,4 +189,17 @@ def delete_app_data_file(file_path_in_data_dir: str) -> bool:
             return False
     except Exception as e:
         logger.error(f"Error deleting file {file_path_in_data_dir}: {e}")
-        return False
\ No newline at end of file
+        return False
+
+
+def delete_stored_image(content_hash: str, file_path: Optional[str]) -> bool:
+    """删除图片库中的图片文件及其所有缩略图 (引用计数归零后由 DatabaseManager.collect_orphaned_images 调用)"""
+    deleted = True
+    if file_path and os.path.exists(file_path):
+        deleted = delete_app_data_file(file_path)
+    for size in THUMBNAIL_SIZES:
+        for ext in THUMBNAIL_EXTENSIONS:
+            thumbnail_path = get_thumbnail_path(content_hash, size, ext)
+            if os.path.exists(thumbnail_path):
+                deleted = delete_app_data_file(thumbnail_path) and deleted
+    return deleted